@@ -0,0 +1,93 @@
+"""
+Microbenchmarks: PageRangeSet vs. the previous list/set based page parsing.
+
+Run from the repository root:
+
+    python -m benchmarks.page_ranges
+"""
+import timeit
+
+from utils.page_ranges import PageRangeSet
+
+
+# ---------------------------------------------------------------------------
+# Previous implementations (utils.parsers / PrintJob before PageRangeSet)
+# ---------------------------------------------------------------------------
+def legacy_extract_pages(range_str: str) -> list[int]:
+    result = set()
+    for part in range_str.replace(" ", "").split(","):
+        if "-" in part:
+            start, end = map(int, part.split("-"))
+            result.update(range(start, end + 1))
+        else:
+            result.add(int(part))
+    return sorted(result)
+
+
+def legacy_merge_pages(pages: list[int]) -> str:
+    pages = sorted(set(pages))
+    ranges = []
+    start = prev = pages[0]
+    for p in pages[1:]:
+        if p == prev + 1:
+            prev = p
+        else:
+            ranges.append(str(start) if start == prev else f"{start}-{prev}")
+            start = prev = p
+    ranges.append(str(start) if start == prev else f"{start}-{prev}")
+    return ",".join(ranges)
+
+
+def legacy_blocks(range_str: str, orientation_blocks: list[dict]) -> list[str]:
+    selected = set(legacy_extract_pages(range_str))
+    out = []
+    for block in orientation_blocks:
+        block_pages = [p for p in range(block["start"], block["end"] + 1) if p in selected]
+        if block_pages:
+            out.append(legacy_merge_pages(block_pages))
+    return out
+
+
+def new_blocks(range_str: str, orientation_blocks: list[dict]) -> list[str]:
+    selected = PageRangeSet.from_string(range_str)
+    out = []
+    for block in orientation_blocks:
+        block_pages = selected & PageRangeSet.from_range(block["start"], block["end"])
+        if block_pages:
+            out.append(str(block_pages))
+    return out
+
+
+CASES = {
+    "small": "1-5,8,10-12",
+    "whole document": "1-5000",
+    "many ranges": ",".join(f"{i}-{i + 3}" for i in range(1, 5000, 10)),
+}
+BLOCKS = [
+    {"start": s, "end": s + 499, "type": "portrait" if (s // 500) % 2 else "landscape"}
+    for s in range(1, 5000, 500)
+]
+
+
+def _bench(label: str, func, number: int) -> float:
+    seconds = timeit.timeit(func, number=number) / number
+    print(f"  {label:<28} {seconds * 1e6:10.1f} µs")
+    return seconds
+
+
+def main(number: int = 200) -> None:
+    for name, range_str in CASES.items():
+        assert len(PageRangeSet.from_string(range_str)) == len(legacy_extract_pages(range_str))
+        assert new_blocks(range_str, BLOCKS) == legacy_blocks(range_str, BLOCKS)
+
+        print(f"{name}: {range_str[:40]}{'…' if len(range_str) > 40 else ''}")
+        old = _bench("count (legacy)", lambda: len(legacy_extract_pages(range_str)), number)
+        new = _bench("count (PageRangeSet)", lambda: len(PageRangeSet.from_string(range_str)), number)
+        print(f"  {'speed-up':<28} {old / new:10.1f}x")
+        old = _bench("orientation blocks (legacy)", lambda: legacy_blocks(range_str, BLOCKS), number)
+        new = _bench("orientation blocks (new)", lambda: new_blocks(range_str, BLOCKS), number)
+        print(f"  {'speed-up':<28} {old / new:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
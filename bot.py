@@ -11,7 +11,15 @@ from modules.analytics import analytics
 from modules.ui.router import router as ui_router
 from modules.admin.router import router as admin_router
 
-from db import init_db
+from db import init_db, close_connections
+from modules.admin.services.backup import run_scheduled_backups
+from modules.admin.services.ban import load_bans
+from modules.admin.services.control import load_pause_state
+from modules.billing.services.promo_index import load_promo_index
+from modules.middlewares import setup_middlewares
+from modules.printing.print_service import drain_queue, recover_queue, run_queue_status_refresher
+from modules.printing.imposition import shutdown_pool
+from modules.ui.keyboards.tracker import KeyboardTrackingMiddleware, flush_active_messages, run_tracker_flusher
 
 if __name__ == "__main__":
     init_db()
@@ -26,13 +34,35 @@ async def main():
         token=BOT_TOKEN,
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
+    bot.session.middleware(KeyboardTrackingMiddleware())
     dp = Dispatcher(storage=MemoryStorage())
+    setup_middlewares(dp)
 
     dp.include_router(analytics.router)
     dp.include_router(admin_router)
     dp.include_router(ui_router)
 
-    await dp.start_polling(bot)
+    await load_bans()
+    await load_pause_state()
+    await load_promo_index()
+    await recover_queue(bot)
+
+    background = [
+        asyncio.create_task(run_scheduled_backups()),
+        asyncio.create_task(run_tracker_flusher()),
+        asyncio.create_task(run_queue_status_refresher()),
+    ]
+    try:
+        # start_polling останавливается по SIGTERM/SIGINT, после чего очередь
+        # печати дренируется в finally.
+        await dp.start_polling(bot)
+    finally:
+        await drain_queue()
+        shutdown_pool()
+        for task in background:
+            task.cancel()
+        await flush_active_messages()
+        close_connections()
 
 
 if __name__ == "__main__":
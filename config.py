@@ -24,6 +24,12 @@ CONTACT_USERNAME: str = "danila_okv"
 
 DB_FILE_NAME: str = "bot.db"
 
+# SQLite tuning.  Connections are long-lived (one per thread), so these
+# pragmas are applied once per connection rather than on every query.
+DB_BUSY_TIMEOUT: float = 5.0          # seconds to wait for a write lock
+DB_CACHE_SIZE_KB: int = 8192          # page cache per connection
+DB_CACHED_STATEMENTS: int = 256       # prepared statements kept per connection
+
 # File system paths
 _BASE_DIR: Path = Path(__file__).resolve().parent
 DATA_DIR: Path = _BASE_DIR / "data"
@@ -52,6 +58,35 @@ LOG_TO_CONSOLE: bool = False
 QUEUE_TIME_PER_PAGE: float = 5.0
 QUEUE_WARMUP_TIME: float = 10.0
 QUEUE_STATUS_UPDATE_INTERVAL: float = 30.0
+PRINTER_NAME: str | None = None         # очередь CUPS; None — принтер по умолчанию
+IMPOSITION_WORKERS: int = 2             # процессов для подготовки spool-файлов
+CUPS_POLL_INTERVAL: float = 3.0         # период опроса состояния заданий CUPS, сек
+CUPS_UNKNOWN_POLLS: int = 3             # сколько опросов подряд CUPS может не знать новое задание
+PRINT_PREFETCH_DEPTH: int = 1          # сколько следующих заданий держать уже отправленными в CUPS
+PRINT_DRAIN_TIMEOUT: float = 60.0       # сколько ждать текущее задание при остановке бота, сек
+PRINT_BATCH_ENABLED: bool = False       # объединять мелкие задания подряд в одно задание CUPS
+PRINT_BATCH_MAX_PAGES: int = 3          # «мелкое» задание — не больше стольких печатаемых страниц
+PRINT_BATCH_MAX_JOBS: int = 10          # не больше стольких заданий в одной отправке
+PRINT_SCHEDULER: str = "fifo"           # порядок печати: "fifo", "sjf" или "fair"
+PRINT_SJF_AGING: float = 0.5            # sjf: на сколько страниц «короче» становится задание за секунду ожидания
+PRINT_FAIR_WEIGHTS: dict[int, float] = {}  # fair: user_id -> вес (по умолчанию 1)
+PRINT_CHUNK_PAGES: int = 0              # печатать большие задания частями по столько страниц; 0 — целиком
+PRINT_PREEMPT_MAX_PAGES: int = 5        # задания не больше стольких страниц печатаются между частями
+
+# Active inline keyboards are cached in memory and flushed to the DB periodically
+KEYBOARD_FLUSH_INTERVAL: float = 5.0
+KEYBOARD_CACHE_SIZE: int = 5000         # сколько пользователей держим в памяти (LRU)
+
+# Mass notifications (/gift to many users)
+BROADCAST_RATE_PER_SEC: float = 25.0    # лимит Telegram ~30 сообщений в секунду на бота
+BROADCAST_CONCURRENCY: int = 10         # одновременных запросов к Telegram
+BROADCAST_PROGRESS_INTERVAL: float = 2.0  # как часто обновлять отчёт администратору, сек
+
+# Database backups
+BACKUP_INTERVAL_HOURS: float = 24.0     # 0 — только вручную через /backup
+BACKUP_KEEP_DAILY: int = 7              # сколько последних дней хранить (по копии в день)
+BACKUP_KEEP_WEEKLY: int = 4             # сколько последних недель хранить (по копии в неделю)
+BACKUP_PAGES_PER_STEP: int = 256        # страниц SQLite за один шаг online backup
 
 # Promotional settings
 PERSONAL_DISCOUNT_TIERS: dict[int, float] = {
@@ -60,6 +95,7 @@ PERSONAL_DISCOUNT_TIERS: dict[int, float] = {
     600: 15.0,
 } 
 FREE_PAGES_ON_REGISTER: int = 5
+PRICING_PROFILE_TTL: float = 600.0   # seconds a cached user pricing profile stays valid
 DISCOUNT_PERCENT: float = 0.0
 
 ALLOWED_FILE_TYPES: list[str] = [
@@ -77,6 +113,7 @@ ALLOWED_FILE_TYPES: list[str] = [
 
 MAX_FILE_SIZE_MB: int = 20
 MAX_PAGES_PER_JOB: int = 100
+MAX_COPIES_PER_JOB: int = 50
 
 # Derived values for convenience
 DB_PATH: Path = _BASE_DIR / DB_FILE_NAME
@@ -92,6 +129,9 @@ __all__ = [
     "PRICE_PER_PAGE",
     "ADMIN_IDS",
     "DB_FILE_NAME",
+    "DB_BUSY_TIMEOUT",
+    "DB_CACHE_SIZE_KB",
+    "DB_CACHED_STATEMENTS",
     "DATA_DIR",
     "UPLOAD_DIR",
     "TMP_DIR",
@@ -105,14 +145,39 @@ __all__ = [
     "LOG_TO_CONSOLE",
     "FREE_PAGES_ON_REGISTER",
     "DISCOUNT_PERCENT",
+    "PRICING_PROFILE_TTL",
     "QUEUE_TIME_PER_PAGE",
     "QUEUE_WARMUP_TIME",
     "QUEUE_STATUS_UPDATE_INTERVAL",
+    "PRINTER_NAME",
+    "IMPOSITION_WORKERS",
+    "CUPS_POLL_INTERVAL",
+    "CUPS_UNKNOWN_POLLS",
+    "PRINT_PREFETCH_DEPTH",
+    "PRINT_DRAIN_TIMEOUT",
+    "PRINT_BATCH_ENABLED",
+    "PRINT_BATCH_MAX_PAGES",
+    "PRINT_BATCH_MAX_JOBS",
+    "PRINT_SCHEDULER",
+    "PRINT_SJF_AGING",
+    "PRINT_FAIR_WEIGHTS",
+    "PRINT_CHUNK_PAGES",
+    "PRINT_PREEMPT_MAX_PAGES",
+    "KEYBOARD_FLUSH_INTERVAL",
+    "KEYBOARD_CACHE_SIZE",
+    "BROADCAST_RATE_PER_SEC",
+    "BROADCAST_CONCURRENCY",
+    "BROADCAST_PROGRESS_INTERVAL",
     "PERSONAL_DISCOUNT_TIERS",
     "ALLOWED_FILE_TYPES",
     "MAX_FILE_SIZE_MB",
     "MAX_PAGES_PER_JOB",
+    "MAX_COPIES_PER_JOB",
     "BACKUP_PATH",
+    "BACKUP_INTERVAL_HOURS",
+    "BACKUP_KEEP_DAILY",
+    "BACKUP_KEEP_WEEKLY",
+    "BACKUP_PAGES_PER_STEP",
     "DB_PATH",
     "UPLOAD_DIR_STR",
     "TMP_DIR_STR",
@@ -1,135 +1,203 @@
 # db.py
+import asyncio
 import sqlite3
-from config import DB_PATH
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Iterable, TypeVar
+from migrations import check_query_plans, run_migrations
+from config import DB_PATH, DB_BUSY_TIMEOUT, DB_CACHE_SIZE_KB, DB_CACHED_STATEMENTS
+from modules.analytics.logger import info, warning
 
-def get_connection():
-    conn = sqlite3.connect(DB_PATH, detect_types=sqlite3.PARSE_DECLTYPES)
+T = TypeVar("T")
+
+# Соединения переиспользуются: каждый поток получает одно долгоживущее
+# соединение, которое открывается при первом обращении и закрывается только
+# в close_connections().  Благодаря этому PRAGMA выполняются один раз,
+# а кэш подготовленных выражений sqlite3 (cached_statements) реально
+# работает между запросами.
+_local = threading.local()
+_connections: list[sqlite3.Connection] = []
+_connections_lock = threading.Lock()
+# Увеличивается при close_connections(), чтобы потоки переоткрыли соединения.
+_generation = 0
+
+# Куда подключаемся.  По умолчанию — файл bot.db; use_memory_database()
+# переключает на общую in-memory базу (для тестов и отладки).
+_database: str = str(DB_PATH)
+_database_is_uri: bool = False
+_MEMORY_URI = "file:okv_print_bot?mode=memory&cache=shared"
+
+# Все асинхронные запросы выполняются в одном выделенном потоке, как в
+# aiosqlite: event loop не блокируется, а записи естественным образом
+# сериализуются без борьбы за блокировку между соединениями.
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        _database,
+        detect_types=sqlite3.PARSE_DECLTYPES,
+        timeout=DB_BUSY_TIMEOUT,
+        cached_statements=DB_CACHED_STATEMENTS,
+        # Соединение используется только своим потоком; флаг снят лишь для
+        # того, чтобы close_connections() мог закрыть его при остановке.
+        check_same_thread=False,
+        uri=_database_is_uri,
+    )
     conn.row_factory = sqlite3.Row
-    # Включаем проверку внешних ключей, если потребуется:
+    # WAL позволяет читать параллельно с записью, а synchronous=NORMAL
+    # в режиме WAL безопасен и избавляет от fsync на каждый коммит.
+    conn.execute("PRAGMA journal_mode = WAL;")
+    conn.execute("PRAGMA synchronous = NORMAL;")
+    conn.execute(f"PRAGMA cache_size = -{int(DB_CACHE_SIZE_KB)};")
+    conn.execute("PRAGMA temp_store = MEMORY;")
     conn.execute("PRAGMA foreign_keys = ON;")
     return conn
 
-def init_db():
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Return the long-lived connection of the current thread.
+
+    The connection must not be closed by callers; ``with get_connection() as
+    conn:`` only commits or rolls back the current transaction.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "generation", None) != _generation:
+        conn = _connect()
+        _local.conn = conn
+        _local.generation = _generation
+        with _connections_lock:
+            _connections.append(conn)
+    return conn
+
+
+def close_connections() -> None:
+    """Close every pooled connection.  Call once on shutdown."""
+    global _generation
+    with _connections_lock:
+        _generation += 1
+        while _connections:
+            conn = _connections.pop()
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+    _local.__dict__.pop("conn", None)
+
+
+def use_memory_database() -> None:
+    """
+    Switch every connection to a fresh shared in-memory database.
+
+    Intended for tests: call it before init_db().  The database lives as
+    long as at least one pooled connection is open, so close_connections()
+    discards it.
+    """
+    global _database, _database_is_uri
+    close_connections()
+    _database, _database_is_uri = _MEMORY_URI, True
+
+
+def backup_to(
+    dest: str,
+    pages: int = 256,
+    sleep: float = 0.0,
+    progress: Callable[[int, int, int], object] | None = None,
+) -> None:
+    """
+    Copy the live database into ``dest`` with the SQLite online backup API.
+
+    The copy is consistent even under WAL and concurrent writes.  It is taken
+    ``pages`` pages per step; after every step that leaves pages remaining
+    the thread pauses for ``sleep`` seconds so that writers get the database
+    between steps.  Blocking: call it from a worker thread.
+    Uses its own short-lived connection, not the pooled ones.
+    """
+    def _step(status: int, remaining: int, total: int) -> None:
+        if progress is not None:
+            progress(status, remaining, total)
+        # Connection.backup() itself only sleeps when a step is BUSY/LOCKED.
+        if sleep and remaining:
+            time.sleep(sleep)
+
+    src = _connect()
+    try:
+        dst = sqlite3.connect(dest)
+        try:
+            src.backup(dst, pages=pages, progress=_step, sleep=sleep)
+        finally:
+            dst.close()
+    finally:
+        src.close()
+
+
+# ---------------------------------------------------------------------------
+# Async access
+# ---------------------------------------------------------------------------
+async def run_db(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run a blocking DB function on the dedicated SQLite thread."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(func, *args, **kwargs))
+
+
+def _execute(sql: str, params: Iterable[Any]) -> int:
+    with get_connection() as conn:
+        return conn.execute(sql, tuple(params)).rowcount
+
+
+def _executemany(sql: str, seq: Iterable[Iterable[Any]]) -> int:
+    with get_connection() as conn:
+        return conn.executemany(sql, [tuple(p) for p in seq]).rowcount
+
+
+def _fetchone(sql: str, params: Iterable[Any]) -> sqlite3.Row | None:
+    return get_connection().execute(sql, tuple(params)).fetchone()
+
+
+def _fetchall(sql: str, params: Iterable[Any]) -> list[sqlite3.Row]:
+    return get_connection().execute(sql, tuple(params)).fetchall()
+
+
+def _in_transaction(func: Callable[..., T], *args: Any) -> T:
     with get_connection() as conn:
-        c = conn.cursor()
-
-        # Banlist
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS bans (
-            user_id     INTEGER PRIMARY KEY,
-            reason      TEXT,
-            banned_at   TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        """)
-
-        # Print job
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS print_jobs (
-            job_id        INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id       INTEGER NOT NULL,
-            file_name     TEXT,
-            page_count    INTEGER NOT NULL,
-            duplex        INTEGER DEFAULT 0,        -- 0 = односторонняя, 1 = двухсторонняя
-            layout        TEXT,                     -- например "9-up"
-            pages         TEXT,                     -- например "1,2-5,10"
-            copies        INTEGER DEFAULT 1,        -- количество копий
-            status        TEXT NOT NULL,            -- queued, printing, done, error
-            created_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            started_at    TIMESTAMP,
-            completed_at  TIMESTAMP
-            -- без FOREIGN KEY, просто хранить user_id
-        );
-        """)
-
-        # Bot state (pause/resume)
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS bot_state (
-            key   TEXT PRIMARY KEY,
-            value TEXT
-        );
-        """)
-
-        # Queue after /pause
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS paused_actions (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id     INTEGER NOT NULL,
-            action      TEXT NOT NULL,
-            created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        """)
-
-        # Promo
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS promos (
-            code                TEXT PRIMARY KEY,
-            activations_total   INTEGER NOT NULL,
-            activations_used    INTEGER NOT NULL DEFAULT 0,
-            reward_type         TEXT NOT NULL CHECK(reward_type IN ('pages', 'discount')),
-            reward_value        REAL NOT NULL,        -- count of pages or discount percentage
-            created_at          TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            expires_at          TIMESTAMP,            -- absolute expiration date
-            duration_days       INTEGER,              -- validity period in days starting from activation
-            message_template    TEXT                  -- custom message shown to user upon activation
-        );
-        """)
-
-        # Если таблица promos уже создана и не содержит новые столбцы, добавляем их
-        # (например, при обновлении версии бота).
-        existing_cols = [row["name"] for row in conn.execute("PRAGMA table_info(promos)").fetchall()]
-        # duration_days
-        if "duration_days" not in existing_cols:
-            conn.execute("ALTER TABLE promos ADD COLUMN duration_days INTEGER")
-        if "message_template" not in existing_cols:
-            conn.execute("ALTER TABLE promos ADD COLUMN message_template TEXT")
-
-
-        # Promo activations
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS promo_activations (
-            user_id         INTEGER NOT NULL,
-            code            TEXT NOT NULL,
-            activated_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            PRIMARY KEY (user_id, code)
-        );
-        """)
-
-        # Bonuses
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS user_bonus (
-            user_id     INTEGER PRIMARY KEY,
-            bonus_pages INTEGER NOT NULL DEFAULT 0
-        );
-        """)
-
-        # Expenses
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS expenses (
-            id          INTEGER PRIMARY KEY AUTOINCREMENT,
-            category    TEXT NOT NULL CHECK(category IN ('paper','ink','service','other')),
-            quantity    INTEGER NOT NULL DEFAULT 1,                                         -- e.g. number of pages or items
-            amount      REAL NOT NULL,                                                      -- e.g. cost in currency
-            note        TEXT,
-            created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        """)
-
-        # Supplies
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS supplies (
-            name        TEXT PRIMARY KEY,                   -- 'paper', 'ink'
-            quantity    INTEGER NOT NULL DEFAULT 0,
-            minimum     INTEGER NOT NULL DEFAULT 0,
-            updated_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        """)
-
-        # Active inline-keyboards
-        c.execute("""
-        CREATE TABLE IF NOT EXISTS active_keyboards (
-            user_id     INTEGER PRIMARY KEY,
-            message_id  INTEGER NOT NULL
-        );
-        """)
-
-        conn.commit()
+        return func(conn, *args)
+
+
+async def execute(sql: str, params: Iterable[Any] = ()) -> int:
+    """Execute a single write statement and commit.  Returns rowcount."""
+    return await run_db(_execute, sql, params)
+
+
+async def executemany(sql: str, seq: Iterable[Iterable[Any]]) -> int:
+    """Execute a statement for every parameter set in one transaction."""
+    return await run_db(_executemany, sql, seq)
+
+
+async def fetchone(sql: str, params: Iterable[Any] = ()) -> sqlite3.Row | None:
+    return await run_db(_fetchone, sql, params)
+
+
+async def fetchall(sql: str, params: Iterable[Any] = ()) -> list[sqlite3.Row]:
+    return await run_db(_fetchall, sql, params)
+
+
+async def transaction(func: Callable[..., T], *args: Any) -> T:
+    """
+    Call ``func(conn, *args)`` on the DB thread inside one transaction.
+
+    Everything ``func`` executes is committed together, or rolled back if it
+    raises.
+    """
+    return await run_db(_in_transaction, func, *args)
+
+
+def init_db():
+    """Bring the schema up to date and verify the planned query paths."""
+    conn = get_connection()
+    for migration in run_migrations(conn):
+        info(0, "init_db", f"Applied migration {migration.version}: {migration.name}")
+    for problem in check_query_plans(conn):
+        warning(0, "init_db", f"Query plan regression: {problem}")
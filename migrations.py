@@ -0,0 +1,523 @@
+# migrations.py
+"""
+Версионированные миграции схемы.
+
+Каждая миграция применяется ровно один раз и записывается в schema_version.
+Миграции, добавляющие индексы, описывают запросы, которые должны эти индексы
+использовать; check_query_plans() прогоняет их через EXPLAIN QUERY PLAN, чтобы
+регрессии (полный скан, сортировка во временном B-tree) были видны сразу при
+старте бота.
+"""
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Callable
+
+from utils.parsers import count_printed_pages
+
+
+@dataclass(frozen=True)
+class PlanCheck:
+    """A query and what its EXPLAIN QUERY PLAN must (not) contain."""
+    sql: str
+    params: tuple = ()
+    expect: tuple[str, ...] = ()
+    forbid: tuple[str, ...] = ("SCAN ", "USE TEMP B-TREE")
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    apply: Callable[[sqlite3.Connection], None]
+    plan_checks: tuple[PlanCheck, ...] = field(default=())
+
+
+def _add_column(conn: sqlite3.Connection, table: str, column: str, decl: str) -> None:
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in existing:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+# ---------------------------------------------------------------------------
+# 1. Исходная схема
+# ---------------------------------------------------------------------------
+def _001_baseline(conn: sqlite3.Connection) -> None:
+    # IF NOT EXISTS: базы, созданные до появления миграций, проходят эту
+    # миграцию без изменений и просто получают версию 1.
+
+    # Banlist
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS bans (
+        user_id     INTEGER PRIMARY KEY,
+        reason      TEXT,
+        banned_at   TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+
+    # Print job
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS print_jobs (
+        job_id        INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id       INTEGER NOT NULL,
+        file_name     TEXT,
+        page_count    INTEGER NOT NULL,
+        duplex        INTEGER DEFAULT 0,        -- 0 = односторонняя, 1 = двухсторонняя
+        layout        TEXT,                     -- например "9-up"
+        pages         TEXT,                     -- например "1,2-5,10"
+        copies        INTEGER DEFAULT 1,        -- количество копий
+        status        TEXT NOT NULL,            -- queued, printing, done, error
+        created_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        started_at    TIMESTAMP,
+        completed_at  TIMESTAMP
+        -- без FOREIGN KEY, просто хранить user_id
+    );
+    """)
+
+    # Bot state (pause/resume)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS bot_state (
+        key   TEXT PRIMARY KEY,
+        value TEXT
+    );
+    """)
+
+    # Queue after /pause
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS paused_actions (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id     INTEGER NOT NULL,
+        action      TEXT NOT NULL,
+        created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+
+    # Promo
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS promos (
+        code                TEXT PRIMARY KEY,
+        activations_total   INTEGER NOT NULL,
+        activations_used    INTEGER NOT NULL DEFAULT 0,
+        reward_type         TEXT NOT NULL CHECK(reward_type IN ('pages', 'discount')),
+        reward_value        REAL NOT NULL,        -- count of pages or discount percentage
+        created_at          TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        expires_at          TIMESTAMP,            -- absolute expiration date
+        duration_days       INTEGER,              -- validity period in days starting from activation
+        message_template    TEXT                  -- custom message shown to user upon activation
+    );
+    """)
+    # Старые базы могли быть созданы до появления этих столбцов.
+    _add_column(conn, "promos", "duration_days", "INTEGER")
+    _add_column(conn, "promos", "message_template", "TEXT")
+
+    # Promo activations
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS promo_activations (
+        user_id         INTEGER NOT NULL,
+        code            TEXT NOT NULL,
+        activated_at    TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (user_id, code)
+    );
+    """)
+
+    # Bonuses
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS user_bonus (
+        user_id     INTEGER PRIMARY KEY,
+        bonus_pages INTEGER NOT NULL DEFAULT 0
+    );
+    """)
+
+    # Expenses
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS expenses (
+        id          INTEGER PRIMARY KEY AUTOINCREMENT,
+        category    TEXT NOT NULL CHECK(category IN ('paper','ink','service','other')),
+        quantity    INTEGER NOT NULL DEFAULT 1,                                         -- e.g. number of pages or items
+        amount      REAL NOT NULL,                                                      -- e.g. cost in currency
+        note        TEXT,
+        created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+
+    # Supplies
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS supplies (
+        name        TEXT PRIMARY KEY,                   -- 'paper', 'ink'
+        quantity    INTEGER NOT NULL DEFAULT 0,
+        minimum     INTEGER NOT NULL DEFAULT 0,
+        updated_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+
+    # Active inline-keyboards
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS active_keyboards (
+        user_id     INTEGER PRIMARY KEY,
+        message_id  INTEGER NOT NULL
+    );
+    """)
+
+
+# ---------------------------------------------------------------------------
+# 2. Индексы под основные запросы
+# ---------------------------------------------------------------------------
+def _002_access_path_indexes(conn: sqlite3.Connection) -> None:
+    # История заказов: WHERE user_id = ? ORDER BY created_at DESC —
+    # порядок берётся из индекса, без сортировки и обращений к таблице.
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_print_jobs_user_created
+        ON print_jobs (user_id, created_at, file_name, page_count, pages, copies, status);
+    """)
+    # Активные промо пользователя: JOIN promos по code без чтения
+    # строк promo_activations.
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_promo_activations_user
+        ON promo_activations (user_id, code, activated_at);
+    """)
+    # Поиск активаций по коду (статистика промокода, миграции подарков).
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_promo_activations_code
+        ON promo_activations (code, user_id, activated_at);
+    """)
+
+
+# ---------------------------------------------------------------------------
+# 3. Накопительная статистика пользователей
+# ---------------------------------------------------------------------------
+def _003_user_stats(conn: sqlite3.Connection) -> None:
+    # Итоги обновляются в той же транзакции, что помечает задание done
+    # (repositories.user_stats.record_done), поэтому профиль и персональная
+    # скидка читают одну строку вместо всей истории.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS user_stats (
+        user_id      INTEGER PRIMARY KEY,
+        total_pages  INTEGER NOT NULL DEFAULT 0,   -- страниц с учётом копий и диапазонов
+        job_count    INTEGER NOT NULL DEFAULT 0,
+        last_job_at  TIMESTAMP
+    );
+    """)
+
+    # Backfill из уже завершённых заданий.  Одно задание могло записаться
+    # несколькими строками (по строке на команду lp) с общим completed_at,
+    # поэтому и задания, и страницы считаем по (file_name, completed_at).
+    jobs: dict[int, dict[tuple, int]] = {}
+    last_job: dict[int, str] = {}
+    rows = conn.execute(
+        "SELECT user_id, file_name, page_count, pages, copies, completed_at "
+        "FROM print_jobs WHERE status = 'done'"
+    )
+    for user_id, file_name, page_count, pages, copies, completed_at in rows:
+        jobs.setdefault(user_id, {})[(file_name, completed_at)] = count_printed_pages(page_count, pages, copies)
+        if completed_at is not None:
+            last_job[user_id] = max(last_job.get(user_id, ""), str(completed_at))
+    conn.executemany(
+        "INSERT OR REPLACE INTO user_stats (user_id, total_pages, job_count, last_job_at) "
+        "VALUES (?, ?, ?, ?)",
+        [
+            (uid, sum(user_jobs.values()), len(user_jobs), last_job.get(uid))
+            for uid, user_jobs in jobs.items()
+        ],
+    )
+
+
+# ---------------------------------------------------------------------------
+# 4. Идентичность задания
+# ---------------------------------------------------------------------------
+def _004_print_job_identity(conn: sqlite3.Connection) -> None:
+    # Одна строка на задание создаётся при постановке в очередь; дальше все
+    # переходы статуса идут по job_id.  Номера заданий CUPS хранятся через
+    # запятую, цена и способ оплаты — на момент подтверждения.
+    _add_column(conn, "print_jobs", "cups_job_ids", "TEXT")
+    _add_column(conn, "print_jobs", "printed_pages", "INTEGER")
+    _add_column(conn, "print_jobs", "price", "REAL")
+    _add_column(conn, "print_jobs", "payment_method", "TEXT")
+
+    rows = conn.execute(
+        "SELECT job_id, page_count, pages, copies FROM print_jobs WHERE printed_pages IS NULL"
+    ).fetchall()
+    conn.executemany(
+        "UPDATE print_jobs SET printed_pages = ? WHERE job_id = ?",
+        [(count_printed_pages(page_count, pages, copies), job_id)
+         for job_id, page_count, pages, copies in rows],
+    )
+
+    # История заказов теперь читает printed_pages — индекс должен его покрывать.
+    conn.execute("DROP INDEX IF EXISTS idx_print_jobs_user_created")
+    conn.execute("""
+    CREATE INDEX idx_print_jobs_user_created
+        ON print_jobs (user_id, created_at, file_name, page_count, pages, copies, status, printed_pages);
+    """)
+
+
+# ---------------------------------------------------------------------------
+# 5. Состояние активной клавиатуры
+# ---------------------------------------------------------------------------
+def _005_active_keyboard_markup(conn: sqlite3.Connection) -> None:
+    # Есть ли у активного сообщения кнопки: если нет, снимать разметку
+    # не нужно и лишний вызов Telegram API не делается.
+    _add_column(conn, "active_keyboards", "has_markup", "INTEGER NOT NULL DEFAULT 1")
+
+
+# ---------------------------------------------------------------------------
+# 6. Персональные начисления вместо промокодов-подарков
+# ---------------------------------------------------------------------------
+# Подарочные промокоды: "GIFT" и дальше только цифры (см. /gift).
+_GIFT_CODE_SQL = "code GLOB 'GIFT[0-9]*' AND substr(code, 5) NOT GLOB '*[^0-9]*'"
+
+
+def _006_user_grants(conn: sqlite3.Connection) -> None:
+    # Скидка, выданная конкретному пользователю, — строка здесь, а не
+    # отдельный промокод с активацией: promos и JOIN активаций не растут
+    # с каждым подарком.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS user_grants (
+        grant_id    INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id     INTEGER NOT NULL,
+        grant_type  TEXT NOT NULL,              -- 'discount'
+        value       REAL NOT NULL,
+        expires_at  TIMESTAMP,                  -- NULL — бессрочно
+        source      TEXT,                       -- откуда начисление, например 'gift'
+        created_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+    conn.execute("""
+    CREATE INDEX IF NOT EXISTS idx_user_grants_user
+        ON user_grants (user_id, expires_at, grant_type, value);
+    """)
+
+    # Переносим уже выданные подарки.  Срок — глобальный expires_at или
+    # activated_at + duration_days, что наступит раньше.
+    conn.execute(f"""
+    INSERT INTO user_grants (user_id, grant_type, value, expires_at, source, created_at)
+    SELECT pa.user_id, p.reward_type, p.reward_value,
+           CASE
+               WHEN p.duration_days IS NULL THEN datetime(p.expires_at)
+               WHEN p.expires_at IS NULL
+                   THEN datetime(pa.activated_at, '+' || p.duration_days || ' days')
+               ELSE min(datetime(p.expires_at),
+                        datetime(pa.activated_at, '+' || p.duration_days || ' days'))
+           END,
+           'gift:' || p.code,
+           pa.activated_at
+    FROM promos p
+    JOIN promo_activations pa USING(code)
+    WHERE p.{_GIFT_CODE_SQL}
+    """)
+    conn.execute(f"DELETE FROM promo_activations WHERE {_GIFT_CODE_SQL}")
+    conn.execute(f"DELETE FROM promos WHERE {_GIFT_CODE_SQL}")
+
+
+# ---------------------------------------------------------------------------
+# 7. Персистентная очередь печати
+# ---------------------------------------------------------------------------
+def _007_print_queue(conn: sqlite3.Connection) -> None:
+    # Строка живёт, пока задание ждёт или печатается, и удаляется в той же
+    # транзакции, что ставит print_jobs.status = done/error.  После рестарта
+    # очередь восстанавливается отсюда без повторной загрузки и конвертации.
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS print_queue (
+        job_id       INTEGER PRIMARY KEY,       -- print_jobs.job_id
+        file_path    TEXT NOT NULL,             -- готовый PDF для печати
+        state        TEXT NOT NULL DEFAULT 'queued',   -- queued, printing
+        message_id   INTEGER,                   -- сообщение с позицией в очереди
+        enqueued_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+
+
+# ---------------------------------------------------------------------------
+# 8. Прогресс заданий, печатающихся частями
+# ---------------------------------------------------------------------------
+def _008_print_queue_chunks(conn: sqlite3.Connection) -> None:
+    # Сколько частей большого задания уже напечатано (PRINT_CHUNK_PAGES):
+    # после рестарта печать продолжается со следующей части.
+    _add_column(conn, "print_queue", "chunks_done", "INTEGER NOT NULL DEFAULT 0")
+
+
+MIGRATIONS: tuple[Migration, ...] = (
+    Migration(1, "baseline", _001_baseline),
+    Migration(
+        2,
+        "access_path_indexes",
+        _002_access_path_indexes,
+        plan_checks=(
+            PlanCheck(
+                "SELECT file_name, page_count, pages, copies, created_at, status "
+                "FROM print_jobs WHERE user_id = ? ORDER BY created_at DESC",
+                (0,),
+                expect=("SEARCH print_jobs USING",),
+            ),
+            PlanCheck(
+                "SELECT p.code, p.reward_type, p.reward_value, p.duration_days, pa.activated_at "
+                "FROM promos p JOIN promo_activations pa USING(code) "
+                "WHERE pa.user_id = ? AND (p.expires_at IS NULL OR p.expires_at > ?) "
+                "AND p.activations_used <= p.activations_total",
+                (0, ""),
+                expect=("SEARCH pa USING", "SEARCH p USING"),
+            ),
+            PlanCheck(
+                "SELECT user_id FROM promo_activations WHERE code = ?",
+                ("",),
+                expect=("SEARCH promo_activations USING",),
+            ),
+        ),
+    ),
+    Migration(
+        3,
+        "user_stats",
+        _003_user_stats,
+        plan_checks=(
+            PlanCheck(
+                "SELECT total_pages, job_count, last_job_at FROM user_stats WHERE user_id = ?",
+                (0,),
+                expect=("SEARCH user_stats USING",),
+            ),
+        ),
+    ),
+    Migration(
+        4,
+        "print_job_identity",
+        _004_print_job_identity,
+        plan_checks=(
+            PlanCheck(
+                "SELECT file_name, page_count, pages, copies, printed_pages, created_at, status "
+                "FROM print_jobs WHERE user_id = ? ORDER BY created_at DESC",
+                (0,),
+                expect=("SEARCH print_jobs USING",),
+            ),
+            PlanCheck(
+                "UPDATE print_jobs SET status = 'printing' WHERE job_id = ?",
+                (0,),
+                expect=("SEARCH print_jobs USING",),
+            ),
+        ),
+    ),
+    Migration(5, "active_keyboard_markup", _005_active_keyboard_markup),
+    Migration(
+        6,
+        "user_grants",
+        _006_user_grants,
+        plan_checks=(
+            PlanCheck(
+                "SELECT grant_type, value, expires_at, source FROM user_grants "
+                "WHERE user_id = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (0, ""),
+                expect=("SEARCH user_grants USING",),
+            ),
+        ),
+    ),
+    Migration(7, "print_queue", _007_print_queue),
+    Migration(8, "print_queue_chunks", _008_print_queue_chunks),
+)
+
+
+# ---------------------------------------------------------------------------
+# Runner
+# ---------------------------------------------------------------------------
+def _ensure_version_table(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version     INTEGER PRIMARY KEY,
+        name        TEXT NOT NULL,
+        applied_at  TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+    """)
+    conn.commit()
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    _ensure_version_table(conn)
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def run_migrations(conn: sqlite3.Connection) -> list[Migration]:
+    """
+    Apply every pending migration, each in its own transaction.
+
+    Returns the migrations that were applied.  A failing migration is rolled
+    back completely (DDL in SQLite is transactional) and the error re-raised.
+    """
+    applied = []
+    version = current_version(conn)
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+        conn.execute("BEGIN")
+        try:
+            migration.apply(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                (migration.version, migration.name),
+            )
+        except Exception:
+            conn.rollback()
+            raise
+        conn.commit()
+        applied.append(migration)
+    if applied:
+        # Статистика для планировщика по только что созданным индексам.
+        conn.execute("ANALYZE")
+        conn.commit()
+    return applied
+
+
+def _schema_copy(conn: sqlite3.Connection) -> sqlite3.Connection:
+    """An empty in-memory database with the tables and indexes of ``conn``."""
+    copy = sqlite3.connect(":memory:")
+    rows = conn.execute(
+        "SELECT sql FROM sqlite_master "
+        "WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+        "ORDER BY type = 'index'"
+    ).fetchall()
+    for (sql,) in rows:
+        copy.execute(sql)
+    return copy
+
+
+def check_query_plans(conn: sqlite3.Connection) -> list[str]:
+    """
+    Run EXPLAIN QUERY PLAN for the checks of every applied migration.
+
+    Plans are taken on an empty copy of the schema without sqlite_stat1:
+    on a small real database ANALYZE statistics make the planner prefer a
+    full scan, which is right for that data but says nothing about the
+    indexes.  Checks therefore only require some index search (``expect``)
+    and no scans or temporary sorts (``forbid``).
+
+    Returns a human-readable description of each violated expectation;
+    an empty list means all plans look as intended.
+    """
+    problems = []
+    version = current_version(conn)
+    schema = _schema_copy(conn)
+    try:
+        for migration in MIGRATIONS:
+            if migration.version > version:
+                continue
+            problems.extend(_check_migration(schema, migration))
+    finally:
+        schema.close()
+    return problems
+
+
+def _check_migration(conn: sqlite3.Connection, migration: Migration) -> list[str]:
+    problems = []
+    for check in migration.plan_checks:
+        details = [
+            row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {check.sql}", check.params)
+        ]
+        plan = " | ".join(details)
+        for needle in check.expect:
+            if needle not in plan:
+                problems.append(
+                    f"migration {migration.version} ({migration.name}): "
+                    f"expected '{needle}' in plan of [{check.sql}], got: {plan}"
+                )
+        for needle in check.forbid:
+            if needle in plan:
+                problems.append(
+                    f"migration {migration.version} ({migration.name}): "
+                    f"unexpected '{needle.strip()}' in plan of [{check.sql}], got: {plan}"
+                )
+    return problems
@@ -23,7 +23,7 @@ async def cmd_ban(message: types.Message):
     user_id, reason = parts[1], parts[2]
     try:
         uid = int(user_id)
-        ban_user(uid, reason)
+        await ban_user(uid, reason)
         await send_managed_message(
             bot=message.bot,
             user_id=message.from_user.id,
@@ -49,7 +49,7 @@ async def cmd_unban(message: types.Message):
         )
     try:
         uid = int(parts[1])
-        unban_user(uid)
+        await unban_user(uid)
         await send_managed_message(
             bot=message.bot,
             user_id=message.from_user.id,
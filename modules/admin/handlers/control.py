@@ -7,8 +7,9 @@ from aiogram.filters import Command
 from ..services.control import (
     set_pause, clear_pause,
     pop_all_queued_actions,
-    backup_database
 )
+from ..services.backup import backup_database
+from modules.printing.print_service import find_job, cancel_job
 
 from config import BACKUP_PATH_STR
 
@@ -19,17 +20,17 @@ router = Router()
 async def cmd_pause(message: types.Message):
     # извлекаем причину (всё, что после команды)
     reason = message.text.partition(' ')[2].strip() or "🤖 Технические работы"
-    set_pause(reason)
+    await set_pause(reason)
     await message.reply(f"⏸️ Бот поставлен на пауза.\nПричина: <i>{reason}</i>")
 
 @router.message(Command("resume"))
 @admin_only
 async def cmd_resume(message: types.Message):
-    clear_pause()
+    await clear_pause()
     await message.reply("▶️ Бот возобновил работу.")
 
     # Вытягиваем все отложенные действия и сразу удаляем их из БД
-    actions = pop_all_queued_actions()
+    actions = await pop_all_queued_actions()
 
     # Определяем всех уникальных пользователей, которые выполняли любые действия во время паузы.
     target_user_ids = {act['user_id'] for act in actions}
@@ -40,7 +41,7 @@ async def cmd_resume(message: types.Message):
     # Начисляем 5 бонусных страниц каждому пользователю и уведомляем его о возобновлении работы.
     for uid in target_user_ids:
         try:
-            add_user_bonus_pages(uid, 5)
+            await add_user_bonus_pages(uid, 5)
         except Exception:
             # Если по какой-то причине начислить не удалось, игнорируем ошибку
             pass
@@ -59,14 +60,14 @@ async def cmd_resume(message: types.Message):
 async def cmd_backup(message: types.Message) -> None:
     """
     Административная команда для создания резервной копии базы данных.
-    При вызове сохраняет текущий файл базы данных в каталог BACKUP_PATH с
-    временной меткой в имени и отправляет его администратору в чат.
+    При вызове делает онлайн-копию базы (сжатую gzip) в каталог BACKUP_PATH
+    с временной меткой в имени и отправляет её администратору в чат.
 
     Требуется уровень admin, обеспечивается декоратором admin_only.
     """
     # Create the backup file
     try:
-        backup_path = backup_database()
+        backup_path = await backup_database()
     except Exception as err:
         await message.answer(f"❌ Ошибка при создании резервной копии: {err}")
         return
@@ -92,3 +93,31 @@ async def cmd_backup(message: types.Message) -> None:
             f"Не удалось отправить файл автоматически (ошибка: {err}).\n"
             f"Вы можете скачать копию вручную из каталога {BACKUP_PATH_STR}."
         )
+
+
+@router.message(Command("cancel_job"))
+@admin_only
+async def cmd_cancel_job(message: types.Message):
+    """
+    /cancel_job <job_id> — снять задание из очереди печати, в том числе уже
+    отправленное в CUPS заранее (prefetch).  Печатающееся задание и задания
+    из общей пачки (PRINT_BATCH_ENABLED) не трогаем.
+    """
+    arg = message.text.partition(' ')[2].strip()
+    if not arg.isdigit():
+        return await message.reply("Использование: /cancel_job &lt;job_id&gt;")
+
+    job = find_job(int(arg))
+    if job is None:
+        return await message.reply(f"❌ Задание {arg} не найдено в очереди.")
+    if not await cancel_job(job):
+        return await message.reply(
+            f"⚠️ Задание {arg} уже печатается или отправлено в принтер вместе с другими, отменить его нельзя."
+        )
+
+    await message.reply(f"🗑 Задание {arg} ({job.file_name}) снято с печати.")
+    await send_managed_message(
+        bot=message.bot,
+        user_id=job.user_id,
+        text=f"❌ Печать файла «{job.file_name}» отменена администратором."
+    )
@@ -105,7 +105,7 @@ async def cmd_expense(message: Message):
             note = " ".join(parts[2:])
 
     # Record the expense in the database
-    add_expense(
+    await add_expense(
         category=category,
         amount=amount,
         quantity=quantity,
@@ -21,6 +21,10 @@ scenario: the admin chooses a gift type, enters the value, and decides
 whether to notify the recipients. The notification message, if sent,
 will be delivered to every user in the provided list.
 
+Gifts for all recipients are written in one transaction and notifications
+go out through the rate-limited ``broadcast`` sender; the admin sees a
+progress message that ends with the list of users who were not notified.
+
 Usage:
     ``/gift <user_id>`` – issue a gift to a single user (legacy behaviour)
     ``/gift`` – prompt for a list of user IDs and issue a gift to all of them
@@ -30,17 +34,16 @@ from aiogram import Router, F
 from aiogram.types import Message, CallbackQuery, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
-from datetime import datetime
+import html
 import re
 
 from modules.decorators import admin_only
 from modules.analytics.logger import action, warning, error, info
-from modules.ui.keyboards.tracker import send_managed_message
+from modules.notifications.notifier import broadcast
 from states import GiftStates
 
-# Services for updating user bonuses and creating one‑off promo codes
-from modules.billing.services.promo import add_user_bonus_pages, record_promo_activation
-from modules.admin.services.promo import create_promo
+# Bulk grant: pages or a discount for every recipient in one transaction
+from modules.admin.services.gift import grant_gift
 
 router = Router()
 
@@ -285,36 +288,22 @@ async def gift_enter_value(message: Message, state: FSMContext):
             return
 
     await state.update_data(reward_value=value)
-    target_user_id = data["target_user_id"]
+    target_user_ids = data.get("target_user_ids") or [data["target_user_id"]]
 
-    # Apply the gift immediately
+    # Apply the gift to every recipient in a single transaction
     try:
+        gift_code = await grant_gift(target_user_ids, reward_type, value)
         if reward_type == "pages":
-            add_user_bonus_pages(target_user_id, int(value))
             info(
                 message.from_user.id,
                 "/gift",
-                f"Granted {int(value)} bonus pages to {target_user_id}"
+                f"Granted {int(value)} bonus pages to {len(target_user_ids)} user(s)"
             )
         else:
-            # Create a one‑off promo code and activate it for the user
-            # Use timestamp to ensure uniqueness
-            code = f"GIFT{datetime.now().strftime('%Y%m%d%H%M%S')}{target_user_id}"
-            # One activation only; no global expiry; no duration
-            create_promo(
-                code=code,
-                activations_total=1,
-                reward_type="discount",
-                reward_value=value,
-                expires_at=None,
-                duration_days=None,
-                message_template=None,
-            )
-            record_promo_activation(target_user_id, code)
             info(
                 message.from_user.id,
                 "/gift",
-                f"Granted {value}% discount to {target_user_id} via promo {code}"
+                f"Granted {value}% discount to {len(target_user_ids)} user(s) as {gift_code}"
             )
     except Exception as e:
         await message.reply(f"❌ Не удалось выдать подарок: {e}")
@@ -336,14 +325,16 @@ async def gift_enter_value(message: Message, state: FSMContext):
             ]
         ]
     )
+    # Код скидки — источник строк user_grants; по нему подарок можно найти.
+    code_line = f"\nКод подарка: <code>{gift_code}</code>" if gift_code else ""
     await message.reply(
-        "✅ Подарок успешно начислен! Нужно ли отправить уведомление пользователю?",
+        f"✅ Подарок успешно начислен!{code_line}\nНужно ли отправить уведомление пользователю?",
         reply_markup=notify_kb
     )
     action(
         message.from_user.id,
         "/gift",
-        f"Gift applied to {target_user_id}, awaiting notify choice"
+        f"Gift applied to {len(target_user_ids)} user(s), awaiting notify choice"
     )
 
 
@@ -382,25 +373,27 @@ async def gift_notify_yes(callback: CallbackQuery, state: FSMContext):
 @admin_only
 async def gift_notify_send(message: Message, state: FSMContext):
     data = await state.get_data()
-    target_user_id = data.get("target_user_id")
+    target_user_ids = data.get("target_user_ids") or [data.get("target_user_id")]
     text = message.text
-    try:
-        await send_managed_message(
-            bot=message.bot,
-            user_id=target_user_id,
-            text=text
-        )
-        await message.reply("✅ Уведомление отправлено.")
-        action(
-            message.from_user.id,
-            "/gift",
-            f"Notification sent to {target_user_id}: {text}"
-        )
-    except Exception as e:
-        await message.reply(f"❌ Не удалось отправить уведомление: {e}")
-        error(
-            message.from_user.id,
-            "/gift",
-            f"Failed to notify user {target_user_id}: {e}"
-        )
-    await state.clear()
\ No newline at end of file
+    await state.clear()
+
+    total = len(set(target_user_ids))
+    report = await message.reply(f"📨 Отправка уведомлений: 0/{total}")
+
+    async def show_progress(done: int, failed: int, total: int) -> None:
+        await report.edit_text(f"📨 Отправка уведомлений: {done}/{total}, ошибок: {failed}")
+
+    failures = await broadcast(message.bot, target_user_ids, text, progress=show_progress)
+
+    summary = f"✅ Уведомление отправлено: {total - len(failures)}/{total}."
+    if failures:
+        lines = [f"<code>{uid}</code>: {html.escape(reason)}" for uid, reason in list(failures.items())[:20]]
+        if len(failures) > 20:
+            lines.append(f"… и ещё {len(failures) - 20}")
+        summary += "\n\n❌ Не доставлено:\n" + "\n".join(lines)
+    await report.edit_text(summary)
+    action(
+        message.from_user.id,
+        "/gift",
+        f"Notification sent to {total - len(failures)}/{total} user(s): {text}"
+    )
@@ -25,7 +25,7 @@ async def cmd_promo(message: Message, state: FSMContext):
 
     code = parts[1].strip()
 
-    if promo_exists(code):
+    if await promo_exists(code):
         return await message.reply(f"❌ Промокод <b>{code}</b> уже существует")
     
     await state.update_data(code=code)
@@ -186,14 +186,19 @@ async def promo_final_confirm(callback: CallbackQuery, state: FSMContext):
 
     data = await state.get_data()
     # Создаём промокод с учётом новых полей: срок действия и шаблон сообщения
-    create_promo(
-        code=data['code'],
-        activations_total=data['activations_total'],
-        reward_type=data['reward_type'],
-        reward_value=data['reward_value'],
-        expires_at=None,
-        duration_days=data.get('duration_days'),
-        message_template=data.get('message_template'),
-    )
+    try:
+        await create_promo(
+            code=data['code'],
+            activations_total=data['activations_total'],
+            reward_type=data['reward_type'],
+            reward_value=data['reward_value'],
+            expires_at=None,
+            duration_days=data.get('duration_days'),
+            message_template=data.get('message_template'),
+        )
+    except ValueError:
+        await state.clear()
+        await callback.message.edit_text(f"❌ Промокод <b>{data['code']}</b> уже существует")
+        return
     await state.clear()
     await callback.message.edit_text("🎉 Промокод успешно создан!")
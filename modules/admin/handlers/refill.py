@@ -4,7 +4,7 @@ from aiogram.types import Message
 
 from modules.decorators import admin_only
 from modules.ui.keyboards.tracker import send_managed_message
-from db import get_connection
+from modules.analytics.supplies import refill_supply
 
 SUPPLY_ALIASES: dict[str, str] = {
     # Paper synonyms
@@ -82,26 +82,7 @@ async def cmd_refill(message: Message) -> None:
             )
             return
 
-    with get_connection() as conn:
-        row = conn.execute(
-            "SELECT quantity, minimum FROM supplies WHERE name = ?",
-            (supply_name,)
-        ).fetchone()
-        if row:
-            # Existing supply: increment quantity and optionally update minimum
-            new_minimum = min_val if min_val is not None else row["minimum"]
-            conn.execute(
-                "UPDATE supplies SET quantity = ?, minimum = ?, updated_at = CURRENT_TIMESTAMP WHERE name = ?",
-                (quantity, new_minimum, supply_name),
-            )
-        else:
-            # New supply: insert with given quantity and minimum (or zero if omitted)
-            new_minimum = min_val if min_val is not None else 0
-            conn.execute(
-                "INSERT INTO supplies (name, quantity, minimum, updated_at) VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
-                (supply_name, quantity, new_minimum),
-            )
-        conn.commit()
+    row = await refill_supply(supply_name, quantity, min_val)
 
     # Prepare a confirmation message.  We show both the increment and the
     # resulting total so the admin can verify the operation.
@@ -109,7 +90,7 @@ async def cmd_refill(message: Message) -> None:
     note_parts.append(f"Количество: <b>{quantity}</b>")
     old_min = row["minimum"] if row else 0
     if min_val is not None:
-        note_parts.append(f"Новый минимум: <b>{new_minimum}</b>")
+        note_parts.append(f"Новый минимум: <b>{min_val}</b>")
     else:
         note_parts.append(f"Минимум: <b>{old_min}</b> (без изменений)")
 
@@ -4,22 +4,14 @@ from aiogram.types import Message
 
 from modules.decorators import admin_only
 from modules.ui.keyboards.tracker import send_managed_message
-from db import get_connection
+from modules.analytics.supplies import all_supplies
 
 router = Router()
 
 @admin_only
 @router.message(Command("supplies"))
 async def cmd_supplies(message: Message) -> None:
-    with get_connection() as conn:
-        cur = conn.execute(
-            """
-            SELECT name, quantity, minimum, updated_at
-            FROM supplies
-            ORDER BY name
-            """
-        )
-        rows = cur.fetchall()
+    rows = await all_supplies()
 
     if not rows:
         await send_managed_message(
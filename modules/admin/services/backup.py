@@ -0,0 +1,119 @@
+# modules/admin/services/backup.py
+
+import asyncio
+import gzip
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+import db
+from config import (
+    BACKUP_PATH,
+    BACKUP_INTERVAL_HOURS,
+    BACKUP_KEEP_DAILY,
+    BACKUP_KEEP_WEEKLY,
+    BACKUP_PAGES_PER_STEP,
+)
+from modules.analytics.logger import info, error
+
+BACKUP_PREFIX = "bot_backup_"
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+# /backup и плановое копирование не должны идти одновременно.
+_backup_lock = asyncio.Lock()
+
+
+def _make_backup(dest: Path) -> None:
+    """Online-копия базы во временный файл и сжатие gzip.  Выполняется в потоке."""
+    tmp_db = dest.with_name(dest.name + ".tmp")
+    tmp_gz = dest.with_name(dest.name + ".part")
+    try:
+        db.backup_to(str(tmp_db), pages=BACKUP_PAGES_PER_STEP, sleep=0.005)
+        with open(tmp_db, "rb") as src, gzip.open(tmp_gz, "wb", compresslevel=6) as dst:
+            shutil.copyfileobj(src, dst, length=1024 * 1024)
+        # Готовый файл появляется атомарно: незаконченных .gz в каталоге не бывает.
+        os.replace(tmp_gz, dest)
+    finally:
+        for leftover in (tmp_db, tmp_gz):
+            leftover.unlink(missing_ok=True)
+
+
+def _backup_time(path: Path) -> datetime | None:
+    stem = path.name[len(BACKUP_PREFIX):].split(".", 1)[0]
+    try:
+        return datetime.strptime(stem, TIMESTAMP_FORMAT)
+    except ValueError:
+        return None
+
+
+def apply_retention(
+    directory: Path = BACKUP_PATH,
+    keep_daily: int = BACKUP_KEEP_DAILY,
+    keep_weekly: int = BACKUP_KEEP_WEEKLY,
+) -> list[Path]:
+    """
+    Delete backups that fall outside the retention policy.
+
+    The newest backup of each of the last ``keep_daily`` days and of each of
+    the last ``keep_weekly`` ISO weeks is kept, as is the newest backup
+    overall.  Returns the deleted paths.
+    """
+    backups = []
+    for path in directory.glob(f"{BACKUP_PREFIX}*"):
+        taken_at = _backup_time(path)
+        if taken_at is not None and path.suffix in (".gz", ".db"):
+            backups.append((taken_at, path))
+    backups.sort(reverse=True)
+
+    keep: set[Path] = set()
+    days: list = []
+    weeks: list = []
+    for taken_at, path in backups:
+        day = taken_at.date()
+        week = taken_at.isocalendar()[:2]
+        if day not in days and len(days) < keep_daily:
+            days.append(day)
+            keep.add(path)
+        if week not in weeks and len(weeks) < keep_weekly:
+            weeks.append(week)
+            keep.add(path)
+    if backups:
+        keep.add(backups[0][1])
+
+    removed = []
+    for _, path in backups:
+        if path not in keep:
+            path.unlink(missing_ok=True)
+            removed.append(path)
+    return removed
+
+
+async def backup_database() -> Path:
+    """
+    Create a compressed online backup of the database in BACKUP_PATH.
+
+    The copy and compression run in a worker thread, so the event loop keeps
+    serving updates.  Old backups are pruned by apply_retention().
+    Returns the path of the new ``.db.gz`` file.
+    """
+    async with _backup_lock:
+        BACKUP_PATH.mkdir(parents=True, exist_ok=True)
+        timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+        dest = BACKUP_PATH / f"{BACKUP_PREFIX}{timestamp}.db.gz"
+        await asyncio.to_thread(_make_backup, dest)
+        removed = await asyncio.to_thread(apply_retention)
+    info(0, "backup", f"Backup created: {dest.name}, pruned {len(removed)} old backup(s)")
+    return dest
+
+
+async def run_scheduled_backups(interval_hours: float = BACKUP_INTERVAL_HOURS) -> None:
+    """Background task: back up the database every ``interval_hours``."""
+    if interval_hours <= 0:
+        return
+    while True:
+        await asyncio.sleep(interval_hours * 3600)
+        try:
+            await backup_database()
+        except Exception as e:
+            error(0, "backup", f"Scheduled backup failed: {e}")
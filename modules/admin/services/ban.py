@@ -1,34 +1,34 @@
 # modules/admin/services/ban.py
 
-from db import get_connection
+from repositories import bans
 from modules.analytics.logger import info
 
-def ban_user(user_id: int, reason: str):
-    with get_connection() as conn:
-        conn.execute(
-            "INSERT OR REPLACE INTO bans(user_id, reason) VALUES(?, ?)",
-            (user_id, reason)
-        )
-        conn.commit()
-        info(
-            user_id,
-            "user_banned",
-            f"User {user_id} banned for reason: {reason}"
-        )
+# Бан-лист целиком в памяти: проверяется на каждом апдейте (BanMiddleware),
+# а меняется только через ban_user/unban_user, которые пишут и в БД.
+_banned: set[int] = set()
 
-def unban_user(user_id: int):
-    with get_connection() as conn:
-        conn.execute("DELETE FROM bans WHERE user_id = ?", (user_id,))
-        conn.commit()
-        info(
-            user_id,
-            "user_unbanned",
-            f"User {user_id} unbanned"
-        )
+async def load_bans() -> None:
+    """Загрузить бан-лист из БД в память.  Вызывается при старте бота."""
+    _banned.clear()
+    _banned.update(await bans.all_ids())
 
-def is_banned(user_id: int) -> bool:
-    cur = get_connection().execute(
-        "SELECT 1 FROM bans WHERE user_id = ?",
-        (user_id,)
+async def ban_user(user_id: int, reason: str):
+    await bans.add(user_id, reason)
+    _banned.add(user_id)
+    info(
+        user_id,
+        "user_banned",
+        f"User {user_id} banned for reason: {reason}"
+    )
+
+async def unban_user(user_id: int):
+    await bans.remove(user_id)
+    _banned.discard(user_id)
+    info(
+        user_id,
+        "user_unbanned",
+        f"User {user_id} unbanned"
     )
-    return cur.fetchone() is not None
+
+def is_banned(user_id: int) -> bool:
+    return user_id in _banned
@@ -0,0 +1,37 @@
+# modules/admin/services/gift.py
+
+import secrets
+from datetime import datetime
+
+from repositories import user_bonus, user_grants
+from modules.billing.services.promo import invalidate_pricing_profile
+
+
+def new_gift_code() -> str:
+    """
+    Уникальный код подарка: GIFT, время и случайный суффикс из цифр, чтобы
+    два подарка в одну секунду не совпали.  Формат тот же, что у старых
+    подарочных промокодов (только цифры после GIFT).
+    """
+    return f"GIFT{datetime.now().strftime('%Y%m%d%H%M%S')}{secrets.randbelow(10 ** 6):06d}"
+
+
+async def grant_gift(user_ids: list[int], reward_type: str, value: float) -> str | None:
+    """
+    Выдать подарок всем пользователям из списка одной транзакцией.
+
+    Страницы начисляются в user_bonus, скидка — строкой в user_grants
+    для каждого получателя с источником ``gift:<код>``, как у подарков,
+    перенесённых из промокодов.  Возвращает код подарка (для скидки) или None.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    code = None
+    if reward_type == "pages":
+        await user_bonus.add_pages_many(user_ids, int(value))
+    else:
+        code = new_gift_code()
+        await user_grants.add_many(user_ids, "discount", value, source=f"gift:{code}")
+
+    for user_id in user_ids:
+        invalidate_pricing_profile(user_id)
+    return code
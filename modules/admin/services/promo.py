@@ -1,7 +1,7 @@
-from db import get_connection
-from datetime import datetime, timedelta
+from repositories import promos
+from modules.billing.services.promo_index import has_code, register_promo
 
-def create_promo(
+async def create_promo(
     code: str,
     activations_total: int,
     reward_type: str,
@@ -22,54 +22,31 @@ def create_promo(
         duration_days: срок действия в днях после активации или None для бессрочных.
         message_template: пользовательский текст, который будет отправлен при активации. В нём можно
             использовать {value} и {date}.
+
+    Код, совпадающий с существующим без учёта регистра, не создаётся
+    (ValueError): пользователи вводят промокоды в любом регистре.
     """
-    with get_connection() as conn:
-        conn.execute(
-            """
-            INSERT INTO promos (
-                code, activations_total, reward_type, reward_value,
-                expires_at, duration_days, message_template
-            )
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (code, activations_total, reward_type, reward_value, expires_at, duration_days, message_template),
-        )
-        conn.commit()
+    if has_code(code):
+        raise ValueError(f"Promo code {code!r} already exists")
+    await promos.create(
+        code, activations_total, reward_type, reward_value,
+        expires_at, duration_days, message_template,
+    )
+    register_promo(code, expires_at)
 
-def list_promos() -> list[dict]:
+async def list_promos() -> list[dict]:
     """
     Возвращает список промокодов со всеми полями.
     """
-    with get_connection() as conn:
-        cur = conn.execute(
-            """
-            SELECT code, activations_total, activations_used, reward_type, reward_value,
-                   expires_at, duration_days, message_template, created_at
-            FROM promos
-            ORDER BY created_at DESC
-            """
-        )
-        return [dict(row) for row in cur.fetchall()]
+    return await promos.list_all()
 
-def get_promo_details(code: str) -> dict | None:
+async def get_promo_details(code: str) -> dict | None:
     """
     Возвращает подробную информацию о промокоде по его коду.
     Включает срок действия, длительность и шаблон сообщения.
     """
-    with get_connection() as conn:
-        cur = conn.execute(
-            """
-            SELECT code, activations_total, activations_used, reward_type, reward_value,
-                   created_at, expires_at, duration_days, message_template
-            FROM promos
-            WHERE code = ?
-            """,
-            (code,),
-        )
-        row = cur.fetchone()
-        return dict(row) if row else None
+    return await promos.get(code)
 
-def promo_exists(code: str) -> bool:
-    with get_connection() as conn:
-        cur = conn.execute("SELECT 1 FROM promos WHERE code = ?", (code,))
-        return cur.fetchone() is not None
\ No newline at end of file
+async def promo_exists(code: str) -> bool:
+    """Есть ли промокод с таким текстом без учёта регистра."""
+    return has_code(code) or await promos.exists(code)
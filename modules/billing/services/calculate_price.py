@@ -1,5 +1,5 @@
 from typing import Optional
-from utils.parsers import extract_pages
+from utils.page_ranges import PageRangeSet
 from config import PRICE_PER_PAGE
 
 def calculate_price(
@@ -9,8 +9,7 @@ def calculate_price(
     bonus_pages: int = 0,
     discount_percent: float = 0.0
 ) -> dict:
-    pages = extract_pages(page_range)
-    total_pages = len(pages) * copies
+    total_pages = len(PageRangeSet.from_string(page_range)) * copies
 
     pages_covered_by_bonus = min(bonus_pages, total_pages)
     pages_to_pay = total_pages - pages_covered_by_bonus
@@ -1,7 +1,9 @@
+from dataclasses import dataclass
+from enum import Enum
 from datetime import datetime, timedelta
-from db import get_connection
+from repositories import promo_activations, promos, user_bonus, user_grants, user_stats
 
-def get_active_promos_for_user(user_id: int) -> list[dict]:
+async def get_active_promos_for_user(user_id: int) -> list[dict]:
     """
     Возвращает список активных промокодов для пользователя. Промокод считается активным,
     если его общий срок действия не истёк (expires_at) и, при наличии
@@ -9,82 +11,47 @@ def get_active_promos_for_user(user_id: int) -> list[dict]:
     проверяется, что число активаций не превышает activations_total.
     """
     now_iso = datetime.now().isoformat()
-    with get_connection() as conn:
-        rows = conn.execute(
-            """
-            SELECT p.code, p.reward_type, p.reward_value, p.duration_days, pa.activated_at
-            FROM promos p
-            JOIN promo_activations pa USING(code)
-            WHERE pa.user_id = ?
-              AND (p.expires_at IS NULL OR p.expires_at > ?)
-              AND p.activations_used <= p.activations_total
-            """,
-            (user_id, now_iso),
-        ).fetchall()
-        result = []
-        for row in rows:
-            # Check per‑activation duration: if duration_days is not null, ensure still valid
-            dur = row["duration_days"]
-            expires_at = row["activated_at"] + timedelta(days=dur) if dur is not None else None
-
-            result.append({
-                "code": row["code"],
-                "reward_type": row["reward_type"],
-                "reward_value": row["reward_value"],
-                "duration_days": row["duration_days"],
-                "activated_at": row["activated_at"],
-                "expires_at": expires_at
-            })
+    rows = await promo_activations.active_for_user(user_id, now_iso)
+    result = []
+    for row in rows:
+        # Check per‑activation duration: if duration_days is not null, ensure still valid
+        dur = row["duration_days"]
+        expires_at = row["activated_at"] + timedelta(days=dur) if dur is not None else None
+
+        result.append({
+            "code": row["code"],
+            "reward_type": row["reward_type"],
+            "reward_value": row["reward_value"],
+            "duration_days": row["duration_days"],
+            "activated_at": row["activated_at"],
+            "expires_at": expires_at
+        })
     return result
 
-def get_user_bonus_pages(user_id: int) -> int:
-    with get_connection() as conn:
-        row = conn.execute(
-            "SELECT bonus_pages FROM user_bonus WHERE user_id = ?",
-            (user_id,)
-        ).fetchone()
-    return row["bonus_pages"] if row else 0
+async def get_active_grants_for_user(user_id: int) -> list[dict]:
+    """
+    Возвращает действующие персональные начисления пользователя (подарки
+    из /gift): тип, значение, срок действия и источник.
+    """
+    rows = await user_grants.active_for_user(user_id, datetime.now())
+    return [dict(row) for row in rows]
 
-from config import DISCOUNT_PERCENT, PERSONAL_DISCOUNT_TIERS
-from utils.parsers import extract_pages
+async def get_user_bonus_pages(user_id: int) -> int:
+    return await user_bonus.get_pages(user_id)
+
+from config import DISCOUNT_PERCENT, PERSONAL_DISCOUNT_TIERS, PRICING_PROFILE_TTL
 
 # Helper functions for personal discount calculation
-def _calculate_user_total_pages_for_discount(user_id: int) -> int:
+async def _calculate_user_total_pages_for_discount(user_id: int) -> int:
     """
-    Compute the total number of pages a user has printed across all completed
-    jobs.  This replicates the logic in the profile handler but is kept here
-    to avoid circular imports and so that the discount engine can be
-    self‑contained.  Pages are multiplied by the number of copies.  If a
-    custom page range was selected for a job, only those pages are counted.
+    Total number of pages the user has printed across all completed jobs
+    (copies and custom page ranges included).  Read from ``user_stats``,
+    which is updated together with the job status.
     """
-    with get_connection() as conn:
-        rows = conn.execute(
-            """
-            SELECT page_count, pages, copies
-            FROM print_jobs
-            WHERE user_id = ? AND status = 'done'
-            """,
-            (user_id,),
-        ).fetchall()
-
-    total = 0
-    for row in rows:
-        copies = row["copies"] or 1
-        # If a custom page range exists, count only those pages
-        if row["pages"]:
-            try:
-                pages_list = extract_pages(row["pages"])
-                pages_count = len(pages_list)
-            except Exception:
-                # Fall back to stored page_count if parsing fails
-                pages_count = row["page_count"]
-        else:
-            pages_count = row["page_count"]
-        total += pages_count * copies
-    return total
-
-
-def _get_personal_discount(user_id: int) -> float:
+    return await user_stats.total_pages(user_id)
+
+
+async def _get_personal_discount(user_id: int) -> float:
     """
     Determine the appropriate personal discount percentage for a user
     based on how many pages they have printed.  The PERSONAL_DISCOUNT_TIERS
@@ -95,7 +62,7 @@ def _get_personal_discount(user_id: int) -> float:
     if not PERSONAL_DISCOUNT_TIERS:
         return 0.0
     try:
-        total_pages = _calculate_user_total_pages_for_discount(user_id)
+        total_pages = await _calculate_user_total_pages_for_discount(user_id)
     except Exception:
         # In case of database issues, do not apply a personal discount
         return 0.0
@@ -103,13 +70,36 @@ def _get_personal_discount(user_id: int) -> float:
     eligible = [pct for pages, pct in PERSONAL_DISCOUNT_TIERS.items() if total_pages >= pages]
     return max(eligible) if eligible else 0.0
 
-def get_user_discounts(user_id: int) -> tuple[int, float, str]:
+@dataclass(frozen=True)
+class PricingProfile:
+    """Всё, что нужно calculate_price о пользователе, на момент построения."""
+    bonus_pages: int
+    discount_percent: float
+    used_code: str | None
+    valid_until: datetime
+
+
+# Кэш профилей по user_id.  Сбрасывается явно через invalidate_pricing_profile()
+# при активации промокода, начислении/списании бонусов, подарках и завершении
+# печати; TTL страхует от изменений в обход этих функций.
+_pricing_profiles: dict[int, PricingProfile] = {}
+
+
+def invalidate_pricing_profile(user_id: int) -> None:
+    _pricing_profiles.pop(user_id, None)
+
+
+async def _build_pricing_profile(user_id: int) -> PricingProfile:
     # бонусы из таблицы
-    bonus = get_user_bonus_pages(user_id)
+    bonus = await get_user_bonus_pages(user_id)
 
-    promos = get_active_promos_for_user(user_id)
-    pages_promos = [(p["reward_value"], p["code"]) for p in promos if p["reward_type"] == "pages"]
-    discs_promos = [(p["reward_value"], p["code"]) for p in promos if p["reward_type"] == "discount"]
+    active_promos = await get_active_promos_for_user(user_id)
+    pages_promos = [(p["reward_value"], p["code"]) for p in active_promos if p["reward_type"] == "pages"]
+    discs_promos = [(p["reward_value"], p["code"]) for p in active_promos if p["reward_type"] == "discount"]
+
+    # подарки из user_grants участвуют в выборе лучшей скидки наравне с промокодами
+    active_grants = await get_active_grants_for_user(user_id)
+    discs_promos += [(g["value"], None) for g in active_grants if g["grant_type"] == "discount"]
 
     # наименьший индекс промокода единым: либо страницы, если больше или скидка, если она дает больше выгоды
     best_pages = max(pages_promos, default=(0, None))
@@ -128,7 +118,7 @@ def get_user_discounts(user_id: int) -> tuple[int, float, str]:
     # promo‑based discounts only if it is larger.  An empty PERSONAL_DISCOUNT_TIERS
     # dictionary disables this feature completely.
     try:
-        personal_discount = _get_personal_discount(user_id)
+        personal_discount = await _get_personal_discount(user_id)
         if personal_discount > discount_percent:
             discount_percent = personal_discount
     except Exception:
@@ -142,84 +132,82 @@ def get_user_discounts(user_id: int) -> tuple[int, float, str]:
     except Exception:
         # If config import fails or attribute missing, ignore and use current value
         pass
-    return total_bonus_pages, discount_percent, used_code
 
+    # Профиль живёт не дольше TTL и не дольше самого раннего истечения
+    # активного промокода — после этого скидка могла измениться сама собой.
+    valid_until = datetime.now() + timedelta(seconds=PRICING_PROFILE_TTL)
+    promo_expiries = [p["expires_at"] for p in active_promos if p["expires_at"] is not None]
+    promo_expiries += [g["expires_at"] for g in active_grants if g["expires_at"] is not None]
+    if promo_expiries:
+        valid_until = min(valid_until, min(promo_expiries))
+
+    return PricingProfile(total_bonus_pages, discount_percent, used_code, valid_until)
+
+
+async def get_pricing_profile(user_id: int) -> PricingProfile:
+    profile = _pricing_profiles.get(user_id)
+    if profile is None or profile.valid_until <= datetime.now():
+        profile = await _build_pricing_profile(user_id)
+        _pricing_profiles[user_id] = profile
+    return profile
 
-def get_promo_info(code: str) -> dict | None:
+
+async def get_user_discounts(user_id: int) -> tuple[int, float, str]:
+    profile = await get_pricing_profile(user_id)
+    return profile.bonus_pages, profile.discount_percent, profile.used_code
+
+
+async def get_promo_info(code: str) -> dict | None:
     """
     Возвращает полную информацию о промокоде: тип, значение награды,
     срок действия (expires_at), продолжительность в днях (duration_days),
     и шаблон сообщения (message_template). Если промокод не найден — None.
     """
-    with get_connection() as conn:
-        row = conn.execute(
-            """
-            SELECT code, reward_type, reward_value, expires_at, duration_days, message_template
-            FROM promos
-            WHERE code = ?
-            """,
-            (code,),
-        ).fetchone()
-        return dict(row) if row else None
-
-
-def record_promo_activation(user_id: int, code: str):
-    with get_connection() as conn:
-        conn.execute(
-            "INSERT INTO promo_activations(user_id, code) VALUES(?, ?)",
-            (user_id, code)
-        )
-        conn.execute(
-            "UPDATE promos SET activations_used = activations_used + 1 WHERE code = ?",
-            (code,)
-        )
-        conn.commit()
-
-def consume_bonus_pages(user_id: int, pages_used: int):
-    with get_connection() as conn:
-        conn.execute(
-            "UPDATE user_bonus SET bonus_pages = bonus_pages - ? WHERE user_id = ?",
-            (pages_used, user_id)
-        )
-        conn.commit()
-
-def promo_exists(code: str) -> bool:
-    with get_connection() as conn:
-        row = conn.execute("SELECT 1 FROM promos WHERE code = ?", (code,)).fetchone()
-    return bool(row)
-
-def promo_can_be_activated(code: str) -> bool:
-    with get_connection() as conn:
-        row = conn.execute("""
-            SELECT 1
-            FROM promos
-            WHERE code = ?
-              AND (expires_at IS NULL OR expires_at > datetime('now'))
-              AND activations_used < activations_total
-        """, (code,)).fetchone()
-    return bool(row)
-
-def has_activated_promo(user_id: int, code: str) -> bool:
-    with get_connection() as conn:
-        row = conn.execute("""
-            SELECT 1 FROM promo_activations
-            WHERE user_id = ? AND code = ?
-        """, (user_id, code)).fetchone()
-    return bool(row)
-
-def get_promo_reward(code: str) -> tuple[str, float]:
-    with get_connection() as conn:
-        row = conn.execute("""
-            SELECT reward_type, reward_value FROM promos
-            WHERE code = ?
-        """, (code,)).fetchone()
+    return await promos.get(code)
+
+
+class ActivationOutcome(Enum):
+    OK = "ok"
+    ALREADY_USED = "already_used"
+    EXHAUSTED = "exhausted"
+    EXPIRED = "expired"
+    UNKNOWN = "unknown"
+
+
+async def activate_promo(user_id: int, code: str) -> tuple[ActivationOutcome, dict | None]:
+    """
+    Атомарно активировать промокод: проверка, счётчик активаций, запись
+    активации и начисление бонусных страниц — одна транзакция.
+    Возвращает исход и данные промокода (только при OK).
+    """
+    outcome, promo = await promo_activations.activate(user_id, code)
+    outcome = ActivationOutcome(outcome)
+    if outcome is ActivationOutcome.OK:
+        invalidate_pricing_profile(user_id)
+    return outcome, promo
+
+
+async def record_promo_activation(user_id: int, code: str):
+    await promo_activations.record(user_id, code)
+    invalidate_pricing_profile(user_id)
+
+async def consume_bonus_pages(user_id: int, pages_used: int):
+    await user_bonus.consume_pages(user_id, pages_used)
+    invalidate_pricing_profile(user_id)
+
+async def promo_exists(code: str) -> bool:
+    return await promos.exists(code)
+
+async def promo_can_be_activated(code: str) -> bool:
+    return await promos.can_be_activated(code)
+
+async def has_activated_promo(user_id: int, code: str) -> bool:
+    return await promo_activations.exists(user_id, code)
+
+async def get_promo_reward(code: str) -> tuple[str, float]:
+    row = await promos.get(code)
     return (row["reward_type"], row["reward_value"]) if row else (None, 0)
 
-def add_user_bonus_pages(user_id: int, pages: int):
-    with get_connection() as conn:
-        conn.execute("""
-            INSERT INTO user_bonus(user_id, bonus_pages)
-            VALUES (?, ?)
-            ON CONFLICT(user_id) DO UPDATE SET bonus_pages = bonus_pages + ?
-        """, (user_id, pages, pages))
-        conn.commit()
\ No newline at end of file
+async def add_user_bonus_pages(user_id: int, pages: int):
+    await user_bonus.add_pages(user_id, pages)
+    invalidate_pricing_profile(user_id)
@@ -0,0 +1,100 @@
+# modules/billing/services/promo_index.py
+
+from datetime import datetime, timezone
+
+from repositories import promos
+
+# Все промокоды в памяти: casefold(code) -> [{"code", "expires_at", "exhausted"}].
+# Индекс полный (загружается при старте, пополняется в create_promo), поэтому
+# промах — это окончательный ответ «такого промокода нет»: обычные сообщения
+# в чате не доходят до БД.  Истёкшие и исчерпанные коды остаются в индексе
+# с пометкой, чтобы отвечать «больше не активен» тоже без запроса.
+# Колонка promos.code чувствительна к регистру, и в старых данных могут быть
+# коды, отличающиеся только регистром, — поэтому под ключом список.
+_index: dict[str, list[dict]] = {}
+
+
+def _key(text: str) -> str:
+    return text.strip().casefold()
+
+
+def _parse_expiry(value) -> datetime | None:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(str(value))
+    except ValueError:
+        return None
+
+
+async def load_promo_index() -> None:
+    """Заполнить индекс из БД.  Вызывается при старте бота."""
+    rows = await promos.index_rows()
+    _index.clear()
+    for row in rows:
+        register_promo(row["code"], row["expires_at"], bool(row["exhausted"]))
+
+
+def register_promo(code: str, expires_at=None, exhausted: bool = False) -> None:
+    entries = _index.setdefault(_key(code), [])
+    if any(entry["code"] == code for entry in entries):
+        return
+    entries.append({
+        "code": code,
+        "expires_at": _parse_expiry(expires_at),
+        "exhausted": exhausted,
+    })
+
+
+def _exact(code: str) -> dict | None:
+    for entry in _index.get(_key(code), ()):
+        if entry["code"] == code:
+            return entry
+    return None
+
+
+def mark_exhausted(code: str) -> None:
+    entry = _exact(code)
+    if entry is not None:
+        entry["exhausted"] = True
+
+
+def unregister_promo(code: str) -> None:
+    """Drop a code the database no longer has."""
+    key = _key(code)
+    entries = [entry for entry in _index.get(key, ()) if entry["code"] != code]
+    if entries:
+        _index[key] = entries
+    else:
+        _index.pop(key, None)
+
+
+def has_code(code: str) -> bool:
+    """True if some code equals ``code`` ignoring case."""
+    return _key(code) in _index
+
+
+def lookup_promo(text: str) -> dict | None:
+    """
+    Entry for the code the user typed, or None if no such code.
+
+    Case is ignored unless several codes differ only in case; then the text
+    must match one of them exactly.
+    """
+    entries = _index.get(_key(text))
+    if not entries:
+        return None
+    if len(entries) == 1:
+        return entries[0]
+    return _exact(text.strip())
+
+
+def is_inactive(entry: dict) -> bool:
+    """True if the code is known to be used up or past its expiry date."""
+    if entry["exhausted"]:
+        return True
+    expires_at = entry["expires_at"]
+    # В БД срок сравнивается с datetime('now'), то есть в UTC.
+    return expires_at is not None and expires_at <= datetime.now(timezone.utc).replace(tzinfo=None)
@@ -1,6 +1,4 @@
 from functools import wraps
-from aiogram import types
-from db import get_connection
 
 from config import ADMIN_IDS
 from aiogram.types import CallbackQuery, Message
@@ -10,49 +8,6 @@ from modules.ui.messages import ACCESS_DENIED_TEXT
 from modules.ui.handlers.start import send_main_menu
 from modules.ui.keyboards.tracker import send_managed_message
 from modules.analytics.logger import warning
-def check_paused(func):
-    @wraps(func)
-    async def wrapper(event, *args, **kwargs):
-        from modules.admin.services.control import is_paused, get_pause_reason, queue_action
-
-        if is_paused():
-            # определяем user_id
-            user_id = event.from_user.id
-
-            # определяем текст действия
-            if isinstance(event, types.Message):
-                action_text = event.text or "<no text>"
-            elif isinstance(event, types.CallbackQuery):
-                action_text = event.data or "<no data>"
-            else:
-                action_text = "<unknown action>"
-
-            # кладём в очередь
-            queue_action(user_id, action_text)
-
-            # причина паузы
-            reason = get_pause_reason() or "Причина не указана"
-
-            # отвечаем пользователю
-            if isinstance(event, types.Message):
-                await event.reply(
-                    f"🚧 Бот приостановлен: «{reason}»\n"
-                    "Ваш запрос сохранён — как только я возобновлю работу, напомню вам об этом."
-                )
-            else:  # CallbackQuery
-                # просто показываем уведомление, не бросаем ошибку
-                await event.answer(
-                    f"🚧 Бот приостановлен: «{reason}»\n"
-                    "Ваш запрос сохранён — напомню вам, когда возобновим работу.",
-                    show_alert=True
-                )
-            return  # не передаём управление в реальный хендлер
-
-        # если не на паузе — передаём дальше
-        return await func(event, *args, **kwargs)
-
-    return wrapper
-
 
 REQUIRED_PRINT_FIELDS = ("file_name", "file_path", "page_count", "price_data")
 
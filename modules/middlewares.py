@@ -0,0 +1,103 @@
+# modules/middlewares.py
+
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Dispatcher
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from config import ADMIN_IDS
+from modules.analytics.logger import warning
+from modules.admin.services.ban import is_banned
+from modules.admin.services.control import is_paused, get_pause_reason, queue_action
+from modules.ui.handlers import back, confirm, file, options, payment
+
+# Роутеры сценария печати: только они недоступны, пока бот на паузе.
+# Профиль, промокоды, статус печати и /start работают как обычно.
+PAUSABLE_ROUTERS = (file.router, options.router, confirm.router, payment.router, back.router)
+
+BANNED_TEXT = "🚫 Вы были заблокированы. Обратитесь к администратору."
+
+Handler = Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]]
+
+
+class BanMiddleware(BaseMiddleware):
+    """
+    Отбрасывает апдейты заблокированных пользователей до любых хендлеров,
+    то есть до скачивания и конвертации файлов.  Проверка — по множеству
+    в памяти.
+    """
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: Dict[str, Any]) -> Any:
+        user = getattr(event, "from_user", None)
+        if user is None or not is_banned(user.id) or user.id in ADMIN_IDS:
+            return await handler(event, data)
+
+        warning(user.id, "ban_middleware", "Banned user: Access denied")
+        if isinstance(event, Message):
+            await event.answer(BANNED_TEXT)
+        elif isinstance(event, CallbackQuery):
+            await event.answer(BANNED_TEXT, show_alert=True)
+        return None
+
+
+class PauseMiddleware(BaseMiddleware):
+    """
+    Пока бот на паузе, сохраняет действие пользователя и отвечает причиной
+    паузы вместо вызова хендлера.  Флаг читается из памяти, без БД.
+    Администраторы проходят всегда — иначе нельзя было бы снять паузу.
+    Регистрируется внутренней мидлварью на PAUSABLE_ROUTERS, то есть
+    срабатывает только для апдейтов, которые поймал хендлер печати.
+    """
+
+    async def __call__(self, handler: Handler, event: TelegramObject, data: Dict[str, Any]) -> Any:
+        if not is_paused():
+            return await handler(event, data)
+
+        user = getattr(event, "from_user", None)
+        if user is None or user.id in ADMIN_IDS:
+            return await handler(event, data)
+
+        # определяем текст действия
+        if isinstance(event, Message):
+            action_text = event.text or "<no text>"
+        elif isinstance(event, CallbackQuery):
+            action_text = event.data or "<no data>"
+        else:
+            action_text = "<unknown action>"
+
+        # кладём в очередь
+        await queue_action(user.id, action_text)
+
+        reason = get_pause_reason() or "Причина не указана"
+
+        if isinstance(event, Message):
+            await event.reply(
+                f"🚧 Бот приостановлен: «{reason}»\n"
+                "Ваш запрос сохранён — как только я возобновлю работу, напомню вам об этом."
+            )
+        elif isinstance(event, CallbackQuery):
+            # просто показываем уведомление, не бросаем ошибку
+            await event.answer(
+                f"🚧 Бот приостановлен: «{reason}»\n"
+                "Ваш запрос сохранён — напомню вам, когда возобновим работу.",
+                show_alert=True
+            )
+        # не передаём управление в реальный хендлер
+        return None
+
+
+def setup_middlewares(dp: Dispatcher) -> None:
+    """Register the ban middleware on the dispatcher and the pause middleware on the print flow."""
+    # Порядок важен: бан проверяется первым, чтобы действия заблокированных
+    # пользователей не попадали в очередь паузы.
+    ban = BanMiddleware()
+    dp.message.outer_middleware(ban)
+    dp.callback_query.outer_middleware(ban)
+
+    # Пауза — только для сценария печати, как раньше @check_paused.
+    # Внутренняя мидлварь вызывается после фильтров, поэтому чужие апдейты,
+    # проходящие через эти роутеры, не попадают в очередь паузы.
+    pause = PauseMiddleware()
+    for router in PAUSABLE_ROUTERS:
+        router.message.middleware(pause)
+        router.callback_query.middleware(pause)
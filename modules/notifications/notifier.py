@@ -1,4 +1,10 @@
+import asyncio
+import time
+from typing import Awaitable, Callable
+
 from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from config import ADMIN_IDS, BROADCAST_RATE_PER_SEC, BROADCAST_CONCURRENCY, BROADCAST_PROGRESS_INTERVAL
 from modules.ui.keyboards.print import print_done_kb
 from modules.ui.messages import PRINT_DONE_TEXT
 from modules.analytics.logger import info, error
@@ -22,4 +28,97 @@ async def notify_print_complete(user_id: int, bot: Bot, file_name: str):
             user_id,
             "notifier",
             f"Error notifying user about print completion: {e}"
-        )
\ No newline at end of file
+        )
+
+async def notify_admins(bot: Bot, text: str) -> None:
+    """Send ``text`` to every admin; delivery errors are only logged."""
+    for admin_id in ADMIN_IDS:
+        try:
+            await bot.send_message(chat_id=admin_id, text=text)
+        except Exception as e:
+            error(admin_id, "notifier", f"Error notifying admin: {e}")
+
+class _RateLimiter:
+    """Не более ``rate`` запросов в секунду: каждый ждёт своего слота."""
+
+    def __init__(self, rate: float):
+        self._interval = 1.0 / rate
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            if self._next > now:
+                await asyncio.sleep(self._next - now)
+                now = self._next
+            self._next = now + self._interval
+
+    def pause(self, seconds: float) -> None:
+        """Telegram попросил подождать — сдвигаем все следующие слоты."""
+        self._next = max(self._next, time.monotonic() + seconds)
+
+
+async def broadcast(
+    bot: Bot,
+    user_ids: list[int],
+    text: str,
+    progress: Callable[[int, int, int], Awaitable[None]] | None = None,
+    rate: float = BROADCAST_RATE_PER_SEC,
+    concurrency: int = BROADCAST_CONCURRENCY,
+) -> dict[int, str]:
+    """
+    Send ``text`` to every user with at most ``concurrency`` requests in
+    flight and at most ``rate`` sends per second; RetryAfter from Telegram
+    pauses the whole broadcast.  ``progress(done, failed, total)`` is awaited
+    every BROADCAST_PROGRESS_INTERVAL seconds and once at the end.
+
+    Returns ``{user_id: error}`` for the users that could not be notified.
+    """
+    limiter = _RateLimiter(rate)
+    pending = iter(dict.fromkeys(user_ids))
+    total = len(set(user_ids))
+    failures: dict[int, str] = {}
+    done = 0
+    last_report = time.monotonic()
+
+    async def report(force: bool = False) -> None:
+        nonlocal last_report
+        if progress is None:
+            return
+        now = time.monotonic()
+        if force or now - last_report >= BROADCAST_PROGRESS_INTERVAL:
+            last_report = now
+            try:
+                await progress(done, len(failures), total)
+            except Exception:
+                pass
+
+    async def send_one(user_id: int) -> None:
+        for _ in range(3):
+            await limiter.wait()
+            try:
+                await send_managed_message(bot, user_id, text)
+                return
+            except TelegramRetryAfter as e:
+                limiter.pause(e.retry_after)
+                await asyncio.sleep(e.retry_after)
+            except Exception as e:
+                failures[user_id] = str(e)
+                return
+        failures[user_id] = "Flood control: retries exhausted"
+
+    async def worker() -> None:
+        nonlocal done
+        for user_id in pending:
+            await send_one(user_id)
+            done += 1
+            await report()
+
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, total)))))
+    await report(force=True)
+
+    info(0, "notifier", f"Broadcast finished: {total - len(failures)}/{total} delivered")
+    for user_id, reason in failures.items():
+        error(user_id, "notifier", f"Broadcast failed: {reason}")
+    return failures
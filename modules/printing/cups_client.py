@@ -0,0 +1,224 @@
+# modules/printing/cups_client.py
+
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from config import PRINTER_NAME
+from modules.analytics.logger import info
+from modules.printing.printer_status import lpstat_job_ids
+
+try:
+    import cups  # pycups, необязательная зависимость
+except ImportError:
+    cups = None
+
+# Отправка заданий в CUPS и опрос их состояния через сменный backend:
+#   PycupsBackend — одно IPP-соединение в отдельном потоке (по умолчанию, если есть pycups);
+#   LpBackend     — асинхронные lp / lpstat, если pycups не установлен;
+#   FakeBackend   — в памяти, для тестов (set_backend(FakeBackend())).
+# Опции передаются как IPP-атрибуты: {"sides": "two-sided-long-edge", "copies": "2", ...}.
+
+# IPP job-state
+JOB_UNKNOWN = 0         # не IPP: CUPS ответил, что такого задания у него нет
+JOB_PROCESSING = 5
+JOB_CANCELED = 7
+JOB_ABORTED = 8
+JOB_COMPLETED = 9
+
+_ATTRS = ["job-id", "job-state", "job-impressions-completed"]
+
+
+class PycupsBackend:
+    """pycups: one reused connection, every call on a single worker thread."""
+
+    def __init__(self, printer: str | None = PRINTER_NAME):
+        self._printer = printer
+        self._conn = None
+        # pycups-соединение не потокобезопасно — все вызовы идут через один поток.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cups")
+
+    def _connection(self):
+        if self._conn is None:
+            self._conn = cups.Connection()
+            if not self._printer:
+                self._printer = self._conn.getDefault()
+        return self._conn
+
+    async def _call(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    @staticmethod
+    def _is_transport_error(exc: Exception) -> bool:
+        # Ошибки соединения pycups отдаёт как HTTPError или IPPError со
+        # статусом IPP_SERVICE_UNAVAILABLE; остальные IPPError — настоящий
+        # отказ CUPS (плохой документ, нет принтера), повторять их незачем.
+        if isinstance(exc, cups.HTTPError):
+            return True
+        return isinstance(exc, cups.IPPError) and exc.args[0] == cups.IPP_SERVICE_UNAVAILABLE
+
+    def _submit(self, file_path: str, title: str, options: dict[str, str]) -> int:
+        conn = self._connection()
+        try:
+            return conn.printFile(self._printer, file_path, title, options)
+        except (cups.IPPError, cups.HTTPError) as e:
+            if not self._is_transport_error(e):
+                raise
+            # Соединение могло устареть (перезапуск cupsd) — одна повторная попытка.
+            self._conn = None
+            return self._connection().printFile(self._printer, file_path, title, options)
+
+    async def submit(self, file_path: str, title: str, options: dict[str, str]) -> int:
+        return await self._call(self._submit, file_path, title, options)
+
+    def _job_states(self, job_ids: list[int]) -> dict[int, tuple[int, int | None]]:
+        conn = self._connection()
+        active = conn.getJobs(which_jobs="not-completed", requested_attributes=_ATTRS)
+        result = {}
+        for job_id in job_ids:
+            attrs = active.get(job_id)
+            if attrs is None:
+                # Задание уже не активно — узнаём, чем закончилось.
+                try:
+                    attrs = conn.getJobAttributes(job_id, requested_attributes=_ATTRS)
+                except cups.IPPError as e:
+                    if e.args[0] != cups.IPP_NOT_FOUND:
+                        raise
+                    attrs = {"job-state": JOB_UNKNOWN}
+            # Без job-state о задании ничего не известно — пусть решает монитор.
+            result[job_id] = (attrs.get("job-state", JOB_UNKNOWN), attrs.get("job-impressions-completed"))
+        return result
+
+    async def job_states(self, job_ids: list[int]) -> dict[int, tuple[int, int | None]]:
+        return await self._call(self._job_states, job_ids)
+
+    async def cancel(self, job_id: int) -> None:
+        await self._call(lambda: self._connection().cancelJob(job_id))
+
+
+class LpBackend:
+    """Fallback without pycups: async ``lp`` / ``lpstat`` subprocesses, no progress."""
+
+    def __init__(self, printer: str | None = PRINTER_NAME):
+        self._printer = printer
+
+    async def submit(self, file_path: str, title: str, options: dict[str, str]) -> int:
+        cmd = ["lp", "-t", title]
+        if self._printer:
+            cmd += ["-d", self._printer]
+        for key, value in options.items():
+            cmd += ["-o", f"{key}={value}"]
+        cmd.append(file_path)
+        proc = await asyncio.create_subprocess_exec(
+            *cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            raise RuntimeError(f"lp error: {stderr.decode(errors='replace').strip()}")
+        # "request id is PRINTER-123 (1 file(s))"
+        for token in stdout.decode(errors="replace").split():
+            if "-" in token and token.rsplit("-", 1)[1].isdigit():
+                return int(token.rsplit("-", 1)[1])
+        raise RuntimeError(f"lp returned no job id: {stdout.decode(errors='replace').strip()}")
+
+    async def job_states(self, job_ids: list[int]) -> dict[int, tuple[int, int | None]]:
+        active = await lpstat_job_ids("not-completed")
+        completed = await lpstat_job_ids("completed") if any(str(j) not in active for j in job_ids) else set()
+        states = {}
+        for job_id in job_ids:
+            if str(job_id) in active:
+                states[job_id] = (JOB_PROCESSING, None)
+            else:
+                states[job_id] = (JOB_COMPLETED if str(job_id) in completed else JOB_UNKNOWN, None)
+        return states
+
+    async def cancel(self, job_id: int) -> None:
+        proc = await asyncio.create_subprocess_exec(
+            "cancel", str(job_id),
+            stdout=asyncio.subprocess.DEVNULL, stderr=asyncio.subprocess.PIPE,
+        )
+        _, stderr = await proc.communicate()
+        if proc.returncode != 0:
+            raise RuntimeError(f"cancel error: {stderr.decode(errors='replace').strip()}")
+
+
+class FakeBackend:
+    """In-memory CUPS for tests: jobs stay processing until complete()/fail()."""
+
+    def __init__(self, first_id: int = 1):
+        self.next_id = first_id
+        self.submitted: list[dict] = []
+        self.states: dict[int, tuple[int, int | None]] = {}
+
+    async def submit(self, file_path: str, title: str, options: dict[str, str]) -> int:
+        job_id = self.next_id
+        self.next_id += 1
+        self.submitted.append({"job_id": job_id, "file_path": file_path, "title": title, "options": dict(options)})
+        self.states[job_id] = (JOB_PROCESSING, 0)
+        return job_id
+
+    async def job_states(self, job_ids: list[int]) -> dict[int, tuple[int, int | None]]:
+        return {job_id: self.states.get(job_id, (JOB_UNKNOWN, None)) for job_id in job_ids}
+
+    async def cancel(self, job_id: int) -> None:
+        self.fail(job_id, JOB_CANCELED)
+
+    def progress(self, job_id: int, pages: int) -> None:
+        self.states[job_id] = (JOB_PROCESSING, pages)
+
+    def complete(self, job_id: int) -> None:
+        self.states[job_id] = (JOB_COMPLETED, self.states.get(job_id, (0, None))[1])
+
+    def fail(self, job_id: int, state: int = JOB_ABORTED) -> None:
+        self.states[job_id] = (state, self.states.get(job_id, (0, None))[1])
+
+
+_backend = None
+# Время отправки последних заданий, сек — для диагностики.
+_latencies: deque[float] = deque(maxlen=100)
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        _backend = PycupsBackend() if cups is not None else LpBackend()
+    return _backend
+
+
+def set_backend(backend) -> None:
+    """Replace the backend, e.g. with FakeBackend() in tests."""
+    global _backend
+    _backend = backend
+
+
+async def submit(file_path: str, title: str, options: dict[str, str], user_id: int = 0) -> int:
+    """Submit a file to CUPS and return the numeric CUPS job id."""
+    started = time.perf_counter()
+    job_id = await get_backend().submit(file_path, title, options)
+    latency = time.perf_counter() - started
+    _latencies.append(latency)
+    info(user_id, "cups_client", f"CUPS job {job_id} submitted in {latency * 1000:.0f} ms: {title} {options}")
+    return job_id
+
+
+async def job_states(job_ids: list[int]) -> dict[int, tuple[int, int | None]]:
+    """
+    {job_id: (IPP job-state, pages completed or None)} in one query.
+
+    JOB_UNKNOWN means CUPS answered and does not know the job; if CUPS
+    cannot be asked at all, the backend raises instead.
+    """
+    return await get_backend().job_states(job_ids)
+
+
+async def cancel(job_id: int) -> None:
+    await get_backend().cancel(job_id)
+
+
+def submit_latency() -> dict[str, float]:
+    """Count, average and max submission latency (seconds) of recent jobs."""
+    if not _latencies:
+        return {"count": 0, "avg": 0.0, "max": 0.0}
+    return {"count": len(_latencies), "avg": sum(_latencies) / len(_latencies), "max": max(_latencies)}
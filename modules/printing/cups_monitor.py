@@ -0,0 +1,108 @@
+# modules/printing/cups_monitor.py
+
+import asyncio
+
+from config import CUPS_POLL_INTERVAL, CUPS_UNKNOWN_POLLS
+from modules.analytics.logger import error
+from modules.printing import cups_client
+from modules.printing.cups_client import JOB_COMPLETED, JOB_CANCELED, JOB_ABORTED, JOB_UNKNOWN
+
+# Один фоновый опрос CUPS на все отправленные задания: за тик — один
+# запрос состояний через cups_client, а не lpstat на каждое задание.
+# Ожидающие получают Future, который завершается, когда CUPS закончил задание.
+
+JOB_FAILED_STATES = {JOB_CANCELED: "canceled", JOB_ABORTED: "aborted"}
+
+_watched: dict[str, asyncio.Future] = {}
+_pages_completed: dict[str, int] = {}
+# Задания, которые CUPS хоть раз показал незавершёнными, и сколько опросов
+# подряд CUPS не знает ещё не замеченное задание.
+_seen_active: set[str] = set()
+_unknown_polls: dict[str, int] = {}
+_wakeup = asyncio.Event()
+_monitor_task: asyncio.Task | None = None
+
+
+class CupsJobFailed(RuntimeError):
+    """CUPS cancelled or aborted the job."""
+
+
+def _resolve(job_id: str, exc: Exception | None = None) -> None:
+    future = _watched.pop(job_id, None)
+    _pages_completed.pop(job_id, None)
+    _seen_active.discard(job_id)
+    _unknown_polls.pop(job_id, None)
+    if future is None or future.done():
+        return
+    if exc is None:
+        future.set_result(job_id)
+    else:
+        future.set_exception(exc)
+
+
+async def _poll_once() -> None:
+    states = await cups_client.job_states([int(job_id) for job_id in _watched])
+
+    for numeric_id, (state, pages) in states.items():
+        job_id = str(numeric_id)
+        if pages is not None:
+            _pages_completed[job_id] = pages
+        if state == JOB_COMPLETED:
+            _resolve(job_id)
+        elif state in JOB_FAILED_STATES:
+            _resolve(job_id, CupsJobFailed(f"CUPS job {job_id} {JOB_FAILED_STATES[state]}"))
+        elif state == JOB_UNKNOWN:
+            # Задание, которое уже печаталось, CUPS вычистил из истории после
+            # завершения.  Не замеченное ни разу задание CUPS потерял — это
+            # ошибка, но не с первого опроса: сразу после отправки CUPS может
+            # его ещё не показывать.
+            if job_id in _seen_active:
+                _resolve(job_id)
+                continue
+            _unknown_polls[job_id] = _unknown_polls.get(job_id, 0) + 1
+            if _unknown_polls[job_id] >= CUPS_UNKNOWN_POLLS:
+                _resolve(job_id, CupsJobFailed(f"CUPS job {job_id} is unknown to CUPS"))
+        else:
+            _seen_active.add(job_id)
+            _unknown_polls.pop(job_id, None)
+
+
+async def run_cups_monitor(interval: float = CUPS_POLL_INTERVAL) -> None:
+    """Poll CUPS every ``interval`` seconds while there are watched jobs."""
+    while True:
+        if not _watched:
+            _wakeup.clear()
+            await _wakeup.wait()
+        try:
+            await _poll_once()
+        except Exception as e:
+            error(0, "cups_monitor", f"Failed to poll CUPS: {e}")
+        if _watched:
+            await asyncio.sleep(interval)
+
+
+def watch(job_id: str) -> asyncio.Future:
+    """Future that resolves when CUPS completes ``job_id`` (fails if cancelled/aborted)."""
+    global _monitor_task
+    job_id = str(job_id)
+    future = _watched.get(job_id)
+    if future is None:
+        future = asyncio.get_running_loop().create_future()
+        _watched[job_id] = future
+    if _monitor_task is None or _monitor_task.done():
+        _monitor_task = asyncio.create_task(run_cups_monitor())
+    _wakeup.set()
+    return future
+
+
+async def wait_for_jobs(job_ids: list[str]) -> None:
+    """Wait until every job in ``job_ids`` is completed by CUPS."""
+    # Future одного задания общий для всех ожидающих: отмена одного ожидания
+    # (вытеснение, остановка) не должна отменять его для остальных.
+    await asyncio.gather(*(asyncio.shield(watch(job_id)) for job_id in job_ids))
+
+
+def pages_completed(job_ids: list[str]) -> int | None:
+    """Pages already printed across ``job_ids``; None if CUPS does not report it."""
+    known = [_pages_completed[str(j)] for j in job_ids if str(j) in _pages_completed]
+    return sum(known) if known else None
@@ -0,0 +1,168 @@
+# modules/printing/imposition.py
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import fitz  # PyMuPDF
+
+from config import TMP_DIR_STR, IMPOSITION_WORKERS
+
+# Подготовка задания к печати: из исходного PDF собирается один spool-файл —
+# только выбранные страницы, с нормализованным поворотом, разложенные по N
+# на лист A4 и повторённые нужное число раз (копии подобраны).  В CUPS
+# уходит одно задание без page-ranges/number-up/copies.  Несколько мелких
+# заданий можно собрать в один файл с листами-разделителями (impose_batch).
+
+A4 = fitz.paper_rect("a4")  # портрет, 595 × 842 pt
+
+# Сетка (строк, столбцов) на портретном листе для «N страниц на листе».
+GRIDS = {1: (1, 1), 2: (2, 1), 4: (2, 2), 6: (3, 2), 9: (3, 3), 16: (4, 4)}
+
+SPOOL_DIR = os.path.join(TMP_DIR_STR, "spool")
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _cells(n_up: int) -> list[fitz.Rect]:
+    rows, cols = GRIDS[n_up]
+    width, height = A4.width / cols, A4.height / rows
+    return [
+        fitz.Rect(c * width, r * height, (c + 1) * width, (r + 1) * height)
+        for r in range(rows)
+        for c in range(cols)
+    ]
+
+
+def _impose_into(
+    out: fitz.Document,
+    src: fitz.Document,
+    page_ranges: list[tuple[int, int]],
+    n_up: int,
+    copies: int,
+    duplex: bool,
+) -> None:
+    if n_up not in GRIDS:
+        raise ValueError(f"Unsupported layout: {n_up}")
+    cells = _cells(n_up)
+    pages = [p - 1 for start, end in page_ranges for p in range(start, end + 1) if p <= len(src)]
+    if not pages:
+        raise ValueError("Нет подходящих страниц для печати")
+
+    one_copy = []
+    for i in range(0, len(pages), n_up):
+        one_copy.append(pages[i:i + n_up])
+
+    for _ in range(copies):
+        for sheet_pages in one_copy:
+            sheet = out.new_page(width=A4.width, height=A4.height)
+            for cell, pno in zip(cells, sheet_pages):
+                # rect учитывает /Rotate страницы — это её видимая ориентация
+                src_rect = src[pno].rect
+                rotate = 90 if (src_rect.width > src_rect.height) != (cell.width > cell.height) else 0
+                # Повторный показ той же страницы переиспользует её XObject,
+                # так что копии почти не увеличивают файл.
+                sheet.show_pdf_page(cell, src, pno, keep_proportion=True, rotate=rotate)
+        if duplex and len(one_copy) % 2:
+            # Чистый оборот, чтобы следующая копия начиналась с нового листа.
+            out.new_page(width=A4.width, height=A4.height)
+
+
+def _save(out: fitz.Document, dest_path: str) -> int:
+    os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+    out.save(dest_path, garbage=3, deflate=True)
+    return len(out)
+
+
+def impose(
+    src_path: str,
+    dest_path: str,
+    page_ranges: list[tuple[int, int]],
+    n_up: int = 1,
+    copies: int = 1,
+    duplex: bool = False,
+) -> int:
+    """
+    Build the spool PDF ``dest_path`` and return its number of sheet sides.
+
+    ``page_ranges`` are 1-based inclusive ranges of the source.  Every
+    page is scaled to its cell and turned by 90° when its orientation does
+    not match the cell, so mixed portrait/landscape documents need no
+    per-block jobs.  With duplex each copy starts on a new sheet.
+    Runs in a worker process (see prepare_spool).
+    """
+    src = fitz.open(src_path)
+    out = fitz.open()
+    try:
+        _impose_into(out, src, page_ranges, n_up, copies, duplex)
+        return _save(out, dest_path)
+    finally:
+        out.close()
+        src.close()
+
+
+def impose_batch(dest_path: str, parts: list[dict], duplex: bool = False) -> int:
+    """
+    Build one spool PDF for several small jobs, each preceded by a banner.
+
+    ``parts`` are dicts with ``src_path``, ``page_ranges``, ``n_up``,
+    ``copies`` and ``banner`` (HTML).  The banner takes a whole sheet, so
+    every job starts on its own sheet.  Returns the number of sheet sides.
+    """
+    out = fitz.open()
+    try:
+        for part in parts:
+            banner = out.new_page(width=A4.width, height=A4.height)
+            banner.insert_htmlbox(
+                fitz.Rect(50, A4.height / 3, A4.width - 50, A4.height * 2 / 3),
+                f"<div style='text-align:center;font-size:28px'>{part['banner']}</div>",
+            )
+            if duplex:
+                out.new_page(width=A4.width, height=A4.height)
+            src = fitz.open(part["src_path"])
+            try:
+                _impose_into(out, src, part["page_ranges"], part["n_up"], part["copies"], duplex)
+            finally:
+                src.close()
+        return _save(out, dest_path)
+    finally:
+        out.close()
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=IMPOSITION_WORKERS)
+    return _pool
+
+
+async def prepare_spool(
+    src_path: str,
+    name: str,
+    page_ranges: list[tuple[int, int]],
+    n_up: int = 1,
+    copies: int = 1,
+    duplex: bool = False,
+) -> str:
+    """Impose a job in the process pool and return the spool file path."""
+    dest_path = os.path.join(SPOOL_DIR, f"{name}.pdf")
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(
+        _get_pool(), impose, src_path, dest_path, page_ranges, n_up, copies, duplex
+    )
+    return dest_path
+
+
+async def prepare_batch_spool(name: str, parts: list[dict], duplex: bool = False) -> str:
+    """Impose a batch of jobs (see impose_batch) in the process pool."""
+    dest_path = os.path.join(SPOOL_DIR, f"{name}.pdf")
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(_get_pool(), impose_batch, dest_path, parts, duplex)
+    return dest_path
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
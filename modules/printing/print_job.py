@@ -1,16 +1,21 @@
-import asyncio
-import subprocess
-from dataclasses import dataclass
+import html
+import os
+from dataclasses import dataclass, field
 from datetime import datetime
 from aiogram import Bot
-from modules.ui.messages import PRINT_DONE_TEXT
+from config import PRINT_CHUNK_PAGES
+from modules.ui.messages import PRINT_DONE_TEXT, PRINT_PROGRESS_TEXT
 from modules.ui.keyboards.print import print_done_kb, print_error_kb
 from modules.ui.keyboards.tracker import send_managed_message
 from modules.analytics.logger import info, error
-from db import get_connection
-from modules.printing.pdf_utils import get_orientation_ranges
+from repositories import print_jobs
+from utils.page_ranges import PageRangeSet
+from utils.parsers import count_printed_pages
+from modules.printing.imposition import prepare_spool, prepare_batch_spool
+from modules.printing import cups_client, cups_monitor
 
 from modules.analytics.supplies import consume_supply
+from modules.billing.services.promo import invalidate_pricing_profile
 
 @dataclass
 class PrintJob:
@@ -25,162 +30,281 @@ class PrintJob:
     copies: int = 1
 
     message_id: int | None = None
+    price: float = 0.0
+    payment_method: str = "cash"
+    # print_jobs.job_id, присваивается в save_to_db() при постановке в очередь
+    db_id: int | None = None
+    # Номера заданий CUPS; уже заполнены, если задание восстановлено после
+    # рестарта и всё ещё печатается — тогда run() не отправляет его повторно.
+    cups_job_ids: list[str] = field(default_factory=list)
+    # Имя для листа-разделителя; после рестарта не восстанавливается.
+    user_name: str = ""
+    # Задание ушло в CUPS вместе с другими (submit_batch) и делит с ними
+    # номер задания CUPS, поэтому отменить его отдельно нельзя.
+    batched: bool = False
+    # Пачку с этим заданием не удалось отправить — печатаем его отдельно.
+    batch_failed: bool = False
+    # Время постановки в очередь — для политик планирования (scheduler.py).
+    enqueued_at: datetime = field(default_factory=datetime.now)
+    # Большое задание печатается частями (PRINT_CHUNK_PAGES): сколько
+    # частей уже напечатано.  cups_job_ids — задание CUPS текущей части.
+    chunks_done: int = 0
+
+    @classmethod
+    def from_queue_row(cls, row, bot: Bot) -> "PrintJob":
+        """Rebuild a job from a repositories.print_queue.pending() row."""
+        return cls(
+            user_id=row["user_id"],
+            file_path=row["file_path"],
+            file_name=row["file_name"],
+            bot=bot,
+            page_count=row["page_count"],
+            duplex=bool(row["duplex"]),
+            layout=row["layout"] or "1",
+            pages=row["pages"] or "",
+            copies=row["copies"] or 1,
+            message_id=row["message_id"],
+            price=row["price"] or 0.0,
+            payment_method=row["payment_method"] or "cash",
+            db_id=row["job_id"],
+            enqueued_at=row["enqueued_at"] or datetime.now(),
+            chunks_done=row["chunks_done"] or 0,
+        )
 
     async def run(self):
         try:
-            orientation_blocks = get_orientation_ranges(self.file_path)
-            selected_pages = self.parse_page_ranges(self.pages or f"1-{self.page_count}")
-
-            blocks = []
-            for block in orientation_blocks:
-                block_pages = [p for p in range(block["start"], block["end"] + 1) if p in selected_pages]
-                if block_pages:
-                    blocks.append({
-                        "pages": block_pages,
-                        "orientation": block["type"]
-                    })
-
-            if not blocks:
-                raise RuntimeError("Нет подходящих страниц для печати")
-
-            cmds = []
-
-            if len(blocks) == 1:
-                block = blocks[0]
-                page_range_str = self.merge_page_list(block["pages"])
-                cmd = ["lp", "-o", "media=A4", "-o", "fit-to-page"]
-
-                if self.layout:
-                    cmd += ["-o", f"number-up={self.layout}"]
-                cmd += ["-o", "sides=one-sided"]
-                if self.duplex:
-                    cmd += ["-o", "sides=two-sided-long-edge"]
-                else:
-                    cmd += ["-o", "sides=one-sided"]
-                if self.copies > 1:
-                    cmd += ["-n", str(self.copies)]
-
-                orientation = block["orientation"]
-                if orientation == "landscape":
-                    cmd += ["-o", "orientation-requested=4"]
-                else:
-                    cmd += ["-o", "orientation-requested=3"]
-
-                cmd += ["-P", page_range_str]
-                cmd.append(self.file_path)
-                cmds.append(cmd)
-            else:
-                for copy_num in range(self.copies):
-                    for block in blocks:
-                        page_range_str = self.merge_page_list(block["pages"])
-                        cmd = ["lp", "-o", "sides=one-sided"]
-
-                        if self.layout:
-                            cmd += ["-o", f"number-up={self.layout}"]
-
-                        orientation = block["orientation"]
-                        if orientation == "landscape":
-                            cmd += ["-o", "orientation-requested=4"]
-                        else:
-                            cmd += ["-o", "orientation-requested=3"]
-
-                        cmd += ["-P", page_range_str]
-                        cmd.append(self.file_path)
-                        cmds.append(cmd)
-
-            job_ids = []
-
-            for cmd in cmds:
-                info(self.user_id, "print_job", f"Run command: {' '.join(cmd)}")
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode != 0:
-                    raise RuntimeError(f"lp error: {result.stderr.strip()}")
-
-                job_id_str = result.stdout.strip()
-                info(self.user_id, "print_job", f"Job started {self.file_name}: {job_id_str}")
-                if "-" in job_id_str:
-                    job_id = job_id_str.split("-")[1].split()[0]
-                    self.save_to_db(status="queued", job_id=job_id)
-                    job_ids.append(job_id)
-
-            await consume_supply("бумага", self.page_count * self.copies, bot=self.bot)
-            await consume_supply("чернила", self.page_count * self.copies, bot=self.bot)
-
-            while True:
-                lpstat = subprocess.run(["lpstat", "-W", "not-completed"], capture_output=True, text=True)
-                output = lpstat.stdout
-                if all(job_id not in output for job_id in job_ids):
-                    break
-                await asyncio.sleep(3)
-
-            info(self.user_id, "print_job", f"Printing ended: {self.file_name}")
-            self.update_status("done")
-            await send_managed_message(self.bot, self.user_id, PRINT_DONE_TEXT, print_done_kb)
-
+            await self.submit()
+            await self.wait_done()
         except Exception as e:
-            error(self.user_id, "print_job", f"Printing error: {e}")
-            self.update_status("error")
-            await send_managed_message(
-                self.bot,
-                self.user_id,
-                f"❌ Ошибка при печати файла «{self.file_name}». {str(e)}",
-                print_error_kb
+            await self.fail(e)
+
+    async def submit(self):
+        """
+        Send the job, or its next part, to CUPS unless it is already there
+        (recovered or prefetched).
+        """
+        if not self.cups_job_ids:
+            await self._submit()
+
+    async def wait_done(self):
+        """Wait for CUPS to finish the job, then mark it done and notify the user."""
+        await self._wait_for_cups()
+
+        info(self.user_id, "print_job", f"Printing ended: {self.file_name}")
+        await self.update_status("done")
+        await send_managed_message(self.bot, self.user_id, PRINT_DONE_TEXT, print_done_kb)
+
+    async def wait_chunk(self):
+        """Wait for the part in CUPS to finish and show the user the progress."""
+        await self._wait_for_cups()
+        self.chunks_done += 1
+        self.cups_job_ids = []
+        if self.db_id is not None:
+            await print_jobs.finish_chunk(self.db_id, self.chunks_done)
+        info(self.user_id, "print_job", f"Printed {self.pages_printed}/{self.pages_total} pages of {self.file_name}")
+
+        if self.message_id is None:
+            return
+        try:
+            await self.bot.edit_message_text(
+                chat_id=self.user_id,
+                message_id=self.message_id,
+                text=PRINT_PROGRESS_TEXT.format(
+                    file_name=self.file_name, done=self.pages_printed, total=self.pages_total
+                ),
+                parse_mode="HTML",
             )
+        except Exception as e:
+            error(self.user_id, "print_job", f"Failed to update print progress: {e}")
+
+    async def fail(self, e: Exception):
+        error(self.user_id, "print_job", f"Printing error: {e}")
+        await self.update_status("error")
+        await send_managed_message(
+            self.bot,
+            self.user_id,
+            f"❌ Ошибка при печати файла «{self.file_name}». {str(e)}",
+            print_error_kb
+        )
+
+    def _selected(self) -> PageRangeSet:
+        selected_pages = self.parse_page_ranges(self.pages or f"1-{self.page_count}")
+        if not selected_pages:
+            raise RuntimeError("Нет подходящих страниц для печати")
+        return selected_pages
+
+    def _selected_ranges(self) -> list[tuple[int, int]]:
+        return list(self._selected().ranges)
+
+    def chunk_plan(self) -> list[tuple[list[tuple[int, int]], int, int]]:
+        """
+        Parts the job is printed in: (page ranges, copies, printed pages).
+
+        Without PRINT_CHUNK_PAGES, or when the job fits in one part, this is
+        the whole job.  Parts end on a sheet boundary, so together they come
+        out exactly like the whole job would.
+        """
+        selected = self._selected()
+        per_copy = len(selected)
+        copies = self.copies or 1
+        size = PRINT_CHUNK_PAGES
+        if not size or per_copy * copies <= size:
+            return [(list(selected.ranges), copies, per_copy * copies)]
+        if per_copy <= size:
+            # Несколько целых копий в каждой части.
+            per_chunk = size // per_copy
+            return [
+                (list(selected.ranges), n, per_copy * n)
+                for n in (min(per_chunk, copies - done) for done in range(0, copies, per_chunk))
+            ]
+        # Копия делится на части по целым листам.
+        sheet = int(self.layout or 1) * (2 if self.duplex else 1)
+        step = max(size // sheet, 1) * sheet
+        pieces = selected.split(step)
+        return [(list(piece.ranges), 1, len(piece)) for _ in range(copies) for piece in pieces]
+
+    @property
+    def chunks_left(self) -> int:
+        """Parts not yet sent to CUPS."""
+        return len(self.chunk_plan()) - self.chunks_done - (1 if self.cups_job_ids else 0)
+
+    @property
+    def pages_total(self) -> int:
+        return sum(pages for _, _, pages in self.chunk_plan())
+
+    @property
+    def pages_printed(self) -> int:
+        """Pages of the parts already printed."""
+        if not self.chunks_done:
+            return 0
+        return sum(pages for _, _, pages in self.chunk_plan()[:self.chunks_done])
+
+    @property
+    def spool_name(self) -> str:
+        return f"job_{self.db_id if self.db_id is not None else id(self)}"
+
+    async def _submit(self):
+        """Impose the job (or its next part) into one spool PDF and send it to CUPS as one job."""
+        plan = self.chunk_plan()
+        ranges, copies, _ = plan[self.chunks_done]
+        name, title = self.spool_name, self.file_name
+        if len(plan) > 1:
+            name += f"_part{self.chunks_done + 1}"
+            title += f" ({self.chunks_done + 1}/{len(plan)})"
+        spool_path = await prepare_spool(
+            self.file_path,
+            name,
+            ranges,
+            n_up=int(self.layout or 1),
+            copies=copies,
+            duplex=self.duplex,
+        )
+        try:
+            cups_id = await cups_client.submit(spool_path, title, _sheet_options(self.duplex), self.user_id)
+        finally:
+            # CUPS копирует файл в свою очередь при приёме задания.
+            os.remove(spool_path)
+        info(self.user_id, "print_job", f"Job started {title}: {cups_id}")
+        await self._after_submit([str(cups_id)])
+
+    async def _after_submit(self, job_ids: list[str]):
+        self.cups_job_ids = job_ids
+        if self.db_id is not None:
+            await print_jobs.set_cups_job_ids(self.db_id, job_ids)
+
+        if self.chunks_done:
+            # Расходники списаны целиком при отправке первой части.
+            return
+        await consume_supply("бумага", self.page_count * self.copies, bot=self.bot)
+        await consume_supply("чернила", self.page_count * self.copies, bot=self.bot)
+
+    async def _wait_for_cups(self):
+        """Wait until CUPS has completed every CUPS job of this job."""
+        await cups_monitor.wait_for_jobs(self.cups_job_ids)
+
+    @property
+    def pages_completed(self) -> int | None:
+        """
+        Pages printed so far: the finished parts plus what CUPS reports for
+        the part in CUPS.  None if neither is known.  CUPS counts printed
+        sides, each carrying ``layout`` pages; for a batched job the count
+        includes the other jobs, so only finished parts are counted there.
+        """
+        sides = None if self.batched else cups_monitor.pages_completed(self.cups_job_ids)
+        if sides is None:
+            return self.pages_printed or None
+        part_pages = self.chunk_plan()[self.chunks_done][2]
+        return self.pages_printed + min(sides * int(self.layout or 1), part_pages)
+
+    async def save_to_db(self) -> int:
+        """Store the job as queued and remember its print_jobs id."""
+        self.db_id = await print_jobs.insert(
+            self.user_id, self.file_name, self.page_count,
+            self.duplex, self.layout, self.pages, self.copies,
+            count_printed_pages(self.page_count, self.pages, self.copies),
+            self.price, self.payment_method, self.enqueued_at,
+            file_path=self.file_path,
+        )
+        return self.db_id
+
+    async def update_status(self, status: str):
+        if self.db_id is None:
+            return
+        await print_jobs.update_status(self.db_id, status, datetime.now())
+        if status == "done":
+            # Выросший итог страниц может открыть новый уровень персональной скидки.
+            invalidate_pricing_profile(self.user_id)
+
+    def parse_page_ranges(self, range_str) -> PageRangeSet:
+        return PageRangeSet.from_string(range_str)
+
+def _sheet_options(duplex: bool) -> dict[str, str]:
+    # Страницы, раскладка и копии уже в файле; остаются только параметры листа.
+    return {
+        "media": "A4",
+        "sides": "two-sided-long-edge" if duplex else "one-sided",
+    }
+
+
+def _banner_html(job: PrintJob) -> str:
+    user = job.user_name or f"ID {job.user_id}"
+    number = f"№{job.db_id}" if job.db_id is not None else ""
+    return (
+        f"<b>Задание {number}</b><br>{html.escape(user)}<br>"
+        f"<i>{html.escape(job.file_name)}</i>"
+    )
+
+
+async def submit_batch(jobs: list[PrintJob]):
+    """
+    Send several small jobs to CUPS as one job, each behind a banner sheet.
 
-    def save_to_db(self, status: str = "queued", job_id: str | None = None):
-        with get_connection() as conn:
-            conn.execute("""
-                INSERT INTO print_jobs (
-                    user_id, file_name, page_count, layout,
-                    pages, copies, status, created_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                self.user_id, self.file_name, self.page_count,
-                self.layout, self.pages, self.copies,
-                status, datetime.now()
-            ))
-            conn.commit()
-
-    def update_status(self, status: str):
-        with get_connection() as conn:
-            conn.execute("""
-                UPDATE print_jobs
-                SET status = ?, completed_at = ?
-                WHERE user_id = ? AND file_name = ? AND status != 'done'
-            """, (
-                status, datetime.now(), self.user_id, self.file_name
-            ))
-            conn.commit()
-
-    def parse_page_ranges(self, range_str):
-        result = set()
-        for part in range_str.split(","):
-            if "-" in part:
-                start, end = map(int, part.split("-"))
-                result.update(range(start, end + 1))
-            else:
-                result.add(int(part))
-        return result
-
-    def merge_page_list(self, pages):
-        pages = sorted(set(map(int, pages)))
-        ranges = []
-        start = prev = pages[0]
-
-        for p in pages[1:]:
-            if p == prev + 1:
-                prev = p
-            else:
-                if start == prev:
-                    ranges.append(str(start))
-                else:
-                    ranges.append(f"{start}-{prev}")
-                start = prev = p
-        if start == prev:
-            ranges.append(str(start))
-        else:
-            ranges.append(f"{start}-{prev}")
-        return ",".join(ranges)
-
-def add_job(job: PrintJob):
-    asyncio.create_task(job.run())
+    All jobs must share the duplex setting.  Every job gets the same CUPS
+    id and is still finished, billed for supplies and reported to its user
+    on its own.
+    """
+    parts = [
+        {
+            "src_path": job.file_path,
+            "page_ranges": job._selected_ranges(),
+            "n_up": int(job.layout or 1),
+            "copies": job.copies,
+            "banner": _banner_html(job),
+        }
+        for job in jobs
+    ]
+    duplex = jobs[0].duplex
+    spool_path = await prepare_batch_spool(f"batch_{jobs[0].spool_name}", parts, duplex=duplex)
+    title = f"{jobs[0].file_name} (+{len(jobs) - 1})"
+    try:
+        cups_id = await cups_client.submit(spool_path, title, _sheet_options(duplex), jobs[0].user_id)
+    finally:
+        os.remove(spool_path)
+    # Сначала отмечаем все задания, потом пишем в БД: если запись упадёт,
+    # ни одно задание пачки не будет считаться не отправленным.
+    for job in jobs:
+        job.batched = True
+        job.cups_job_ids = [str(cups_id)]
+    for job in jobs:
+        info(job.user_id, "print_job", f"Job started {job.file_name}: {cups_id} (batch of {len(jobs)})")
+        await job._after_submit([str(cups_id)])
@@ -1,25 +1,56 @@
 import asyncio
+import os
 from datetime import datetime
 from collections import deque
-from .print_job import PrintJob
-from modules.ui.messages import PRINT_START_TEXT
-from modules.analytics.logger import error, info
+from aiogram import Bot
+from .print_job import PrintJob, submit_batch
+from . import cups_client
+from .cups_client import JOB_COMPLETED, JOB_CANCELED, JOB_ABORTED, JOB_UNKNOWN
+from .scheduler import get_scheduler, job_pages
+from repositories import print_jobs, print_queue as queue_repo
+from modules.ui.messages import PRINT_START_TEXT, PRINT_DONE_TEXT
+from modules.analytics.logger import error, info, warning
 from modules.ui.keyboards.tracker import send_managed_message
+from modules.ui.keyboards.print import print_done_kb, print_error_kb
 from modules.ui.keyboards.status import print_status_kb
-from config import QUEUE_TIME_PER_PAGE, QUEUE_WARMUP_TIME, QUEUE_STATUS_UPDATE_INTERVAL
+from modules.notifications.notifier import notify_admins
+from config import (
+    QUEUE_TIME_PER_PAGE,
+    QUEUE_WARMUP_TIME,
+    QUEUE_STATUS_UPDATE_INTERVAL,
+    PRINT_PREFETCH_DEPTH,
+    PRINT_DRAIN_TIMEOUT,
+    PRINT_BATCH_ENABLED,
+    PRINT_BATCH_MAX_PAGES,
+    PRINT_BATCH_MAX_JOBS,
+    PRINT_PREEMPT_MAX_PAGES,
+)
 
 # The printing queue holds jobs waiting to be processed.  Jobs are appended
 # as they arrive.  Only one job is printed at a time; other jobs remain
-# in the queue until the current job finishes.
+# in the queue until the current job finishes.  Which waiting job goes
+# next is decided by the scheduling policy (scheduler.py, PRINT_SCHEDULER);
+# the deque itself stays in arrival order.  It mirrors the print_queue
+# table, which is what survives a restart (recover_queue).
 print_queue: deque[PrintJob] = deque()
 
-# Flag indicating whether the worker is currently running.  Access is
-# synchronized via the lock.
-processing: bool = False
+# Jobs already submitted to CUPS while another job prints (at most
+# PRINT_PREFETCH_DEPTH), so the printer does not pay warm-up and the CUPS
+# filter chain again between jobs.  They are still "waiting" for users:
+# waiting_jobs() lists them before print_queue.  _prefetch_lock keeps the
+# worker from taking a job that prefetch() is submitting at that moment.
+prefetched: deque[PrintJob] = deque()
+_prefetch_lock = asyncio.Lock()
 
-# Lock to prevent concurrent workers from starting.  Only one worker
-# instance should run at a time.
-lock = asyncio.Lock()
+# With PRINT_BATCH_ENABLED, small jobs that follow each other go to CUPS
+# as one job with banner sheets between them (see _batch_for).  While such
+# a batch is being prepared its jobs stay in print_queue, but their ids are
+# in _batching so they can no longer be cancelled one by one.
+_batching: set[int] = set()
+
+# Set whenever a job is added; the idle worker sleeps on it instead of
+# polling, so a new job starts printing immediately.
+jobs_available = asyncio.Event()
 
 # Track the job currently being printed, along with timing information.
 # These globals allow estimation of wait times for queued jobs.
@@ -27,6 +58,42 @@ current_job: PrintJob | None = None
 current_job_start: datetime | None = None
 current_job_total_time: float | None = None
 
+# A job printed in parts (PRINT_CHUNK_PAGES) that is paused between two
+# parts while short jobs (up to PRINT_PREEMPT_MAX_PAGES) print; it resumes
+# right after them and is listed first among the waiting jobs meanwhile.
+preempted: PrintJob | None = None
+
+# Task running print_worker(), and whether the bot is shutting down: while
+# draining the worker finishes the current job but does not start new ones.
+worker_task: asyncio.Task | None = None
+draining: bool = False
+
+
+def _scheduled_queue() -> list[PrintJob]:
+    """print_queue in the order the active policy would print it.
+
+    Jobs already submitted to CUPS (recovered after a restart) stay first
+    in arrival order: CUPS prints them before anything sent later.
+    """
+    submitted = [job for job in print_queue if job.cups_job_ids]
+    unsent = [job for job in print_queue if not job.cups_job_ids]
+    ahead = [job for job in (current_job, preempted) if job] + list(prefetched) + submitted
+    return submitted + get_scheduler().order(unsent, ahead=ahead, now=datetime.now())
+
+
+def waiting_jobs() -> list[PrintJob]:
+    """Jobs that have not started printing yet, in the order they will print."""
+    return ([preempted] if preempted else []) + list(prefetched) + _scheduled_queue()
+
+
+def _remove(jobs: deque[PrintJob], job: PrintJob) -> bool:
+    # По идентичности: у dataclass == сравнивает поля.
+    for i, queued in enumerate(jobs):
+        if queued is job:
+            del jobs[i]
+            return True
+    return False
+
 
 def estimate_time_for_job(job: PrintJob) -> float:
     """Return the estimated duration (in seconds) required to print a job.
@@ -35,15 +102,12 @@ def estimate_time_for_job(job: PrintJob) -> float:
     configured per‑page time and warmup overhead.  If the job has a
     specific page selection, only those pages are counted; otherwise the
     full page_count is used.  The number of copies is also taken into
-    account.
+    account.  The page count is the same job size the scheduling policy
+    orders by (scheduler.job_pages), and compute_wait_time() sums these
+    estimates in the policy's order.  For a job printed in parts only the
+    pages not printed yet are counted.
     """
-    try:
-        # Compute the list of pages to print.  Fallback to page_count on
-        # error.  Multiplying by copies accounts for multiple outputs.
-        pages_to_print = len(job.parse_page_ranges(job.pages or f"1-{job.page_count}")) * (job.copies or 1)
-    except Exception:
-        pages_to_print = job.page_count * (job.copies or 1)
-    return pages_to_print * QUEUE_TIME_PER_PAGE + QUEUE_WARMUP_TIME
+    return (job_pages(job) - job.pages_printed) * QUEUE_TIME_PER_PAGE + QUEUE_WARMUP_TIME
 
 
 def compute_wait_time(job: PrintJob) -> float:
@@ -63,7 +127,7 @@ def compute_wait_time(job: PrintJob) -> float:
         if remaining > 0:
             wait_seconds += remaining
     # Sum the durations of all jobs ahead of this job in the queue
-    for queued_job in print_queue:
+    for queued_job in waiting_jobs():
         if queued_job is job:
             break
         wait_seconds += estimate_time_for_job(queued_job)
@@ -78,8 +142,9 @@ async def update_queue_messages() -> None:
     have not yet had a message sent (message_id is None) are skipped.
     """
     # Enumerate queued jobs and build messages
-    for idx, job in enumerate(list(print_queue)):
-        if job.message_id is None:
+    for idx, job in enumerate(waiting_jobs()):
+        # A paused job keeps its progress message (PrintJob.wait_chunk)
+        if job.message_id is None or job is preempted:
             continue
         # Compute position: all jobs ahead plus current job if printing
         position = (1 if current_job else 0) + idx + 1
@@ -146,77 +211,294 @@ async def _notify_job_added(job: PrintJob, ahead_jobs: int) -> None:
             job.message_id = msg.message_id
     except Exception as e:
         error(job.user_id, "queue", f"Error notifying user about new job: {e}")
+    if job.db_id is not None and job.message_id is not None:
+        try:
+            await queue_repo.set_message_id(job.db_id, job.message_id)
+        except Exception as e:
+            error(job.user_id, "queue", f"Failed to store queue message id: {e}")
     # After notifying, refresh the queue messages for all other jobs
     await update_queue_messages()
 
 
+def _set_current(job: PrintJob | None) -> None:
+    global current_job, current_job_start, current_job_total_time
+    current_job = job
+    current_job_start = datetime.now() if job else None
+    current_job_total_time = estimate_time_for_job(job) if job else None
+
+
+async def _run_job(job: PrintJob) -> None:
+    """Print one job, keeping the current_job globals up to date.
+
+    A job split into parts sends them to CUPS one after another; between
+    two parts the short jobs waiting at that moment are printed first
+    (_interleave).
+    """
+    _set_current(job)
+    info(job.user_id, "print_worker", f"Starting print job: {job.file_name}")
+    # Update the user's message to indicate printing has begun
+    if job.message_id is not None:
+        try:
+            await job.bot.edit_message_text(
+                chat_id=job.user_id,
+                message_id=job.message_id,
+                text=PRINT_START_TEXT.format(file_name=job.file_name),
+                reply_markup=None,
+                parse_mode="HTML",
+            )
+        except Exception as e:
+            error(job.user_id, "print_worker", f"Failed to update message for printing: {e}")
+    try:
+        # Mark the job as printing in the database and set the start time
+        if job.db_id is not None:
+            try:
+                await print_jobs.mark_printing(job.db_id, datetime.now())
+            except Exception:
+                pass
+        while True:
+            try:
+                await job.submit()
+            except Exception as e:
+                await job.fail(e)
+                return
+            if not job.chunks_left:
+                # While the last part prints, the next jobs can already go
+                # to CUPS — only now, so they cannot get ahead of it there.
+                asyncio.create_task(prefetch())
+                await job.run()
+                get_scheduler().job_finished(job)
+                return
+            try:
+                await job.wait_chunk()
+            except Exception as e:
+                await job.fail(e)
+                return
+            if draining:
+                # Остальные части допечатаются после рестарта (recover_queue).
+                return
+            await _interleave(job)
+    except Exception as e:
+        error(job.user_id, "print_worker", f"Error in print job {job.file_name}: {e}")
+    finally:
+        _set_current(None)
+
+
+async def _interleave(job: PrintJob) -> None:
+    """Print the short jobs waiting right now before the next part of ``job``."""
+    global preempted
+    if preempted is not None:
+        return
+    short = [
+        queued for queued in _scheduled_queue()
+        if not queued.cups_job_ids and job_pages(queued) <= PRINT_PREEMPT_MAX_PAGES
+    ]
+    if not short:
+        return
+    preempted = job
+    info(
+        job.user_id, "print_worker",
+        f"Pausing {job.file_name} at {job.pages_printed}/{job.pages_total} pages for {len(short)} short job(s)",
+    )
+    try:
+        for queued in short:
+            if draining:
+                break
+            async with _prefetch_lock:
+                taken = _remove(print_queue, queued)
+            if taken:
+                await _run_job(queued)
+    finally:
+        preempted = None
+        _set_current(job)
+
+
+def _is_small(job: PrintJob) -> bool:
+    return job_pages(job) <= PRINT_BATCH_MAX_PAGES
+
+
+def _batch_for(first: PrintJob, queue: list[PrintJob]) -> list[PrintJob]:
+    """``first`` plus the small jobs right behind it in ``queue`` that can share its CUPS job."""
+    if not PRINT_BATCH_ENABLED or first.cups_job_ids or first.batch_failed or not _is_small(first):
+        return [first]
+    batch = [first]
+    for job in queue:
+        if job is first:
+            continue
+        if (
+            len(batch) >= PRINT_BATCH_MAX_JOBS
+            or job.cups_job_ids
+            or job.batch_failed
+            or job.duplex != first.duplex
+            or not _is_small(job)
+        ):
+            break
+        batch.append(job)
+    return batch
+
+
+async def _submit_batch(batch: list[PrintJob]) -> bool:
+    """Submit ``batch`` as one CUPS job and take it out of print_queue.
+
+    If the batch cannot be built or sent (one bad file is enough), its jobs
+    stay in print_queue marked ``batch_failed`` and are then printed one by
+    one, so only a job that fails on its own is failed.  Returns whether
+    the batch was submitted.
+    """
+    _batching.update(id(job) for job in batch)
+    try:
+        await submit_batch(batch)
+    except Exception as e:
+        if not batch[0].cups_job_ids:
+            warning(batch[0].user_id, "print_worker", f"Batch of {len(batch)} jobs failed, printing them one by one: {e}")
+            for job in batch:
+                job.batch_failed = True
+            return False
+        # Пачка уже в CUPS, не удалось только сохранить номер задания.
+        error(batch[0].user_id, "print_worker", f"Batch submitted but not fully recorded: {e}")
+    finally:
+        _batching.difference_update(id(job) for job in batch)
+    for job in batch:
+        _remove(print_queue, job)
+    info(batch[0].user_id, "print_worker", f"Submitted a batch of {len(batch)} jobs")
+    return True
+
+
+async def prefetch(depth: int = PRINT_PREFETCH_DEPTH) -> None:
+    """Submit waiting jobs to CUPS until ``depth`` of them are ready behind the current job.
+
+    Only runs while something is printing and already in CUPS (its last
+    part, for a job printed in parts): an idle worker submits the next job
+    itself.  A job stays in print_queue while
+    it is being prepared, so its position never disappears; if it is
+    cancelled meanwhile, its CUPS jobs are cancelled right after
+    submission.  A batch of small jobs counts as one submission, so it may
+    take prefetched past ``depth``.  Jobs are taken in the order of the
+    active scheduling policy.  Nothing is prefetched behind a job printed
+    in parts, whatever ``depth``, so its later parts stay right behind it.
+    """
+    async with _prefetch_lock:
+        while (
+            current_job is not None
+            and current_job.cups_job_ids
+            and not current_job.chunks_left
+            and preempted is None
+            and print_queue
+            and len(prefetched) < depth
+            and not draining
+            # Остальные части задания должны идти в CUPS сразу за первой,
+            # поэтому за заданием, печатающимся частями, ничего не отправляем.
+            and not (prefetched and prefetched[-1].chunks_left)
+        ):
+            queue = _scheduled_queue()
+            job = queue[0]
+            batch = _batch_for(job, queue)
+            if len(batch) > 1:
+                # При неудаче задания пачки отправятся по одному на следующих шагах.
+                if await _submit_batch(batch):
+                    prefetched.extend(batch)
+                continue
+            try:
+                await job.submit()
+            except Exception as e:
+                if _remove(print_queue, job):
+                    await job.fail(e)
+                continue
+            if _remove(print_queue, job):
+                prefetched.append(job)
+                info(job.user_id, "print_worker", f"Prefetched print job: {job.file_name}")
+            else:
+                for cups_id in job.cups_job_ids:
+                    await cups_client.cancel(int(cups_id))
+
+
+async def _next_job() -> PrintJob | None:
+    async with _prefetch_lock:
+        if prefetched:
+            return prefetched.popleft()
+        if not print_queue:
+            return None
+        queue = _scheduled_queue()
+        job = queue[0]
+        batch = _batch_for(job, queue)
+        if len(batch) == 1:
+            _remove(print_queue, job)
+            return job
+        if not await _submit_batch(batch):
+            # Первое задание пачки печатаем отдельно, остальные — следом.
+            _remove(print_queue, job)
+            return job
+        # Остальные задания пачки уже в CUPS и печатаются сразу за первым.
+        prefetched.extend(batch[1:])
+        return job
+
+
 async def print_worker() -> None:
-    """Asynchronous worker that manages printing jobs sequentially.
+    """Print queued jobs one at a time for as long as the bot runs.
 
-    This coroutine ensures that only one job prints at a time and that
-    queued users receive periodic updates about their wait time.  It
-    continues running as long as there are jobs to process or a job is
-    currently printing.
+    The next job starts as soon as the previous one finishes (and is
+    usually already in CUPS thanks to prefetch()); when the queue is empty
+    the worker waits on ``jobs_available`` until add_job() or
+    recover_queue() wakes it.  Periodic position updates are a separate
+    task (run_queue_status_refresher).  Returns once draining starts.
     """
-    global processing, current_job, current_job_start, current_job_total_time
-    async with lock:
-        # If another worker is active or there are no queued jobs, do nothing
-        if processing:
-            return
-        if not print_queue and not current_job:
-            return
-        processing = True
-
-    # Main loop
+    while not draining:
+        job = await _next_job()
+        if job is None:
+            jobs_available.clear()
+            await jobs_available.wait()
+            continue
+        await _run_job(job)
+        # Everyone behind moved up by one
+        asyncio.create_task(update_queue_messages())
+
+
+async def run_queue_status_refresher(interval: float = QUEUE_STATUS_UPDATE_INTERVAL) -> None:
+    """Background task: refresh queue position messages every ``interval`` seconds."""
     while True:
-        # Start a new job if nothing is currently printing
-        if current_job is None and print_queue:
-            job = print_queue.popleft()
-            current_job = job
-            current_job_start = datetime.now()
-            current_job_total_time = estimate_time_for_job(job)
-            info(job.user_id, "print_worker", f"Starting print job: {job.file_name}")
-            # Update the user's message to indicate printing has begun
-            if job.message_id is not None:
-                try:
-                    await job.bot.edit_message_text(
-                        chat_id=job.user_id,
-                        message_id=job.message_id,
-                        text=PRINT_START_TEXT.format(file_name=job.file_name),
-                        reply_markup=None,
-                        parse_mode="HTML",
-                    )
-                except Exception as e:
-                    error(job.user_id, "print_worker", f"Failed to update message for printing: {e}")
-            # Run the job synchronously; this will block until printing finishes
+        await asyncio.sleep(interval)
+        if waiting_jobs():
             try:
-                # Mark the job as printing in the database and set the start time
-                try:
-                    from db import get_connection  # Import here to avoid circular dependency at module load
-                    with get_connection() as conn:
-                        conn.execute(
-                            "UPDATE print_jobs SET status = 'printing', started_at = ? WHERE user_id = ? AND file_name = ? AND status = 'queued'",
-                            (datetime.now(), job.user_id, job.file_name),
-                        )
-                        conn.commit()
-                except Exception:
-                    pass
-                await job.run()
+                await update_queue_messages()
             except Exception as e:
-                error(job.user_id, "print_worker", f"Error in print job {job.file_name}: {e}")
-            # Reset current job tracking after completion
-            current_job = None
-            current_job_start = None
-            current_job_total_time = None
-            # Refresh queue messages after finishing a job
-            await update_queue_messages()
-        # Exit condition: no current job and queue is empty
-        if current_job is None and not print_queue:
-            processing = False
-            return
-        # Sleep for a configured interval and update the queue messages
-        await asyncio.sleep(QUEUE_STATUS_UPDATE_INTERVAL)
-        await update_queue_messages()
+                error(0, "print_queue", f"Failed to refresh queue messages: {e}")
+
+
+def find_job(db_id: int) -> PrintJob | None:
+    """The printing or waiting job with print_jobs.job_id ``db_id``."""
+    for job in ([current_job] if current_job else []) + waiting_jobs():
+        if job.db_id == db_id:
+            return job
+    return None
+
+
+async def cancel_job(job: PrintJob) -> bool:
+    """Cancel a job that has not started printing.
+
+    A job already sent to CUPS (prefetched, or recovered after a restart)
+    is also cancelled in CUPS.  Returns False if the job is already
+    printing, shares its CUPS job with other jobs (batch) or is no longer
+    in the queue.
+    """
+    if job.batched or id(job) in _batching or _shares_cups_job(job):
+        return False
+    if not (_remove(print_queue, job) or _remove(prefetched, job)):
+        return False
+    for cups_id in job.cups_job_ids:
+        await cups_client.cancel(int(cups_id))
+    await job.update_status("cancelled")
+    info(job.user_id, "print_queue", f"Job cancelled: {job.file_name}")
+    asyncio.create_task(update_queue_messages())
+    return True
+
+
+def _shares_cups_job(job: PrintJob) -> bool:
+    # batched не переживает рестарт: у восстановленных заданий пачки
+    # остаётся только общий номер задания CUPS.
+    ids = set(job.cups_job_ids)
+    if not ids:
+        return False
+    others = ([current_job] if current_job else []) + waiting_jobs()
+    return any(other is not job and ids & set(other.cups_job_ids) for other in others)
 
 
 def add_job(job: PrintJob) -> None:
@@ -225,14 +507,149 @@ def add_job(job: PrintJob) -> None:
     This function is safe to call from synchronous contexts.  It appends
     the job to the queue, schedules an asynchronous notification to the
     user, and ensures that the print worker is running.  The job's
-    position is computed based on the number of jobs currently waiting
-    plus any job that is already printing.
+    position is its place among the waiting jobs in the order of the
+    active scheduling policy, plus any job that is already printing.
     """
-    # Determine how many jobs are ahead of this one.  We compute this
-    # before appending to ensure the count reflects the current queue.
-    ahead_jobs = (1 if current_job else 0) + len(print_queue)
     print_queue.append(job)
+    # With a non-FIFO policy a new job need not be last.  The printing job
+    # is counted by _notify_job_added itself.
+    ahead_jobs = [id(j) for j in waiting_jobs()].index(id(job))
     # Notify the user asynchronously about their job status
     asyncio.create_task(_notify_job_added(job, ahead_jobs))
     # Ensure the worker is running
-    asyncio.create_task(print_worker())
\ No newline at end of file
+    _start_worker()
+
+
+def _start_worker() -> None:
+    """Wake the worker, starting it first if it is not running."""
+    global worker_task
+    if draining:
+        return
+    if worker_task is None or worker_task.done():
+        worker_task = asyncio.create_task(print_worker())
+    jobs_available.set()
+    asyncio.create_task(prefetch())
+
+
+async def _finish_recovered(job: PrintJob, status: str, text: str, kb) -> None:
+    await job.update_status(status)
+    try:
+        await send_managed_message(job.bot, job.user_id, text, kb)
+    except Exception as e:
+        error(job.user_id, "print_queue", f"Failed to notify about recovered job: {e}")
+
+
+# States after which CUPS will not print a job any more
+_FINAL_STATES = {JOB_COMPLETED, JOB_CANCELED, JOB_ABORTED, JOB_UNKNOWN}
+
+
+async def recover_queue(bot: Bot) -> int:
+    """Restore the queue persisted in print_queue after a restart.
+
+    Jobs that were waiting go back in their original order.  Jobs that
+    had already been sent to CUPS (printing or prefetched) are reconciled:
+    if their CUPS jobs are still pending the worker resumes waiting for them
+    without sending the file again; if CUPS has completed them the job is
+    marked done (or, printed in parts, continues with the next part).  A
+    job is resubmitted only when CUPS reports its CUPS job as cancelled,
+    aborted or unknown.  If CUPS cannot be asked, the job keeps its CUPS
+    ids and the worker waits for them (the monitor keeps retrying) rather
+    than risk printing it twice; admins are warned in both cases.  Jobs
+    whose PDF has disappeared are marked as failed.  Returns the number of
+    jobs put back into the queue.
+    """
+    rows = await queue_repo.pending()
+    if not rows:
+        return 0
+
+    cups_ids_by_job = {row["job_id"]: [i for i in (row["cups_job_ids"] or "").split(",") if i] for row in rows}
+    all_cups_ids = sorted({int(i) for ids in cups_ids_by_job.values() for i in ids})
+    try:
+        # Через выбранный backend (pycups, lp или тестовый), одним запросом.
+        states = await cups_client.job_states(all_cups_ids) if all_cups_ids else {}
+    except Exception as e:
+        warning(0, "print_queue", f"CUPS is unavailable during recovery, waiting for sent jobs: {e}")
+        states = None
+
+    recovered = []
+    unverified: list[PrintJob] = []
+    resubmitted: list[PrintJob] = []
+    for row in rows:
+        job = PrintJob.from_queue_row(row, bot)
+        if not os.path.exists(job.file_path):
+            error(job.user_id, "print_queue", f"File for recovered job is missing: {job.file_path}")
+            await _finish_recovered(
+                job, "error",
+                f"❌ Ошибка при печати файла «{job.file_name}». Файл не найден, загрузи его ещё раз.",
+                print_error_kb,
+            )
+            continue
+
+        cups_ids = cups_ids_by_job[row["job_id"]]
+        # В CUPS могло уйти и заранее отправленное (prefetch) задание.
+        if cups_ids and states is None:
+            # Неизвестно, напечатано ли: повторная отправка могла бы дать дубль.
+            job.cups_job_ids = cups_ids
+            unverified.append(job)
+        elif cups_ids:
+            job_states = [states.get(int(i), (JOB_UNKNOWN, None))[0] for i in cups_ids]
+            finished = all(state == JOB_COMPLETED for state in job_states)
+            if any(state not in _FINAL_STATES for state in job_states):
+                job.cups_job_ids = cups_ids
+                info(job.user_id, "print_queue", f"Resuming job {job.db_id}: CUPS jobs {cups_ids} still pending")
+            elif finished and job.chunks_done + 1 < len(job.chunk_plan()):
+                # Допечаталась одна из частей — продолжаем со следующей.
+                job.chunks_done += 1
+                await print_jobs.finish_chunk(job.db_id, job.chunks_done)
+                info(job.user_id, "print_queue", f"Job {job.db_id}: part {job.chunks_done} completed while the bot was down")
+            elif finished:
+                info(job.user_id, "print_queue", f"Job {job.db_id} completed in CUPS while the bot was down")
+                await _finish_recovered(job, "done", PRINT_DONE_TEXT, print_done_kb)
+                continue
+            else:
+                await queue_repo.requeue(job.db_id)
+                warning(job.user_id, "print_queue", f"Job {job.db_id} lost by CUPS ({job_states}), resubmitting")
+                resubmitted.append(job)
+        recovered.append(job)
+
+    if unverified:
+        await notify_admins(
+            bot,
+            "⚠️ CUPS недоступен после перезапуска. Задания "
+            + ", ".join(str(job.db_id) for job in unverified)
+            + " уже были отправлены в принтер — жду их, повторно не отправляю.",
+        )
+    if resubmitted:
+        await notify_admins(
+            bot,
+            "⚠️ CUPS не печатает задания "
+            + ", ".join(str(job.db_id) for job in resubmitted)
+            + " (отменены или неизвестны) — отправляю повторно. Проверь, не было ли их уже на принтере.",
+        )
+
+    print_queue.extend(recovered)
+    info(0, "print_queue", f"Recovered {len(recovered)} job(s) from the persistent queue")
+    if recovered:
+        _start_worker()
+        asyncio.create_task(update_queue_messages())
+    return len(recovered)
+
+
+async def drain_queue(timeout: float = PRINT_DRAIN_TIMEOUT) -> None:
+    """Stop taking new jobs and give the current one ``timeout`` seconds.
+
+    Called on shutdown (SIGTERM/SIGINT stop polling first).  Waiting jobs
+    stay in print_queue; a job still printing when the timeout expires
+    keeps its CUPS ids and is reconciled by recover_queue() on next start.
+    """
+    global draining
+    draining = True
+    jobs_available.set()
+    if worker_task is None or worker_task.done():
+        return
+    if current_job is not None:
+        info(0, "print_queue", f"Draining: waiting up to {timeout:.0f}s for the current job")
+    done, _ = await asyncio.wait({worker_task}, timeout=timeout)
+    if not done:
+        warning(0, "print_queue", "Drain timeout: current job will be reconciled on restart")
+        worker_task.cancel()
@@ -1,4 +1,5 @@
 # modules/printing/printer_status.py
+import asyncio
 import subprocess
 import re
 from typing import Dict, Optional
@@ -107,6 +108,32 @@ def get_printer_status(printer: Optional[str] = None) -> str:
     return "unknown"
 
 
+async def lpstat_job_ids(which: str = "not-completed") -> set[str]:
+    """
+    Номера заданий CUPS из ``lpstat -W <which> -o`` ("not-completed" или
+    "completed").  Строка вида "PRINTER-123 user 1024 date" даёт "123";
+    сравнивать нужно целиком, а не подстрокой.  Не блокирует event loop.
+    Если lpstat завершился с ошибкой (например, cupsd не запущен), бросает
+    RuntimeError: пустой ответ значил бы «CUPS не знает ни одного задания».
+    """
+    proc = await asyncio.create_subprocess_exec(
+        "lpstat", "-W", which, "-o",
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(f"lpstat error: {stderr.decode(errors='replace').strip()}")
+    ids = set()
+    for line in stdout.decode(errors="replace").splitlines():
+        if not line.strip():
+            continue
+        name = line.split()[0]
+        if "-" in name:
+            ids.add(name.rsplit("-", 1)[1])
+    return ids
+
+
 def get_printer_latency(
     ip: str = DEFAULT_PRINTER_IP,
     count: int = PING_COUNT,
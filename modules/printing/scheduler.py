@@ -0,0 +1,138 @@
+# modules/printing/scheduler.py
+
+from datetime import datetime
+from typing import Iterable
+
+from config import PRINT_SCHEDULER, PRINT_SJF_AGING, PRINT_FAIR_WEIGHTS
+from modules.printing.print_job import PrintJob
+from utils.parsers import count_printed_pages
+
+# Порядок печати ожидающих заданий задаёт сменная политика:
+#   FifoScheduler      — в порядке поступления (по умолчанию);
+#   SjfScheduler       — сначала короткие; ожидание постепенно поднимает
+#                        длинные задания, чтобы они не ждали вечно (aging);
+#   FairShareScheduler — взвешенная очередь по пользователям: задания
+#                        чередуются между пользователями пропорционально весам.
+# Политика выбирается PRINT_SCHEDULER ("fifo", "sjf", "fair").  order()
+# не меняет print_queue, а только возвращает список в порядке печати;
+# job_finished() вызывается, когда задание допечатано.
+
+
+def job_pages(job: PrintJob) -> int:
+    """Printed pages of a job (selected pages × copies) — its size for scheduling."""
+    try:
+        return count_printed_pages(job.page_count, job.pages, job.copies)
+    except Exception:
+        return job.page_count * (job.copies or 1)
+
+
+class FifoScheduler:
+    name = "fifo"
+
+    def order(self, jobs: Iterable[PrintJob], ahead: Iterable[PrintJob] = (), now: datetime | None = None) -> list[PrintJob]:
+        return list(jobs)
+
+    def job_finished(self, job: PrintJob) -> None:
+        pass
+
+
+class SjfScheduler:
+    """
+    Shortest job first with aging: a job's priority is its size in pages
+    minus ``aging`` pages per second it has waited, so a 100-page job
+    overtakes fresh 1-page jobs after about 100 / aging seconds.
+    """
+
+    name = "sjf"
+
+    def __init__(self, aging: float = PRINT_SJF_AGING):
+        self.aging = aging
+
+    def order(self, jobs: Iterable[PrintJob], ahead: Iterable[PrintJob] = (), now: datetime | None = None) -> list[PrintJob]:
+        now = now or datetime.now()
+
+        def priority(job: PrintJob) -> float:
+            waited = (now - job.enqueued_at).total_seconds()
+            return job_pages(job) - self.aging * max(waited, 0.0)
+
+        # sorted() устойчива: при равном приоритете сохраняется порядок поступления.
+        return sorted(jobs, key=priority)
+
+    def job_finished(self, job: PrintJob) -> None:
+        pass
+
+
+class FairShareScheduler:
+    """
+    Weighted fair queueing by user (start-time fair queueing).  Every user
+    has a virtual finish time: the virtual time at which their printed
+    pages, divided by the user's weight, are paid off.  It advances in
+    job_finished() and persists between bursts, so a user who has just
+    printed a lot waits behind users who have not.  The global virtual
+    time is the start tag of the last finished job; a user idle for long
+    starts from it and gets no credit for the idle time.
+
+    Each user's jobs keep their own order; a waiting job's tag is the
+    user's start (their finish time or the virtual time, whichever is
+    later) plus the pages of their jobs ``ahead`` (printing or already in
+    CUPS) and of their earlier waiting jobs and its own, over the weight.
+    Jobs print in order of that tag.
+    """
+
+    name = "fair"
+
+    def __init__(self, weights: dict[int, float] | None = None):
+        self.weights = PRINT_FAIR_WEIGHTS if weights is None else weights
+        self.virtual_time = 0.0
+        self.finish: dict[int, float] = {}
+
+    def _weight(self, user_id: int) -> float:
+        return self.weights.get(user_id, 1.0)
+
+    def _start(self, user_id: int) -> float:
+        return max(self.virtual_time, self.finish.get(user_id, 0.0))
+
+    def order(self, jobs: Iterable[PrintJob], ahead: Iterable[PrintJob] = (), now: datetime | None = None) -> list[PrintJob]:
+        tags: dict[int, float] = {}
+
+        def advance(job: PrintJob) -> float:
+            user_id = job.user_id
+            if user_id not in tags:
+                tags[user_id] = self._start(user_id)
+            tags[user_id] += job_pages(job) / self._weight(user_id)
+            return tags[user_id]
+
+        for job in ahead:
+            advance(job)
+        keyed = [(advance(job), seq, job) for seq, job in enumerate(jobs)]
+        keyed.sort(key=lambda item: item[:2])
+        return [job for _, _, job in keyed]
+
+    def job_finished(self, job: PrintJob) -> None:
+        start = self._start(job.user_id)
+        self.finish[job.user_id] = start + job_pages(job) / self._weight(job.user_id)
+        self.virtual_time = start
+        # Отставшие от виртуального времени пользователи ничем не отличаются
+        # от новых — не храним их.
+        for user_id in [u for u, f in self.finish.items() if f <= self.virtual_time]:
+            del self.finish[user_id]
+
+
+SCHEDULERS = {cls.name: cls for cls in (FifoScheduler, SjfScheduler, FairShareScheduler)}
+
+_scheduler = None
+
+
+def get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        if PRINT_SCHEDULER not in SCHEDULERS:
+            raise ValueError(f"Unknown PRINT_SCHEDULER: {PRINT_SCHEDULER}")
+        _scheduler = SCHEDULERS[PRINT_SCHEDULER]()
+    return _scheduler
+
+
+def set_scheduler(scheduler) -> None:
+    """Replace the active policy, e.g. in tests."""
+    global _scheduler
+    _scheduler = scheduler
@@ -3,7 +3,6 @@ from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 from states import UserStates
 from modules.decorators import ensure_data
-from modules.decorators import check_paused
 from ..keyboards.review import review_kb
 from ..keyboards.payment import payment_methods_kb
 from ..keyboards.options import get_print_options_kb
@@ -14,7 +13,6 @@ from aiogram.exceptions import TelegramBadRequest
 router = Router()
 
 @router.callback_query(F.data == BACK)
-@check_paused
 @ensure_data
 async def handle_back(callback: CallbackQuery, state: FSMContext, data: dict):
     current = await state.get_state()
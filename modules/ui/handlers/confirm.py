@@ -3,7 +3,6 @@ from aiogram.types import CallbackQuery
 from aiogram.fsm.context import FSMContext
 from states import UserStates
 from modules.decorators import ensure_data
-from modules.decorators import check_paused
 from modules.analytics.logger import action, warning, error
 from ..keyboards.review import review_kb
 from ..keyboards.payment import payment_methods_kb
@@ -20,7 +19,6 @@ from aiogram.exceptions import TelegramBadRequest
 router = Router()
 
 @router.callback_query(F.data == CONFIRM)
-@check_paused
 @ensure_data
 async def handle_confirm(callback: CallbackQuery, state: FSMContext, data: dict):
     current = await state.get_state()
@@ -38,7 +36,7 @@ async def handle_confirm(callback: CallbackQuery, state: FSMContext, data: dict)
 
         await state.update_data(copies=copies)
 
-        bonus_pages, discount_percent, promo_code = get_user_discounts(callback.from_user.id)
+        bonus_pages, discount_percent, promo_code = await get_user_discounts(callback.from_user.id)
 
         page_range = data.get("pages") or f"1-{data['page_count']}"
         layout = data.get("layout", "1")
@@ -95,7 +93,7 @@ async def handle_confirm(callback: CallbackQuery, state: FSMContext, data: dict)
         await state.update_data(pages=pages)
         data = await state.get_data()
 
-        bonus_pages, discount_percent, promo_code = get_user_discounts(callback.from_user.id)
+        bonus_pages, discount_percent, promo_code = await get_user_discounts(callback.from_user.id)
 
         page_range = data.get("pages") or f"1-{data['page_count']}"
         layout = data.get("layout", "1")
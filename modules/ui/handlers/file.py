@@ -13,13 +13,11 @@ from modules.printing.pdf_utils import (
 from modules.billing.services.calculate_price import calculate_price
 from modules.billing.services.promo import get_user_discounts
 from ..keyboards.review import details_review_kb, free_review_kb
-from modules.admin.services.ban import is_banned
 from .start import send_main_menu
 from states import UserStates
 from ..messages import *
 from modules.analytics.logger import action, warning, info, error
 from ..keyboards.tracker import send_managed_message
-from modules.decorators import check_paused
 
 # Import configuration for upload paths and limits
 from config import (
@@ -262,7 +260,7 @@ async def process_media_group(user_id: int, group_id: str) -> None:
         return
 
     # Apply user bonuses and discounts
-    bonus_pages, discount_percent, promo_code = get_user_discounts(user_id)
+    bonus_pages, discount_percent, promo_code = await get_user_discounts(user_id)
     info(
         user_id,
         "media_group",
@@ -307,7 +305,6 @@ async def process_media_group(user_id: int, group_id: str) -> None:
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 @router.message(F.document)
-@check_paused
 async def handle_document(message: Message, state: FSMContext):
     # If this document is part of a media group (album), defer processing to the
     # group handler.  We collect all attachments belonging to the same
@@ -357,15 +354,6 @@ async def handle_document(message: Message, state: FSMContext):
             )
             return
 
-    if is_banned(user_id):
-        await message.answer("🚫 Вы были заблокированы. Обратитесь к администратору.")
-        warning(
-        message.from_user.id, 
-        "document_upload", 
-        "Banned user: Access denied"
-        )
-        return
-
     if not is_supported_file(original_file_name):
         await message.answer(FILE_TYPE_ERROR_TEXT)
         warning(
@@ -463,7 +451,7 @@ async def handle_document(message: Message, state: FSMContext):
             )
             return
 
-        bonus_pages, discount_percent, promo_code = get_user_discounts(message.from_user.id)
+        bonus_pages, discount_percent, promo_code = await get_user_discounts(message.from_user.id)
         info(
             message.from_user.id,
             "handle_document",
@@ -479,7 +467,7 @@ async def handle_document(message: Message, state: FSMContext):
         )
 
         await state.update_data(
-            price_data=price_data,
+                price_data=price_data,
             file_path=processed_pdf_path,
             page_count=page_count,
             file_name=original_file_name,
@@ -515,7 +503,6 @@ async def handle_document(message: Message, state: FSMContext):
 
 
 @router.message(F.photo)
-@check_paused
 async def handle_photo(message: Message, state: FSMContext):
     """
     Handle images sent as compressed photos.  Telegram sends photos with
@@ -567,16 +554,6 @@ async def handle_photo(message: Message, state: FSMContext):
             )
             return
 
-    # Check if user is banned
-    if is_banned(user_id):
-        await message.answer("🚫 Вы были заблокированы. Обратитесь к администратору.")
-        warning(
-            user_id,
-            "photo_upload",
-            "Banned user: Access denied"
-        )
-        return
-
     # Compose the path to the user's upload folder
     user_folder = os.path.join(UPLOAD_DIR_STR, str(user_id))
     os.makedirs(user_folder, exist_ok=True)
@@ -649,14 +626,14 @@ async def handle_photo(message: Message, state: FSMContext):
             return
 
         # Compute user bonuses and discounts
-        bonus_pages, discount_percent, promo_code = get_user_discounts(user_id)
+        bonus_pages, discount_percent, promo_code = await get_user_discounts(user_id)
         info(
             user_id,
             "handle_photo",
             f"User discounts: bonus_pages={bonus_pages}, discount_percent={discount_percent}, promo_code={promo_code}"
         )
 
-        # Calculate price for 1-page document (page_count)
+        # Price every option combination for the image once
         price_data = calculate_price(
             page_range=f"1-{page_count}",
             layout="1",
@@ -667,7 +644,7 @@ async def handle_photo(message: Message, state: FSMContext):
 
         # Update state with job details
         await state.update_data(
-            price_data=price_data,
+                price_data=price_data,
             file_path=processed_pdf_path,
             page_count=page_count,
             file_name=original_file_name,
@@ -3,7 +3,7 @@ from aiogram.types import CallbackQuery, Message
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
 
-from config import CONTACT_USERNAME
+from config import CONTACT_USERNAME, MAX_COPIES_PER_JOB
 from modules.decorators import ensure_data
 from states import UserStates
 from ..keyboards.common import back_kb
@@ -13,7 +13,6 @@ from modules.printing.pdf_utils import get_orientation_ranges
 from modules.analytics.logger import action, warning, error, info
 from modules.billing.services.calculate_price import calculate_price
 from modules.billing.services.promo import get_user_discounts
-from modules.decorators import check_paused
 from utils.parsers import parse_pages_str
 
 
@@ -29,9 +28,24 @@ from ..callbacks import (
 
 router = Router()
 
+
+async def _layout_prices(user_id: int, data: dict) -> dict[str, float]:
+    """Final price of every layout for the other options in ``data``."""
+    bonus_pages, discount_percent, _ = await get_user_discounts(user_id)
+    page_range = data.get("pages") or f"1-{data['page_count']}"
+    return {
+        layout: calculate_price(
+            page_range=page_range,
+            layout=layout,
+            copies=data.get("copies", 1),
+            bonus_pages=bonus_pages,
+            discount_percent=discount_percent
+        )["final_price"]
+        for layout in LAYOUTS
+    }
+
 # Handle Options
 @router.callback_query(F.data == PRINT_OPTIONS)
-@check_paused
 @ensure_data
 async def handle_print_options(callback: CallbackQuery, state: FSMContext, data: dict):    
     await state.set_state(UserStates.setting_print_options)
@@ -50,7 +64,6 @@ async def handle_print_options(callback: CallbackQuery, state: FSMContext, data:
 
 # Handle Duplex option
 @router.callback_query(F.data == OPTION_DUPLEX)
-@check_paused
 @ensure_data
 async def handle_option_duplex(callback: CallbackQuery, state: FSMContext, data: dict):
     new = not data.get("duplex", False)
@@ -81,15 +94,15 @@ async def handle_option_duplex(callback: CallbackQuery, state: FSMContext, data:
 
 # Handle Layout option
 @router.callback_query(F.data == OPTION_LAYOUT)
-@check_paused
 @ensure_data
 async def handle_option_layout(callback: CallbackQuery, state: FSMContext, data: dict):
     layout = data.get("layout", "1")
     if layout not in LAYOUTS:
         layout = "1"
+    prices = await _layout_prices(callback.from_user.id, data)
     await callback.message.edit_text(
         text = get_layout_selection_text(data),
-        reply_markup=get_print_layouts_kb(layout)
+        reply_markup=get_print_layouts_kb(layout, prices)
     )
     action(
         user_id=callback.from_user.id,
@@ -100,13 +113,12 @@ async def handle_option_layout(callback: CallbackQuery, state: FSMContext, data:
 
 # Handle Layouts selection
 @router.callback_query(F.data.in_(LAYOUTS))
-@check_paused
 @ensure_data
 async def handle_layout_selection(callback: CallbackQuery, state: FSMContext, data: dict):
     await state.update_data(layout=callback.data)
     data = await state.get_data()
 
-    bonus_pages, discount_percent, promo_code = get_user_discounts(callback.from_user.id)
+    bonus_pages, discount_percent, promo_code = await get_user_discounts(callback.from_user.id)
 
     page_range = data.get("pages") or f"1-{data['page_count']}"
     layout = data.get("layout", "1")
@@ -121,11 +133,12 @@ async def handle_layout_selection(callback: CallbackQuery, state: FSMContext, da
     )
 
     await state.update_data(price_data=price_data)
-
+    data["price_data"] = price_data
+    prices = await _layout_prices(callback.from_user.id, data)
 
     await callback.message.edit_text(
         text=get_layout_selection_text(data),
-        reply_markup=get_print_layouts_kb(callback.data)
+        reply_markup=get_print_layouts_kb(callback.data, prices)
     )
     await callback.answer()
 
@@ -137,7 +150,6 @@ async def handle_layout_selection(callback: CallbackQuery, state: FSMContext, da
 
 # Handle Copies option
 @router.callback_query(F.data == OPTION_COPIES)
-@check_paused
 @ensure_data
 async def handle_copies_selection(callback: CallbackQuery, state: FSMContext, data: dict):
     await state.set_state(UserStates.inputting_copies_count)
@@ -156,7 +168,6 @@ async def handle_copies_selection(callback: CallbackQuery, state: FSMContext, da
 
 # Handle Copies input
 @router.message(UserStates.inputting_copies_count)
-@check_paused
 @ensure_data
 async def handle_copies_input(message: Message, state: FSMContext, data: dict):
     text = message.text.strip()
@@ -172,12 +183,12 @@ async def handle_copies_input(message: Message, state: FSMContext, data: dict):
         return
 
     copies = int(text)
-    if copies < 1 or copies > 50:
-        await message.answer("❌ Количество копий должно быть от 1 до 50")
+    if copies < 1 or copies > MAX_COPIES_PER_JOB:
+        await message.answer(f"❌ Количество копий должно быть от 1 до {MAX_COPIES_PER_JOB}")
         warning(
             message.from_user.id,
             "copies_input",
-            f"Invalid copies count: {copies} (expected 1-50)",
+            f"Invalid copies count: {copies} (expected 1-{MAX_COPIES_PER_JOB})",
             f"Input: {text}"
         )
         return
@@ -200,7 +211,6 @@ async def handle_copies_input(message: Message, state: FSMContext, data: dict):
 
 # Handle Pages option
 @router.callback_query(F.data == OPTION_PAGES)
-@check_paused
 @ensure_data
 async def handle_pages_selection(callback: CallbackQuery, state: FSMContext, data: dict):
     if "group" in data.get("file_path"):
@@ -224,7 +234,6 @@ async def handle_pages_selection(callback: CallbackQuery, state: FSMContext, dat
 
 # Handle Page ranges input
 @router.message(UserStates.inputting_pages)
-@check_paused
 @ensure_data
 async def handle_pages_input(message: Message, state: FSMContext, data: dict):
     text = message.text.strip()
@@ -21,13 +21,11 @@ from ..keyboards.payment import payment_methods_kb, payment_confirm_kb
 from ..callbacks import *
 from states import UserStates
 from modules.analytics.logger import action, warning, error, info
-from modules.decorators import check_paused
 
 router = Router()
 
 # Cash payment handler
 @router.callback_query(F.data == PAY_CASH)
-@check_paused
 @ensure_data
 async def handle_cash_payment(callback: CallbackQuery, state: FSMContext, data: dict):
     await state.update_data(method="cash")
@@ -47,7 +45,6 @@ async def handle_cash_payment(callback: CallbackQuery, state: FSMContext, data:
 
 # Card payment handler
 @router.callback_query(F.data == PAY_CARD)
-@check_paused
 @ensure_data
 async def handle_card_payment(callback: CallbackQuery, state: FSMContext, data: dict):
     await state.set_state(UserStates.confirming_cash_payment)
@@ -67,7 +64,6 @@ async def handle_card_payment(callback: CallbackQuery, state: FSMContext, data:
 
 # Pay with Alfa
 @router.callback_query(F.data == PAY_ALFA)
-@check_paused
 @ensure_data
 async def handle_alfa_payment(callback: CallbackQuery, state: FSMContext, data: dict):
     await state.update_data(method="alfa")
@@ -88,7 +84,6 @@ async def handle_alfa_payment(callback: CallbackQuery, state: FSMContext, data:
 
 # Pay with Belarusbank
 @router.callback_query(F.data == PAY_BELARUSBANK)
-@check_paused
 @ensure_data
 async def handle_belarusbank_payment(callback: CallbackQuery, state: FSMContext, data: dict):
     await state.update_data(method="belarusbank")
@@ -107,7 +102,6 @@ async def handle_belarusbank_payment(callback: CallbackQuery, state: FSMContext,
 
 # Pay with Other bank
 @router.callback_query(F.data == PAY_OTHER)
-@check_paused
 @ensure_data
 async def handle_other_payment(callback: CallbackQuery, state: FSMContext, data: dict):
     await state.update_data(method="other")
@@ -126,7 +120,6 @@ async def handle_other_payment(callback: CallbackQuery, state: FSMContext, data:
 
 # Pay confirm
 @router.callback_query(F.data == PAY_CONFIRM)
-@check_paused
 @ensure_data
 async def handle_pay_confirm(callback: CallbackQuery, state: FSMContext, data: dict):
     user_id = callback.from_user.id
@@ -146,6 +139,29 @@ async def handle_pay_confirm(callback: CallbackQuery, state: FSMContext, data: d
         "Confirm payment"
     )
 
+    # Сначала сохраняем задание: без записи в print_jobs оно не переживёт
+    # рестарт, поэтому при ошибке не ставим его в очередь и ничего не списываем.
+    job = PrintJob(
+        user_id,
+        file_path,
+        file_name,
+        callback.bot,
+        page_count,
+        duplex,
+        layout,
+        pages,
+        copies,
+        price=price_data["final_price"],
+        payment_method=method,
+        user_name=callback.from_user.full_name,
+    )
+    try:
+        await job.save_to_db()
+    except Exception as e:
+        error(user_id, PAY_CONFIRM, f"Failed to save print job: {e}")
+        await callback.answer(PRINT_SAVE_FAILURE_TEXT, show_alert=True)
+        return
+
     log_print_job(
         user_id=user_id,
         file_name=file_name,
@@ -166,13 +182,13 @@ async def handle_pay_confirm(callback: CallbackQuery, state: FSMContext, data: d
     if pages_covered > 0:
         # Текущее количество бонусных страниц у пользователя
         try:
-            available_bonus = get_user_bonus_pages(user_id)
+            available_bonus = await get_user_bonus_pages(user_id)
         except Exception:
             available_bonus = 0
 
         # Определяем промокод, который мог быть активирован
         try:
-            _, _, used_code = get_user_discounts(user_id)
+            _, _, used_code = await get_user_discounts(user_id)
         except Exception:
             used_code = None
 
@@ -180,7 +196,7 @@ async def handle_pay_confirm(callback: CallbackQuery, state: FSMContext, data: d
         promo_pages = 0
         if used_code:
             try:
-                reward_type, reward_value = get_promo_reward(used_code)
+                reward_type, reward_value = await get_promo_reward(used_code)
                 if reward_type == "pages":
                     promo_pages = int(reward_value)
             except Exception:
@@ -193,23 +209,11 @@ async def handle_pay_confirm(callback: CallbackQuery, state: FSMContext, data: d
         to_consume = min(available_bonus, pages_from_user_bonus)
         if to_consume > 0:
             try:
-                consume_bonus_pages(user_id, to_consume)
+                await consume_bonus_pages(user_id, to_consume)
             except Exception:
                 # Если не удалось списать, продолжаем без ошибки — печать не блокируем
                 pass
 
-    job = PrintJob(
-        user_id,
-        file_path,
-        file_name,
-        callback.bot,
-        page_count,
-        duplex,
-        layout,
-        pages,
-        copies
-    )
-    
     add_job(job)
     info(
         user_id,
@@ -17,7 +17,7 @@ from datetime import datetime
 
 from modules.ui.callbacks import PRINT_STATUS
 from modules.ui.keyboards.status import print_status_kb
-from modules.printing.print_service import print_queue, current_job
+from modules.printing import print_service
 from modules.analytics.logger import info, error
 
 router = Router()
@@ -35,7 +35,8 @@ async def handle_print_status(callback: CallbackQuery) -> None:
     user_id = callback.from_user.id
     # Find the user's first job in the queue
     target_job = None
-    for job in list(print_queue):
+    waiting = print_service.waiting_jobs()
+    for job in waiting:
         try:
             if job.user_id == user_id:
                 target_job = job
@@ -45,9 +46,13 @@ async def handle_print_status(callback: CallbackQuery) -> None:
             continue
     # If not found in queue, check if currently printing
     if target_job is None:
+        current_job = print_service.current_job
         if current_job and getattr(current_job, "user_id", None) == user_id:
             # User's job is currently printing
             text = "🖨️ Твой документ сейчас печатается…"
+            printed = current_job.pages_completed
+            if printed is not None:
+                text += f"\nНапечатано {printed}/{current_job.pages_total} стр."
         else:
             # Job not in queue — likely printed or cancelled
             text = "ℹ️ Похоже, твой документ уже распечатан или не найден в очереди."
@@ -63,14 +68,23 @@ async def handle_print_status(callback: CallbackQuery) -> None:
     # Determine position including any current job.  We intentionally
     # omit time remaining from the status message because it can be
     # misleading on consumer printers.
-    ahead_count = (1 if current_job else 0) + list(print_queue).index(target_job)
+    ahead_count = (1 if print_service.current_job else 0) + waiting.index(target_job)
     position = ahead_count + 1
     update_time = datetime.now().strftime("%H:%M:%S")
-    text = (
-        f"📄 Файл <b>{target_job.file_name}</b>\n"
-        f"Позиция в очереди: <b>{position}</b>\n"
-        f"Обновлено: {update_time}"
-    )
+    if target_job is print_service.preempted:
+        # Большое задание пропускает вперёд короткие между своими частями.
+        text = (
+            f"⏸ Файл <b>{target_job.file_name}</b>: напечатано "
+            f"{target_job.pages_printed}/{target_job.pages_total} стр.\n"
+            "Продолжу сразу после коротких заданий.\n"
+            f"Обновлено: {update_time}"
+        )
+    else:
+        text = (
+            f"📄 Файл <b>{target_job.file_name}</b>\n"
+            f"Позиция в очереди: <b>{position}</b>\n"
+            f"Обновлено: {update_time}"
+        )
     try:
         await callback.message.edit_text(
             text=text,
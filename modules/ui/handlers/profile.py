@@ -13,80 +13,38 @@ from modules.ui.callbacks import PROFILE, ORDERS, MAIN_MENU
 from modules.billing.services.promo import (
     get_user_bonus_pages,
     get_active_promos_for_user,
+    get_active_grants_for_user,
 )
-from utils.parsers import extract_pages
-from db import get_connection
+from repositories import print_jobs, user_stats
 
 
 router = Router()
 
 
-def _calculate_user_total_pages(user_id: int) -> int:
+async def _calculate_user_total_pages(user_id: int) -> int:
     """Return the total number of pages printed by the user across all completed jobs.
 
-    Pages are multiplied by the number of copies. If a custom page range
-    was selected for a job, only those pages are counted.
+    The value is maintained incrementally in ``user_stats`` when a job is
+    marked done, so this is a single-row lookup.
     """
-    with get_connection() as conn:
-        rows = conn.execute(
-            """
-            SELECT page_count, pages, copies
-            FROM print_jobs
-            WHERE user_id = ? AND status = 'done'
-            """,
-            (user_id,),
-        ).fetchall()
-
-    total = 0
-    for row in rows:
-        copies = row["copies"] or 1
-        if row["pages"]:
-            try:
-                pages_list = extract_pages(row["pages"])
-                pages_count = len(pages_list)
-            except Exception:
-                # Fall back to stored page_count if parsing fails
-                pages_count = row["page_count"]
-        else:
-            pages_count = row["page_count"]
-        total += pages_count * copies
-    return total
+    return await user_stats.total_pages(user_id)
 
 
-def _get_user_jobs(user_id: int) -> List[Dict]:
+async def _get_user_jobs(user_id: int) -> List[Dict]:
     """Retrieve a list of user's print jobs ordered by creation date descending.
 
-    Each element contains file_name, printed_pages (pages * copies) and
-    created_at timestamp. Jobs of any status are returned. If a job has a
-    custom page range, only those pages are counted.
+    Each element contains file_name, printed_pages (pages * copies, stored
+    when the job was queued) and created_at timestamp. Jobs of any status
+    are returned.
     """
-    with get_connection() as conn:
-        rows = conn.execute(
-            """
-            SELECT file_name, page_count, pages, copies, created_at, status
-            FROM print_jobs
-            WHERE user_id = ?
-            ORDER BY created_at DESC
-            """,
-            (user_id,),
-        ).fetchall()
+    rows = await print_jobs.list_for_user(user_id)
 
     jobs: List[Dict] = []
     for row in rows:
-        copies = row["copies"] or 1
-        if row["pages"]:
-            try:
-                pages_list = extract_pages(row["pages"])
-                pages_count = len(pages_list)
-            except Exception:
-                pages_count = row["page_count"]
-        else:
-            pages_count = row["page_count"]
-        printed_pages = pages_count * copies
         jobs.append(
             {
                 "file_name": row["file_name"],
-                "printed_pages": printed_pages,
+                "printed_pages": row["printed_pages"],
                 "created_at": row["created_at"],
                 "status": row["status"],
             }
@@ -138,8 +96,8 @@ async def handle_profile(callback: CallbackQuery) -> None:
     """Show user's profile summary when the profile button is pressed."""
     user_id = callback.from_user.id
 
-    total_pages = _calculate_user_total_pages(user_id)
-    bonus_pages = get_user_bonus_pages(user_id)
+    total_pages = await _calculate_user_total_pages(user_id)
+    bonus_pages = await get_user_bonus_pages(user_id)
 
     # Personal discount and progress calculation
     # Import tiers lazily to avoid circular dependencies
@@ -184,7 +142,11 @@ async def handle_profile(callback: CallbackQuery) -> None:
     discount_lines.append(f"Прогресс: <code>[{bar}]</code>")
     discount_block = "\n".join(discount_lines)
 
-    promos = get_active_promos_for_user(user_id)
+    promos = await get_active_promos_for_user(user_id)
+    promos += [
+        {"code": "Подарок", "reward_type": g["grant_type"], "reward_value": g["value"], "expires_at": g["expires_at"]}
+        for g in await get_active_grants_for_user(user_id)
+    ]
     promo_lines: List[str] = []
     for promo in promos:
         code = promo.get("code")
@@ -243,7 +205,7 @@ async def handle_orders(callback: CallbackQuery) -> None:
     if page < 1:
         page = 1
 
-    jobs = _get_user_jobs(user_id)
+    jobs = await _get_user_jobs(user_id)
     per_page = 5
     total_items = len(jobs)
 
@@ -1,45 +1,48 @@
-from aiogram import Router, F
+from aiogram import Router
+from aiogram.filters import BaseFilter
 from aiogram.types import Message
-from modules.billing.services.promo import (
-    promo_exists,
-    promo_can_be_activated,
-    has_activated_promo,
-    record_promo_activation,
-    add_user_bonus_pages,
-    get_promo_info,
-)
-from datetime import datetime
+from modules.billing.services.promo import ActivationOutcome, activate_promo
+from modules.billing.services.promo_index import is_inactive, lookup_promo, mark_exhausted, unregister_promo
+from datetime import datetime, timedelta
 from ..messages import UNKNOWN_COMMAND_TEXT
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from modules.ui.keyboards.tracker import send_managed_message
 
 router = Router()
 
-@router.message(F.text.regexp(r"^[\w\dа-яА-ЯёЁ]{3,30}$"))
-async def handle_promo_code_input(message: Message):
-    code = message.text.strip()
 
-    if not promo_exists(code):
-        await send_managed_message(
-            bot=message.bot,
-            user_id=message.from_user.id,
-            text=UNKNOWN_COMMAND_TEXT
-        )
-        return  # Просто пропускаем — пусть другие обработчики ловят как обычный текст
+class PromoCodeFilter(BaseFilter):
+    """
+    Срабатывает, только если текст сообщения — известный промокод (без учёта
+    регистра).  Проверка идёт по индексу в памяти, так что обычный текст
+    не вызывает запросов к БД и проходит дальше к остальным хендлерам.
+    """
 
-    user_id = message.from_user.id
+    async def __call__(self, message: Message) -> bool | dict:
+        if not message.text or len(message.text) > 30:
+            return False
+        entry = lookup_promo(message.text)
+        if entry is None:
+            return False
+        return {"promo": entry}
 
-    if has_activated_promo(user_id, code):
-        await message.answer("⚠️ Ты уже активировал этот промокод")
-        return
 
-    if not promo_can_be_activated(code):
+@router.message(PromoCodeFilter())
+async def handle_promo_code_input(message: Message, promo: dict):
+    code = promo["code"]
+    user_id = message.from_user.id
+
+    if is_inactive(promo):
         await message.answer("❌ Этот промокод больше не активен")
         return
 
-    # Получаем полную информацию о промокоде, включая шаблон сообщения и срок действия
-    info_data = get_promo_info(code)
-    if not info_data:
+    # Проверка, счётчик активаций и начисление бонусов — одна транзакция
+    outcome, info_data = await activate_promo(user_id, code)
+
+    if outcome is ActivationOutcome.UNKNOWN:
+        # Кода уже нет в БД (удалён после загрузки индекса): убираем его из
+        # индекса, чтобы следующие такие сообщения шли к другим хендлерам.
+        unregister_promo(code)
         await send_managed_message(
             bot=message.bot,
             user_id=message.from_user.id,
@@ -47,17 +50,21 @@ async def handle_promo_code_input(message: Message):
         )
         return
 
+    if outcome is ActivationOutcome.ALREADY_USED:
+        await message.answer("⚠️ Ты уже активировал этот промокод")
+        return
+
+    if outcome in (ActivationOutcome.EXHAUSTED, ActivationOutcome.EXPIRED):
+        mark_exhausted(code)
+        await message.answer("❌ Этот промокод больше не активен")
+        return
+
     reward_type = info_data["reward_type"]
     reward_value = info_data["reward_value"]
     duration_days = info_data.get("duration_days")
     message_template = info_data.get("message_template")
     expires_at = info_data.get("expires_at")
 
-    record_promo_activation(user_id, code)
-
-    if reward_type == "pages":
-        add_user_bonus_pages(user_id, int(reward_value))
-
     # Формируем сообщение для пользователя
     if message_template:
         # Заполняем плейсхолдеры {value} и {date}
@@ -67,18 +74,17 @@ async def handle_promo_code_input(message: Message):
         expiry_str = ""
         if duration_days:
             try:
-                from datetime import datetime, timedelta
                 expiry_date = datetime.now() + timedelta(days=int(duration_days))
                 expiry_str = expiry_date.strftime("%Y-%m-%d")
             except Exception:
                 expiry_str = ""
         elif expires_at:
-            expiry_str = expires_at.split("T")[0] if "T" in expires_at else expires_at
+            expiry_str = str(expires_at).split("T")[0].split(" ")[0]
         else:
             expiry_str = ""
 
         try:
-            text = message_template.format(value=value_str, date=expires_at.strftime("%d.%m.%Y"))
+            text = message_template.format(value=value_str, date=expiry_str)
         except Exception:
             # Если форматирование не удалось — отправим шаблон как есть
             text = message_template
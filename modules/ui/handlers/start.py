@@ -10,7 +10,7 @@ from modules.analytics.logger import action
 from ..keyboards.tracker import send_managed_message
 from config import FREE_PAGES_ON_REGISTER
 from modules.billing.services.promo import add_user_bonus_pages
-from db import get_connection
+from repositories import user_bonus
 
 router = Router()
 
@@ -34,13 +34,8 @@ async def handle_done(callback: CallbackQuery, state: FSMContext):
             # Check whether the user already exists in the bonus table.  We only
             # insert when there's no record at all (so we don't award free pages
             # again after they are consumed).
-            with get_connection() as conn:
-                row = conn.execute(
-                    "SELECT 1 FROM user_bonus WHERE user_id = ?",
-                    (user_id,)
-                ).fetchone()
-            if row is None:
-                add_user_bonus_pages(user_id, FREE_PAGES_ON_REGISTER)
+            if not await user_bonus.exists(user_id):
+                await add_user_bonus_pages(user_id, FREE_PAGES_ON_REGISTER)
                 
                 await callback.message.answer(
                     text=f"👋 Почему бы и нет? Лови <b>{FREE_PAGES_ON_REGISTER}</b> бесплатных страниц 🎁"
@@ -67,13 +62,8 @@ async def start_command(message: Message, state: FSMContext):
             # Check whether the user already exists in the bonus table.  We only
             # insert when there's no record at all (so we don't award free pages
             # again after they are consumed).
-            with get_connection() as conn:
-                row = conn.execute(
-                    "SELECT 1 FROM user_bonus WHERE user_id = ?",
-                    (user_id,)
-                ).fetchone()
-            if row is None:
-                add_user_bonus_pages(user_id, FREE_PAGES_ON_REGISTER)
+            if not await user_bonus.exists(user_id):
+                await add_user_bonus_pages(user_id, FREE_PAGES_ON_REGISTER)
                 
                 await message.answer(
                     text=f"👋 Почему бы и нет? Лови <b>{FREE_PAGES_ON_REGISTER}</b> бесплатных страниц 🎁"
@@ -38,12 +38,14 @@ def get_print_options_kb(duplex: bool) -> InlineKeyboardMarkup:
     )
     return markup
 
-def get_print_layouts_kb(selected_layout: str) -> InlineKeyboardMarkup:
+def get_print_layouts_kb(selected_layout: str, prices: dict[str, float] | None = None) -> InlineKeyboardMarkup:
     keyboard = []
     row = []
 
     for layout in LAYOUTS:
         layout_text = BUTTONS_LAYOUT.get(layout, "Unknown layout")
+        if prices and layout in prices:
+            layout_text = f"{layout_text} · {prices[layout]:.2f} руб."
         text = f"✅ {layout_text}" if layout == selected_layout else f"📄 {layout_text}"
 
         button = InlineKeyboardButton(
@@ -1,28 +1,134 @@
 # modules/ui/keyboard_tracker.py
 
-from db import get_connection
+import asyncio
+from collections import OrderedDict
+
+from repositories import active_keyboards
 from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import EditMessageCaption, EditMessageReplyMarkup, EditMessageText, TelegramMethod
 from aiogram.types import Message, InlineKeyboardMarkup
-from modules.analytics.logger import info
+from config import KEYBOARD_CACHE_SIZE, KEYBOARD_FLUSH_INTERVAL
+from modules.analytics.logger import info, error
+
+# Write-back кэш активных сообщений: user_id -> (message_id, has_markup).
+# None означает «в БД тоже ничего нет», чтобы не ходить туда повторно.
+# Изменения копятся в _dirty и сбрасываются в active_keyboards пачкой
+# (flush_active_messages), а не на каждое отправленное сообщение.
+# Кэш ограничен KEYBOARD_CACHE_SIZE: давно неактивные чистые записи
+# вытесняются (LRU), несохранённые — никогда.
+_active: OrderedDict[int, tuple[int, bool] | None] = OrderedDict()
+_dirty: set[int] = set()
+
+_EDIT_METHODS = (EditMessageText, EditMessageReplyMarkup, EditMessageCaption)
+
+
+def _remember(user_id: int, value: tuple[int, bool] | None) -> None:
+    _active[user_id] = value
+    _active.move_to_end(user_id)
+    _evict()
+
+
+def _evict() -> None:
+    excess = len(_active) - KEYBOARD_CACHE_SIZE
+    if excess <= 0:
+        return
+    for uid in [uid for uid in _active if uid not in _dirty][:excess]:
+        del _active[uid]
+
+
+async def _get_active(user_id: int) -> tuple[int, bool] | None:
+    if user_id in _active:
+        _active.move_to_end(user_id)
+        return _active[user_id]
+    row = await active_keyboards.get(user_id)
+    active = (row["message_id"], bool(row["has_markup"])) if row else None
+    _remember(user_id, active)
+    return active
+
+
+async def get_active_message_id(user_id: int) -> int | None:
+    active = await _get_active(user_id)
+    return active[0] if active else None
+
+
+async def update_active_message(user_id: int, message_id: int, has_markup: bool = True):
+    _dirty.add(user_id)
+    _remember(user_id, (message_id, has_markup))
 
-def get_active_message_id(user_id: int) -> int | None:
-    with get_connection() as conn:
-        cur = conn.execute(
-            "SELECT message_id FROM active_keyboards WHERE user_id = ?",
-            (user_id,)
+
+async def _track_edit(user_id: int, message_id: int, has_markup: bool) -> None:
+    active = await _get_active(user_id)
+    if active and active[0] == message_id and active[1] != has_markup:
+        await update_active_message(user_id, message_id, has_markup)
+
+
+class KeyboardTrackingMiddleware(BaseRequestMiddleware):
+    """
+    Session middleware: keeps ``has_markup`` of the tracked message in sync
+    with every successful edit, so a keyboard added by an edit is stripped
+    later and a removed one is not stripped again.
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ):
+        response = await make_request(bot, method)
+        if (
+            isinstance(method, _EDIT_METHODS)
+            and isinstance(method.chat_id, int)
+            and method.message_id is not None
+        ):
+            markup = method.reply_markup
+            await _track_edit(method.chat_id, method.message_id, bool(markup and markup.inline_keyboard))
+        return response
+
+
+async def flush_active_messages() -> None:
+    """Persist every changed entry to active_keyboards in one transaction."""
+    if not _dirty:
+        return
+    users = list(_dirty)
+    _dirty.clear()
+    rows = [(uid, *_active[uid]) for uid in users if _active.get(uid)]
+    try:
+        await active_keyboards.upsert_many(rows)
+    except Exception:
+        # Не потеряем изменения: попробуем в следующий раз.
+        _dirty.update(users)
+        raise
+    # Сохранённые записи снова можно вытеснять.
+    _evict()
+
+
+async def run_tracker_flusher(interval: float = KEYBOARD_FLUSH_INTERVAL) -> None:
+    """Background task: flush the tracker every ``interval`` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await flush_active_messages()
+        except Exception as e:
+            error(0, "keyboard_tracker", f"Failed to flush active keyboards: {e}")
+
+
+async def _strip_markup(bot: Bot, user_id: int, message_id: int) -> None:
+    try:
+        await bot.edit_message_reply_markup(
+            chat_id=user_id,
+            message_id=message_id,
+            reply_markup=None
         )
-        row = cur.fetchone()
-        return row["message_id"] if row else None
-
-def update_active_message(user_id: int, message_id: int):
-    with get_connection() as conn:
-        conn.execute("""
-            INSERT INTO active_keyboards(user_id, message_id)
-            VALUES(?, ?)
-            ON CONFLICT(user_id) DO UPDATE SET message_id = excluded.message_id
-        """, (user_id, message_id)
+        info(
+            user_id=user_id,
+            handler="keyboard_tracker",
+            msg="Old markup removed"
         )
-        conn.commit()
+    except Exception:
+        pass
+
 
 async def send_managed_message(
     bot: Bot,
@@ -31,34 +137,26 @@ async def send_managed_message(
     reply_markup: InlineKeyboardMarkup | None = None,
     parse_mode: str = "HTML"
 ) -> Message:
-    old_msg_id = get_active_message_id(user_id)
+    old = await _get_active(user_id)
 
-    if old_msg_id:
-        try:
-            await bot.edit_message_reply_markup(
-                chat_id=user_id,
-                message_id=old_msg_id,
-                reply_markup=None
-            )
-            info(
-                user_id=user_id,
-                handler="keyboard_tracker",
-                msg="Old markup removed"
-            )
-        except Exception:
-            pass
-        
-    new_msg = await bot.send_message(
+    send = bot.send_message(
         chat_id=user_id,
         text=text,
         reply_markup=reply_markup,
         parse_mode=parse_mode
     )
+    # Снимаем старую клавиатуру, только если у сообщения ещё есть кнопки,
+    # и делаем это параллельно с отправкой нового сообщения.
+    if old and old[1]:
+        new_msg, _ = await asyncio.gather(send, _strip_markup(bot, user_id, old[0]))
+    else:
+        new_msg = await send
     info(
         user_id=user_id,
         handler="keyboard_tracker",
         msg=f"Manage message sent: {text}"
     )
 
-    update_active_message(user_id, new_msg.message_id)
+    has_markup = bool(reply_markup and reply_markup.inline_keyboard)
+    await update_active_message(user_id, new_msg.message_id, has_markup)
     return new_msg
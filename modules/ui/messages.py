@@ -55,6 +55,8 @@ PRINT_OPTIONS_TEXT = """
 ⚙️ <b>Выбери опции:</b>
 """
 PRINT_START_TEXT = "🖨️ Печатаю <b>{file_name}</b>..."
+PRINT_PROGRESS_TEXT = "🖨️ Печатаю <b>{file_name}</b>: напечатано {done}/{total} стр."
+PRINT_SAVE_FAILURE_TEXT = "❌ Не удалось поставить файл в очередь. Попробуй подтвердить ещё раз"
 PRINT_QUEUE_TEXT = "📑 Файл <b>{file_name}</b> поставлен в очередь. Жди - скоро распечатаю..."
 PRINT_LAYOUT_SELECTION_TEXT = """
 📐 <b>Выбери макет печати:</b>
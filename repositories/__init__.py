@@ -0,0 +1,40 @@
+"""
+Async data-access layer.
+
+One module per table.  Every function is a coroutine that runs its query on
+the dedicated SQLite thread (see ``db.run_db``), so handlers can await it
+without blocking the event loop.  Services in ``modules/*/services`` build
+on top of these repositories; handlers should not talk to SQLite directly.
+"""
+
+from . import (
+    active_keyboards,
+    bans,
+    bot_state,
+    expenses,
+    paused_actions,
+    print_jobs,
+    print_queue,
+    promo_activations,
+    promos,
+    supplies,
+    user_bonus,
+    user_grants,
+    user_stats,
+)
+
+__all__ = [
+    "active_keyboards",
+    "bans",
+    "bot_state",
+    "expenses",
+    "paused_actions",
+    "print_jobs",
+    "print_queue",
+    "promo_activations",
+    "promos",
+    "supplies",
+    "user_bonus",
+    "user_grants",
+    "user_stats",
+]
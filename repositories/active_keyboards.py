@@ -0,0 +1,27 @@
+# repositories/active_keyboards.py
+
+import sqlite3
+from typing import Iterable
+
+import db
+
+
+async def get(user_id: int) -> sqlite3.Row | None:
+    return await db.fetchone(
+        "SELECT message_id, has_markup FROM active_keyboards WHERE user_id = ?",
+        (user_id,),
+    )
+
+
+async def upsert_many(rows: Iterable[tuple[int, int, bool]]) -> None:
+    """Store (user_id, message_id, has_markup) triples in one transaction."""
+    await db.executemany(
+        """
+        INSERT INTO active_keyboards(user_id, message_id, has_markup)
+        VALUES(?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET
+            message_id = excluded.message_id,
+            has_markup = excluded.has_markup
+        """,
+        [(user_id, message_id, int(has_markup)) for user_id, message_id, has_markup in rows],
+    )
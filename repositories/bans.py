@@ -0,0 +1,19 @@
+# repositories/bans.py
+
+import db
+
+
+async def add(user_id: int, reason: str) -> None:
+    await db.execute(
+        "INSERT OR REPLACE INTO bans(user_id, reason) VALUES(?, ?)",
+        (user_id, reason),
+    )
+
+
+async def remove(user_id: int) -> None:
+    await db.execute("DELETE FROM bans WHERE user_id = ?", (user_id,))
+
+
+async def all_ids() -> list[int]:
+    rows = await db.fetchall("SELECT user_id FROM bans")
+    return [row["user_id"] for row in rows]
@@ -0,0 +1,19 @@
+# repositories/bot_state.py
+
+import db
+
+
+async def get(key: str) -> str | None:
+    row = await db.fetchone("SELECT value FROM bot_state WHERE key = ?", (key,))
+    return row["value"] if row else None
+
+
+async def put(key: str, value: str) -> None:
+    await db.execute(
+        "INSERT OR REPLACE INTO bot_state(key, value) VALUES (?, ?)",
+        (key, value),
+    )
+
+
+async def delete(key: str) -> None:
+    await db.execute("DELETE FROM bot_state WHERE key = ?", (key,))
@@ -0,0 +1,24 @@
+# repositories/expenses.py
+
+import db
+
+
+async def add(category: str, amount: float, quantity: int = 1, note: str | None = None) -> None:
+    await db.execute(
+        """
+        INSERT INTO expenses (category, amount, quantity, note)
+        VALUES (?, ?, ?, ?)
+        """,
+        (category, amount, quantity, note),
+    )
+
+
+async def list_all() -> list[dict]:
+    rows = await db.fetchall(
+        """
+        SELECT id, category, amount, quantity, note, created_at
+        FROM expenses
+        ORDER BY created_at DESC
+        """
+    )
+    return [dict(row) for row in rows]
@@ -0,0 +1,25 @@
+# repositories/paused_actions.py
+
+import sqlite3
+
+import db
+
+
+async def add(user_id: int, action: str) -> None:
+    await db.execute(
+        "INSERT INTO paused_actions(user_id, action) VALUES (?, ?)",
+        (user_id, action),
+    )
+
+
+def _pop_all(conn: sqlite3.Connection) -> list[dict]:
+    rows = conn.execute(
+        "SELECT id, user_id, action FROM paused_actions ORDER BY created_at"
+    ).fetchall()
+    conn.execute("DELETE FROM paused_actions;")
+    return [dict(row) for row in rows]
+
+
+async def pop_all() -> list[dict]:
+    """Fetch and delete every queued action in one transaction."""
+    return await db.transaction(_pop_all)
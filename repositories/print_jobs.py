@@ -0,0 +1,111 @@
+# repositories/print_jobs.py
+
+import sqlite3
+from datetime import datetime
+
+import db
+from repositories import print_queue, user_stats
+
+
+async def insert(
+    user_id: int,
+    file_name: str,
+    page_count: int,
+    duplex: bool,
+    layout: str,
+    pages: str,
+    copies: int,
+    printed_pages: int,
+    price: float,
+    payment_method: str,
+    created_at: datetime,
+    file_path: str | None = None,
+) -> int:
+    """
+    Insert one row for a newly queued job and return its job_id.
+    With ``file_path`` the job is also put into print_queue atomically.
+    """
+    def _insert(conn: sqlite3.Connection) -> int:
+        cur = conn.execute(
+            """
+            INSERT INTO print_jobs (
+                user_id, file_name, page_count, duplex, layout, pages, copies,
+                printed_pages, price, payment_method, status, created_at
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'queued', ?)
+            """,
+            (
+                user_id, file_name, page_count, int(duplex), layout, pages, copies,
+                printed_pages, price, payment_method, created_at,
+            ),
+        )
+        if file_path is not None:
+            print_queue.add(conn, cur.lastrowid, file_path, created_at)
+        return cur.lastrowid
+
+    return await db.transaction(_insert)
+
+
+async def set_cups_job_ids(job_id: int, cups_job_ids: list[str]) -> None:
+    await db.execute(
+        "UPDATE print_jobs SET cups_job_ids = ? WHERE job_id = ?",
+        (",".join(cups_job_ids), job_id),
+    )
+
+
+def _finish_chunk(conn: sqlite3.Connection, job_id: int, chunks_done: int) -> None:
+    conn.execute("UPDATE print_jobs SET cups_job_ids = '' WHERE job_id = ?", (job_id,))
+    print_queue.set_chunks_done(conn, job_id, chunks_done)
+
+
+async def finish_chunk(job_id: int, chunks_done: int) -> None:
+    """Record that ``chunks_done`` parts are printed and none is in CUPS now."""
+    await db.transaction(_finish_chunk, job_id, chunks_done)
+
+
+def _mark_printing(conn: sqlite3.Connection, job_id: int, started_at: datetime) -> None:
+    conn.execute(
+        "UPDATE print_jobs SET status = 'printing', started_at = ? WHERE job_id = ? AND status = 'queued'",
+        (started_at, job_id),
+    )
+    print_queue.set_state(conn, job_id, "printing")
+
+
+async def mark_printing(job_id: int, started_at: datetime) -> None:
+    await db.transaction(_mark_printing, job_id, started_at)
+
+
+def _update_status(
+    conn: sqlite3.Connection, job_id: int, status: str, completed_at: datetime
+) -> None:
+    row = conn.execute(
+        """
+        UPDATE print_jobs SET status = ?, completed_at = ?
+        WHERE job_id = ? AND status != 'done'
+        RETURNING user_id, printed_pages
+        """,
+        (status, completed_at, job_id),
+    ).fetchone()
+    if row is not None and status == "done":
+        user_stats.record_done(conn, row["user_id"], row["printed_pages"] or 0, completed_at)
+    if status in ("done", "error", "cancelled"):
+        print_queue.remove(conn, job_id)
+
+
+async def update_status(job_id: int, status: str, completed_at: datetime) -> None:
+    """
+    Update the job status; completing it also updates user_stats and a
+    finished job leaves print_queue, both atomically.
+    """
+    await db.transaction(_update_status, job_id, status, completed_at)
+
+
+async def list_for_user(user_id: int) -> list[sqlite3.Row]:
+    return await db.fetchall(
+        """
+        SELECT file_name, page_count, pages, copies, printed_pages, created_at, status
+        FROM print_jobs
+        WHERE user_id = ?
+        ORDER BY created_at DESC
+        """,
+        (user_id,),
+    )
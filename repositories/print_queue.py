@@ -0,0 +1,58 @@
+# repositories/print_queue.py
+
+import sqlite3
+from datetime import datetime
+
+import db
+
+
+def add(conn: sqlite3.Connection, job_id: int, file_path: str, enqueued_at: datetime) -> None:
+    """Put a job into the queue; called inside the transaction that creates it."""
+    conn.execute(
+        "INSERT INTO print_queue (job_id, file_path, enqueued_at) VALUES (?, ?, ?)",
+        (job_id, file_path, enqueued_at),
+    )
+
+
+def remove(conn: sqlite3.Connection, job_id: int) -> None:
+    conn.execute("DELETE FROM print_queue WHERE job_id = ?", (job_id,))
+
+
+def set_state(conn: sqlite3.Connection, job_id: int, state: str) -> None:
+    conn.execute("UPDATE print_queue SET state = ? WHERE job_id = ?", (state, job_id))
+
+
+async def set_message_id(job_id: int, message_id: int) -> None:
+    await db.execute(
+        "UPDATE print_queue SET message_id = ? WHERE job_id = ?",
+        (message_id, job_id),
+    )
+
+
+def set_chunks_done(conn: sqlite3.Connection, job_id: int, chunks_done: int) -> None:
+    conn.execute("UPDATE print_queue SET chunks_done = ? WHERE job_id = ?", (chunks_done, job_id))
+
+
+async def requeue(job_id: int) -> None:
+    """Return an interrupted job to the waiting state."""
+    await db.execute(
+        "UPDATE print_queue SET state = 'queued' WHERE job_id = ?",
+        (job_id,),
+    )
+
+
+async def pending() -> list[sqlite3.Row]:
+    """
+    Every job still in the queue with the options needed to print it;
+    jobs that were printing come first, the rest in arrival order.
+    """
+    return await db.fetchall(
+        """
+        SELECT q.job_id, q.file_path, q.state, q.message_id, q.enqueued_at, q.chunks_done,
+               j.user_id, j.file_name, j.page_count, j.duplex, j.layout,
+               j.pages, j.copies, j.price, j.payment_method, j.cups_job_ids
+        FROM print_queue q
+        JOIN print_jobs j USING(job_id)
+        ORDER BY q.state = 'printing' DESC, q.job_id
+        """
+    )
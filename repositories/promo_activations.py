@@ -0,0 +1,113 @@
+# repositories/promo_activations.py
+
+import sqlite3
+
+import db
+
+
+def _record(conn: sqlite3.Connection, user_id: int, code: str) -> None:
+    conn.execute(
+        "INSERT INTO promo_activations(user_id, code) VALUES(?, ?)",
+        (user_id, code),
+    )
+    conn.execute(
+        "UPDATE promos SET activations_used = activations_used + 1 WHERE code = ?",
+        (code,),
+    )
+
+
+async def record(user_id: int, code: str) -> None:
+    """Store the activation and bump the promo counter in one transaction."""
+    await db.transaction(_record, user_id, code)
+
+
+def _activate(conn: sqlite3.Connection, user_id: int, code: str) -> tuple[str, dict | None]:
+    # Условный UPDATE и есть проверка: счётчик растёт, только если промокод
+    # жив, не исчерпан и ещё не активирован этим пользователем.  Под
+    # блокировкой записи SQLite activations_used не может превысить
+    # activations_total, сколько бы пользователей ни вводили код одновременно.
+    promo = conn.execute(
+        """
+        UPDATE promos
+        SET activations_used = activations_used + 1
+        WHERE code = ?
+          AND activations_used < activations_total
+          AND (expires_at IS NULL OR expires_at > datetime('now'))
+          AND NOT EXISTS (
+              SELECT 1 FROM promo_activations WHERE user_id = ? AND code = promos.code
+          )
+        RETURNING code, reward_type, reward_value, expires_at, duration_days, message_template
+        """,
+        (code, user_id),
+    ).fetchone()
+
+    if promo is not None:
+        conn.execute(
+            "INSERT INTO promo_activations(user_id, code) VALUES(?, ?)",
+            (user_id, code),
+        )
+        if promo["reward_type"] == "pages":
+            pages = int(promo["reward_value"])
+            conn.execute(
+                """
+                INSERT INTO user_bonus(user_id, bonus_pages)
+                VALUES (?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET bonus_pages = bonus_pages + ?
+                """,
+                (user_id, pages, pages),
+            )
+        return "ok", dict(promo)
+
+    # Не получилось — выясняем почему, в той же транзакции.
+    row = conn.execute(
+        """
+        SELECT
+            EXISTS (SELECT 1 FROM promo_activations WHERE user_id = ? AND code = p.code) AS used,
+            p.activations_used >= p.activations_total AS exhausted
+        FROM promos p
+        WHERE p.code = ?
+        """,
+        (user_id, code),
+    ).fetchone()
+    if row is None:
+        return "unknown", None
+    if row["used"]:
+        return "already_used", None
+    if row["exhausted"]:
+        return "exhausted", None
+    return "expired", None
+
+
+async def activate(user_id: int, code: str) -> tuple[str, dict | None]:
+    """
+    Activate ``code`` for the user in one transaction.
+
+    Returns ``(outcome, promo)`` where outcome is one of "ok",
+    "already_used", "exhausted", "expired", "unknown"; promo is the promo
+    row (reward, template, expiry) only when the outcome is "ok".  Page
+    rewards are credited to user_bonus in the same transaction.
+    """
+    return await db.transaction(_activate, user_id, code)
+
+
+async def exists(user_id: int, code: str) -> bool:
+    row = await db.fetchone(
+        "SELECT 1 FROM promo_activations WHERE user_id = ? AND code = ?",
+        (user_id, code),
+    )
+    return row is not None
+
+
+async def active_for_user(user_id: int, now_iso: str) -> list[sqlite3.Row]:
+    """Activated promos of the user whose global expiry has not passed."""
+    return await db.fetchall(
+        """
+        SELECT p.code, p.reward_type, p.reward_value, p.duration_days, pa.activated_at
+        FROM promos p
+        JOIN promo_activations pa USING(code)
+        WHERE pa.user_id = ?
+          AND (p.expires_at IS NULL OR p.expires_at > ?)
+          AND p.activations_used <= p.activations_total
+        """,
+        (user_id, now_iso),
+    )
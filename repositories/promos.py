@@ -0,0 +1,81 @@
+# repositories/promos.py
+
+import db
+
+
+async def create(
+    code: str,
+    activations_total: int,
+    reward_type: str,
+    reward_value: float,
+    expires_at: str | None = None,
+    duration_days: int | None = None,
+    message_template: str | None = None,
+) -> None:
+    await db.execute(
+        """
+        INSERT INTO promos (
+            code, activations_total, reward_type, reward_value,
+            expires_at, duration_days, message_template
+        )
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+        """,
+        (code, activations_total, reward_type, reward_value, expires_at, duration_days, message_template),
+    )
+
+
+async def list_all() -> list[dict]:
+    rows = await db.fetchall(
+        """
+        SELECT code, activations_total, activations_used, reward_type, reward_value,
+               expires_at, duration_days, message_template, created_at
+        FROM promos
+        ORDER BY created_at DESC
+        """
+    )
+    return [dict(row) for row in rows]
+
+
+async def get(code: str) -> dict | None:
+    row = await db.fetchone(
+        """
+        SELECT code, activations_total, activations_used, reward_type, reward_value,
+               created_at, expires_at, duration_days, message_template
+        FROM promos
+        WHERE code = ?
+        """,
+        (code,),
+    )
+    return dict(row) if row else None
+
+
+async def exists(code: str) -> bool:
+    row = await db.fetchone("SELECT 1 FROM promos WHERE code = ?", (code,))
+    return row is not None
+
+
+async def can_be_activated(code: str) -> bool:
+    row = await db.fetchone(
+        """
+        SELECT 1
+        FROM promos
+        WHERE code = ?
+          AND (expires_at IS NULL OR expires_at > datetime('now'))
+          AND activations_used < activations_total
+        """,
+        (code,),
+    )
+    return row is not None
+
+
+async def index_rows() -> list[dict]:
+    """Codes with their expiry (as text) and whether they are used up."""
+    rows = await db.fetchall(
+        """
+        SELECT code,
+               CAST(expires_at AS TEXT) AS expires_at,
+               activations_used >= activations_total AS exhausted
+        FROM promos
+        """
+    )
+    return [dict(row) for row in rows]
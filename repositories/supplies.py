@@ -0,0 +1,80 @@
+# repositories/supplies.py
+
+import sqlite3
+
+import db
+
+
+async def list_all() -> list[dict]:
+    rows = await db.fetchall(
+        """
+        SELECT name, quantity, minimum, updated_at
+        FROM supplies
+        ORDER BY name
+        """
+    )
+    return [dict(row) for row in rows]
+
+
+async def set_quantity(name: str, quantity: float) -> None:
+    await db.execute(
+        """
+        INSERT INTO supplies (name, quantity, updated_at)
+        VALUES (?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(name) DO UPDATE SET
+            quantity = excluded.quantity,
+            updated_at = excluded.updated_at
+        """,
+        (name, quantity),
+    )
+
+
+def _consume(conn: sqlite3.Connection, name: str, quantity: int) -> sqlite3.Row | None:
+    conn.execute(
+        """
+        UPDATE supplies
+        SET quantity = quantity - ?,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE name = ?
+        """,
+        (quantity, name),
+    )
+    return conn.execute(
+        "SELECT quantity, minimum FROM supplies WHERE name = ?",
+        (name,),
+    ).fetchone()
+
+
+async def consume(name: str, quantity: int) -> sqlite3.Row | None:
+    """Decrease the stock and return the resulting (quantity, minimum) row."""
+    return await db.transaction(_consume, name, quantity)
+
+
+def _refill(
+    conn: sqlite3.Connection, name: str, quantity: int, minimum: int | None
+) -> sqlite3.Row | None:
+    row = conn.execute(
+        "SELECT quantity, minimum FROM supplies WHERE name = ?",
+        (name,),
+    ).fetchone()
+    if row:
+        new_minimum = minimum if minimum is not None else row["minimum"]
+        conn.execute(
+            "UPDATE supplies SET quantity = ?, minimum = ?, updated_at = CURRENT_TIMESTAMP WHERE name = ?",
+            (quantity, new_minimum, name),
+        )
+    else:
+        conn.execute(
+            "INSERT INTO supplies (name, quantity, minimum, updated_at) VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+            (name, quantity, minimum if minimum is not None else 0),
+        )
+    return row
+
+
+async def refill(name: str, quantity: int, minimum: int | None = None) -> sqlite3.Row | None:
+    """
+    Set the stock of a supply, creating it if needed.
+
+    Returns the previous (quantity, minimum) row, or None for a new supply.
+    """
+    return await db.transaction(_refill, name, quantity, minimum)
@@ -0,0 +1,46 @@
+# repositories/user_bonus.py
+
+import db
+
+
+async def get_pages(user_id: int) -> int:
+    row = await db.fetchone(
+        "SELECT bonus_pages FROM user_bonus WHERE user_id = ?",
+        (user_id,),
+    )
+    return row["bonus_pages"] if row else 0
+
+
+async def exists(user_id: int) -> bool:
+    row = await db.fetchone("SELECT 1 FROM user_bonus WHERE user_id = ?", (user_id,))
+    return row is not None
+
+
+async def add_pages(user_id: int, pages: int) -> None:
+    await db.execute(
+        """
+        INSERT INTO user_bonus(user_id, bonus_pages)
+        VALUES (?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET bonus_pages = bonus_pages + ?
+        """,
+        (user_id, pages, pages),
+    )
+
+
+async def consume_pages(user_id: int, pages: int) -> None:
+    await db.execute(
+        "UPDATE user_bonus SET bonus_pages = bonus_pages - ? WHERE user_id = ?",
+        (pages, user_id),
+    )
+
+
+async def add_pages_many(user_ids: list[int], pages: int) -> None:
+    """Credit ``pages`` to every user in one transaction."""
+    await db.executemany(
+        """
+        INSERT INTO user_bonus(user_id, bonus_pages)
+        VALUES (?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET bonus_pages = bonus_pages + excluded.bonus_pages
+        """,
+        ((user_id, pages) for user_id in user_ids),
+    )
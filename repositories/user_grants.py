@@ -0,0 +1,35 @@
+# repositories/user_grants.py
+
+import sqlite3
+from datetime import datetime
+
+import db
+
+
+async def add_many(
+    user_ids: list[int],
+    grant_type: str,
+    value: float,
+    expires_at: datetime | None = None,
+    source: str | None = None,
+) -> None:
+    """Give the same grant to every user in one transaction."""
+    await db.executemany(
+        """
+        INSERT INTO user_grants (user_id, grant_type, value, expires_at, source)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        ((user_id, grant_type, value, expires_at, source) for user_id in user_ids),
+    )
+
+
+async def active_for_user(user_id: int, now: datetime) -> list[sqlite3.Row]:
+    """Grants of the user that have not expired at ``now``."""
+    return await db.fetchall(
+        """
+        SELECT grant_type, value, expires_at, source
+        FROM user_grants
+        WHERE user_id = ? AND (expires_at IS NULL OR expires_at > ?)
+        """,
+        (user_id, now),
+    )
@@ -0,0 +1,46 @@
+# repositories/user_stats.py
+
+import sqlite3
+from datetime import datetime
+
+import db
+
+
+def record_done(
+    conn: sqlite3.Connection,
+    user_id: int,
+    printed_pages: int,
+    completed_at: datetime,
+) -> None:
+    """
+    Add a freshly completed job to the user's totals.
+
+    Must be called on the connection and inside the transaction that marks
+    the job as done, so totals never drift from print_jobs.
+    """
+    conn.execute(
+        """
+        INSERT INTO user_stats (user_id, total_pages, job_count, last_job_at)
+        VALUES (?, ?, 1, ?)
+        ON CONFLICT(user_id) DO UPDATE SET
+            total_pages = total_pages + excluded.total_pages,
+            job_count   = job_count + 1,
+            last_job_at = MAX(COALESCE(last_job_at, excluded.last_job_at), excluded.last_job_at)
+        """,
+        (user_id, printed_pages, completed_at),
+    )
+
+
+async def get(user_id: int) -> sqlite3.Row | None:
+    return await db.fetchone(
+        "SELECT total_pages, job_count, last_job_at FROM user_stats WHERE user_id = ?",
+        (user_id,),
+    )
+
+
+async def total_pages(user_id: int) -> int:
+    row = await db.fetchone(
+        "SELECT total_pages FROM user_stats WHERE user_id = ?",
+        (user_id,),
+    )
+    return row["total_pages"] if row else 0
@@ -0,0 +1,48 @@
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Тесты импортируют модули бота так же, как bot.py — от корня репозитория.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+
+import db
+
+
+@pytest.fixture
+def memory_db():
+    """Fresh in-memory database with the current schema."""
+    db.use_memory_database()
+    db.init_db()
+    yield
+    db.close_connections()
+
+
+@pytest.fixture
+def make_job():
+    """
+    Factory for PrintJob objects without a bot.  ``waited`` puts
+    enqueued_at that many seconds before ``now``.
+    """
+    # Импорт здесь: print_job тянет aiogram, а он нужен не всем тестам.
+    from modules.printing.print_job import PrintJob
+
+    def make(
+        page_count: int = 1,
+        name: str = "source",
+        user_id: int = 1,
+        waited: float = 0.0,
+        now: datetime | None = None,
+        **fields,
+    ) -> "PrintJob":
+        return PrintJob(
+            user_id=user_id,
+            file_path=f"/tmp/{name}.pdf",
+            file_name=name,
+            bot=None,
+            page_count=page_count,
+            enqueued_at=(now or datetime.now()) - timedelta(seconds=waited),
+            **fields,
+        )
+    return make
@@ -0,0 +1,90 @@
+import pytest
+
+from modules.printing import print_job
+
+
+@pytest.fixture
+def chunk_pages(monkeypatch):
+    def set_size(size: int) -> None:
+        monkeypatch.setattr(print_job, "PRINT_CHUNK_PAGES", size)
+    return set_size
+
+
+def test_whole_job_without_chunking(chunk_pages, make_job):
+    chunk_pages(0)
+    assert make_job(500, copies=2).chunk_plan() == [([(1, 500)], 2, 1000)]
+
+
+def test_small_job_is_one_part(chunk_pages, make_job):
+    chunk_pages(100)
+    assert make_job(40, pages="1-10,21-40", copies=2).chunk_plan() == [([(1, 10), (21, 40)], 2, 60)]
+
+
+def test_copies_are_grouped_whole(chunk_pages, make_job):
+    chunk_pages(100)
+    plan = make_job(30, copies=7).chunk_plan()
+    assert plan == [([(1, 30)], 3, 90), ([(1, 30)], 3, 90), ([(1, 30)], 1, 30)]
+
+
+def test_simplex_splits_on_page_count(chunk_pages, make_job):
+    chunk_pages(100)
+    plan = make_job(250).chunk_plan()
+    assert [ranges for ranges, _, _ in plan] == [[(1, 100)], [(101, 200)], [(201, 250)]]
+
+
+@pytest.mark.parametrize("duplex, layout, step", [
+    (True, "1", 100),   # 2 стороны на лист
+    (True, "2", 100),   # 4 страницы на лист
+    (False, "4", 100),
+    (True, "4", 96),    # 8 страниц на лист: 100 -> 96
+    (True, "9", 90),    # 18 страниц на лист
+])
+def test_parts_end_on_sheet_boundary(chunk_pages, duplex, layout, step, make_job):
+    chunk_pages(100)
+    j = make_job(250, duplex=duplex, layout=layout)
+    sheet = int(layout) * (2 if duplex else 1)
+    plan = j.chunk_plan()
+    assert all(pages % sheet == 0 for _, _, pages in plan[:-1])
+    assert all(pages == step for _, _, pages in plan[:-1])
+    assert j.pages_total == 250
+
+
+def test_each_copy_is_split_separately(chunk_pages, make_job):
+    chunk_pages(100)
+    plan = make_job(150, pages="1-75,101-150", copies=2, duplex=True, layout="2").chunk_plan()
+    assert plan == [
+        ([(1, 75), (101, 125)], 1, 100), ([(126, 150)], 1, 25),
+        ([(1, 75), (101, 125)], 1, 100), ([(126, 150)], 1, 25),
+    ]
+
+
+def test_chunks_left_counts_unsent_parts(chunk_pages, make_job):
+    chunk_pages(100)
+    j = make_job(250)
+    assert j.chunks_left == 3
+    j.cups_job_ids = ["7"]
+    assert j.chunks_left == 2
+    j.chunks_done, j.cups_job_ids = 2, []
+    assert j.chunks_left == 1
+
+
+@pytest.mark.parametrize("duplex, layout", [(True, "2"), (True, "4"), (False, "2")])
+def test_parts_impose_to_the_same_sheets(tmp_path, chunk_pages, duplex, layout, make_job):
+    fitz = pytest.importorskip("fitz")
+    from modules.printing.imposition import impose
+
+    src = tmp_path / "source.pdf"
+    doc = fitz.open()
+    for _ in range(37):
+        doc.new_page(width=595, height=842)
+    doc.save(src)
+    doc.close()
+
+    chunk_pages(10)
+    j = make_job(37, copies=2, duplex=duplex, layout=layout)
+    parts = sum(
+        impose(str(src), str(tmp_path / f"part{i}.pdf"), ranges, int(layout), copies, duplex)
+        for i, (ranges, copies, _) in enumerate(j.chunk_plan())
+    )
+    whole = impose(str(src), str(tmp_path / "whole.pdf"), [(1, 37)], int(layout), 2, duplex)
+    assert parts == whole
@@ -0,0 +1,33 @@
+import asyncio
+import os
+
+import pytest
+
+from modules.printing import cups_client
+from modules.printing.cups_client import JOB_COMPLETED, JOB_PROCESSING, JOB_UNKNOWN
+
+
+def fake_lpstat(tmp_path, monkeypatch, script: str) -> None:
+    """Put an ``lpstat`` shell script first on PATH."""
+    lpstat = tmp_path / "lpstat"
+    lpstat.write_text("#!/bin/sh\n" + script)
+    lpstat.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+
+def test_lp_backend_reads_lpstat(tmp_path, monkeypatch):
+    fake_lpstat(tmp_path, monkeypatch, (
+        'case "$2" in\n'
+        '  not-completed) echo "Office-12 user 1024 date" ;;\n'
+        '  completed) echo "Office-123 user 1024 date" ;;\n'
+        'esac\n'
+    ))
+    states = asyncio.run(cups_client.LpBackend().job_states([12, 123, 7]))
+    assert states == {12: (JOB_PROCESSING, None), 123: (JOB_COMPLETED, None), 7: (JOB_UNKNOWN, None)}
+
+
+def test_lp_backend_raises_when_lpstat_fails(tmp_path, monkeypatch):
+    # cupsd не запущен: пустой вывод — не «заданий нет», а ошибка.
+    fake_lpstat(tmp_path, monkeypatch, 'echo "lpstat: Bad file descriptor" >&2\nexit 1\n')
+    with pytest.raises(RuntimeError, match="Bad file descriptor"):
+        asyncio.run(cups_client.LpBackend().job_states([12]))
@@ -0,0 +1,65 @@
+import pytest
+
+from utils.page_ranges import PageRangeSet
+
+
+def test_from_string_merges_overlapping_and_adjacent():
+    pages = PageRangeSet.from_string("5-7, 1-3,4,10,9")
+    assert pages.ranges == ((1, 7), (9, 10))
+    assert str(pages) == "1-7,9-10"
+    assert len(pages) == 9
+
+
+def test_canonical_form_round_trips():
+    for text in ("1", "1-3,5,7-9", "2,4,6"):
+        assert str(PageRangeSet.from_string(text)) == text
+        assert PageRangeSet.from_string(str(PageRangeSet.from_string(text))) == PageRangeSet.from_string(text)
+
+
+def test_reversed_range_is_empty():
+    assert not PageRangeSet.from_string("5-3")
+
+
+@pytest.mark.parametrize("text, max_pages, message", [
+    ("", 10, "Пустой ввод"),
+    ("0", 10, "Неверный номер страницы"),
+    ("11", 10, "Неверный номер страницы"),
+    ("3-1", 10, "Неверный диапазон"),
+    ("1-11", 10, "Диапазон вне допустимого"),
+    ("1-a", 10, "Неправильный формат"),
+])
+def test_parse_rejects_bad_input(text, max_pages, message):
+    with pytest.raises(ValueError, match=message):
+        PageRangeSet.parse(text, max_pages)
+
+
+def test_parse_applies_offset():
+    assert str(PageRangeSet.parse("3-5", max_pages=10, offset=2)) == "1-3"
+
+
+def test_membership_and_intersection():
+    pages = PageRangeSet.from_string("1-5,10-20")
+    assert 1 in pages and 15 in pages
+    assert 7 not in pages and 21 not in pages
+    assert str(pages & PageRangeSet.from_string("4-12")) == "4-5,10-12"
+    assert str(pages.clip(12)) == "1-5,10-12"
+
+
+def test_large_range_is_one_interval():
+    pages = PageRangeSet.from_string("1-1000000")
+    assert pages.ranges == ((1, 1000000),)
+    assert len(pages) == 1000000
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 4, 7, 100])
+def test_split_covers_pages_in_order(size):
+    pages = PageRangeSet.from_string("1-5,8,10-14")
+    pieces = pages.split(size)
+    assert [p for piece in pieces for p in piece] == list(pages)
+    assert all(len(piece) == size for piece in pieces[:-1])
+    assert 0 < len(pieces[-1]) <= size
+
+
+def test_split_examples():
+    assert [str(p) for p in PageRangeSet.from_string("1-5,8,10-14").split(4)] == ["1-4", "5,8,10-11", "12-14"]
+    assert PageRangeSet().split(3) == []
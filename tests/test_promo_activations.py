@@ -0,0 +1,45 @@
+import asyncio
+
+import db
+from repositories import promo_activations, promos
+
+
+async def _activate_concurrently(code: str, users: range) -> list[str]:
+    await promos.create(code, activations_total=10, reward_type="pages", reward_value=5)
+    results = await asyncio.gather(*(promo_activations.activate(uid, code) for uid in users))
+    return [outcome for outcome, _ in results]
+
+
+def test_concurrent_activations_never_exceed_total(memory_db):
+    outcomes = asyncio.run(_activate_concurrently("RUSH", range(1, 51)))
+
+    assert outcomes.count("ok") == 10
+    assert outcomes.count("exhausted") == 40
+    row = asyncio.run(db.fetchone("SELECT activations_used FROM promos WHERE code = 'RUSH'"))
+    assert row["activations_used"] == 10
+    row = asyncio.run(db.fetchone("SELECT COUNT(*) AS n, SUM(bonus_pages) AS pages FROM user_bonus"))
+    assert (row["n"], row["pages"]) == (10, 50)
+
+
+def test_same_user_activates_once(memory_db):
+    async def scenario():
+        await promos.create("ONCE", activations_total=10, reward_type="pages", reward_value=1)
+        return await asyncio.gather(*(promo_activations.activate(7, "ONCE") for _ in range(5)))
+
+    outcomes = [outcome for outcome, _ in asyncio.run(scenario())]
+    assert outcomes.count("ok") == 1
+    assert outcomes.count("already_used") == 4
+
+
+def test_activate_reports_why_it_failed(memory_db):
+    async def scenario():
+        await promos.create("OLD", activations_total=5, reward_type="pages", reward_value=1,
+                            expires_at="2000-01-01 00:00:00")
+        return (
+            await promo_activations.activate(1, "MISSING"),
+            await promo_activations.activate(1, "OLD"),
+        )
+
+    missing, expired = asyncio.run(scenario())
+    assert missing == ("unknown", None)
+    assert expired == ("expired", None)
@@ -0,0 +1,134 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+import db
+from modules.printing import cups_client, print_service
+from modules.printing.cups_client import JOB_ABORTED, JOB_CANCELED, JOB_COMPLETED, JOB_PROCESSING
+from modules.printing.print_job import PrintJob
+from repositories import print_jobs
+
+
+class DownBackend(cups_client.FakeBackend):
+    async def job_states(self, job_ids):
+        raise RuntimeError("cups is down")
+
+
+@pytest.fixture
+def recovery(memory_db, monkeypatch, tmp_path):
+    """Recovery with a fake CUPS; collects user and admin messages."""
+    sent = {"users": [], "admins": []}
+
+    async def send_managed_message(bot, user_id, text, kb):
+        sent["users"].append((user_id, text))
+
+    async def notify_admins(bot, text):
+        sent["admins"].append(text)
+
+    async def noop():
+        pass
+
+    monkeypatch.setattr(print_service, "print_queue", print_service.deque())
+    monkeypatch.setattr(print_service, "_start_worker", lambda: None)
+    monkeypatch.setattr(print_service, "update_queue_messages", noop)
+    monkeypatch.setattr(print_service, "send_managed_message", send_managed_message)
+    monkeypatch.setattr(print_service, "notify_admins", notify_admins)
+    src = tmp_path / "source.pdf"
+    src.write_bytes(b"%PDF-1.4\n")
+    yield str(src), sent
+    cups_client.set_backend(None)
+
+
+async def _queue_sent_jobs(src: str, names: list[str]) -> None:
+    """Queue one job per name as printing in CUPS: job i has CUPS id i."""
+    for cups_id, name in enumerate(names, start=1):
+        job = PrintJob(user_id=cups_id, file_path=src, file_name=name, bot=None, page_count=3)
+        await job.save_to_db()
+        await print_jobs.mark_printing(job.db_id, datetime.now())
+        await print_jobs.set_cups_job_ids(job.db_id, [str(cups_id)])
+
+
+async def _status(name: str) -> str:
+    row = await db.fetchone("SELECT status FROM print_jobs WHERE file_name = ?", (name,))
+    return row["status"]
+
+
+def test_recovery_reconciles_with_cups(recovery):
+    src, sent = recovery
+    fake = cups_client.FakeBackend()
+    cups_client.set_backend(fake)
+    fake.states = {
+        1: (JOB_PROCESSING, 1),
+        2: (JOB_COMPLETED, 3),
+        3: (JOB_CANCELED, None),
+        4: (JOB_ABORTED, None),
+        # 5 CUPS не знает
+    }
+
+    async def scenario():
+        await _queue_sent_jobs(src, ["printing", "printed", "canceled", "aborted", "lost"])
+        recovered = await print_service.recover_queue(None)
+        return recovered, await _status("printed")
+
+    recovered, printed_status = asyncio.run(scenario())
+
+    queue = {job.file_name: job.cups_job_ids for job in print_service.print_queue}
+    assert recovered == 4
+    # Печатающееся ждём без повторной отправки, остальное отправляем заново.
+    assert queue == {"printing": ["1"], "canceled": [], "aborted": [], "lost": []}
+    assert printed_status == "done"
+    assert len(sent["admins"]) == 1
+    assert fake.submitted == []
+
+
+def test_recovery_never_resubmits_when_cups_is_down(recovery):
+    src, sent = recovery
+    cups_client.set_backend(DownBackend())
+
+    async def scenario():
+        await _queue_sent_jobs(src, ["first", "second"])
+        return await print_service.recover_queue(None)
+
+    assert asyncio.run(scenario()) == 2
+    assert [job.cups_job_ids for job in print_service.print_queue] == [["1"], ["2"]]
+    assert len(sent["admins"]) == 1
+    assert "повторно не отправляю" in sent["admins"][0]
+
+
+def test_recovery_fails_jobs_without_file(recovery):
+    src, sent = recovery
+    cups_client.set_backend(cups_client.FakeBackend())
+
+    async def scenario():
+        job = PrintJob(user_id=9, file_path=src + ".gone", file_name="gone", bot=None, page_count=1)
+        await job.save_to_db()
+        recovered = await print_service.recover_queue(None)
+        return recovered, await _status("gone")
+
+    assert asyncio.run(scenario()) == (0, "error")
+    assert sent["users"] and sent["users"][0][0] == 9
+
+
+def test_cancel_recovered_job_cancels_it_in_cups(recovery):
+    src, sent = recovery
+    fake = cups_client.FakeBackend()
+    cups_client.set_backend(fake)
+    fake.states = {1: (JOB_PROCESSING, 0), 2: (JOB_PROCESSING, 0)}
+
+    async def scenario():
+        await _queue_sent_jobs(src, ["single", "batch_a", "batch_b"])
+        # Пачка: два задания в одном задании CUPS с номером 2.
+        await db.execute("UPDATE print_jobs SET cups_job_ids = '2' WHERE cups_job_ids = '3'")
+        await print_service.recover_queue(None)
+        jobs = {job.file_name: job for job in print_service.print_queue}
+        single = await print_service.cancel_job(jobs["single"])
+        batch = await print_service.cancel_job(jobs["batch_a"])
+        return single, batch, await _status("single")
+
+    single, batch, status = asyncio.run(scenario())
+    assert (single, status) == (True, "cancelled")
+    assert fake.states[1][0] == JOB_CANCELED
+    # После рестарта задание пачки нельзя снять отдельно от остальных.
+    assert batch is False
+    assert fake.states[2][0] == JOB_PROCESSING
@@ -0,0 +1,123 @@
+from datetime import datetime
+
+import pytest
+
+from modules.printing import print_service
+from modules.printing.scheduler import (
+    FairShareScheduler,
+    FifoScheduler,
+    SjfScheduler,
+    get_scheduler,
+    set_scheduler,
+)
+
+NOW = datetime(2026, 1, 1, 12, 0, 0)
+
+
+@pytest.fixture
+def job(make_job):
+    """make_job with the scheduler tests' argument order and clock."""
+    def make(name: str, pages: int, user_id: int = 1, waited: float = 0.0, **fields):
+        return make_job(pages, name, user_id, waited, now=NOW, **fields)
+    return make
+
+
+def names(jobs) -> list[str]:
+    return [j.file_name for j in jobs]
+
+
+def test_fifo_keeps_arrival_order(job):
+    jobs = [job("a", 100), job("b", 1), job("c", 10)]
+    assert names(FifoScheduler().order(jobs, now=NOW)) == ["a", "b", "c"]
+
+
+def test_sjf_prints_short_jobs_first(job):
+    jobs = [job("big", 100), job("small", 1), job("mid", 10), job("mid2", 5, copies=2)]
+    # Равные по размеру задания остаются в порядке поступления.
+    assert names(SjfScheduler(aging=0).order(jobs, now=NOW)) == ["small", "mid", "mid2", "big"]
+
+
+def test_sjf_aging_lets_long_jobs_through(job):
+    # 100 страниц, ждёт 200 с при aging 0.5 -> приоритет 0, раньше свежего 1-страничного.
+    jobs = [job("fresh", 1), job("old_big", 100, waited=200)]
+    assert names(SjfScheduler(aging=0.5).order(jobs, now=NOW)) == ["old_big", "fresh"]
+    # Ждёт меньше — ещё пропускает короткое.
+    jobs = [job("fresh", 1), job("old_big", 100, waited=100)]
+    assert names(SjfScheduler(aging=0.5).order(jobs, now=NOW)) == ["fresh", "old_big"]
+
+
+def test_fair_share_interleaves_users(job):
+    jobs = [job("a1", 10, 1), job("a2", 10, 1), job("a3", 10, 1), job("b1", 10, 2)]
+    assert names(FairShareScheduler(weights={}).order(jobs, now=NOW)) == ["a1", "b1", "a2", "a3"]
+
+
+def test_fair_share_respects_weights(job):
+    jobs = [job("a1", 10, 1), job("a2", 10, 1), job("a3", 10, 1), job("b1", 10, 2)]
+    assert names(FairShareScheduler(weights={2: 0.5}).order(jobs, now=NOW)) == ["a1", "a2", "b1", "a3"]
+    assert names(FairShareScheduler(weights={1: 3}).order(jobs, now=NOW)) == ["a1", "a2", "a3", "b1"]
+
+
+def test_fair_share_counts_jobs_ahead(job):
+    jobs = [job("a1", 10, 1), job("b1", 10, 2)]
+    ahead = [job("a0", 10, 1)]
+    assert names(FairShareScheduler(weights={}).order(jobs, ahead=ahead, now=NOW)) == ["b1", "a1"]
+
+
+def test_fair_share_remembers_previous_bursts(job):
+    scheduler = FairShareScheduler(weights={})
+    for pages in (30, 30):
+        scheduler.job_finished(job("a0", pages, 1))
+    # Очередь пользователя 1 опустела, но его 60 страниц не забыты.
+    jobs = [job("a1", 10, 1), job("b1", 10, 2), job("b2", 10, 2)]
+    assert names(scheduler.order(jobs, now=NOW)) == ["b1", "b2", "a1"]
+
+
+def test_fair_share_gives_no_credit_for_idle_time(job):
+    scheduler = FairShareScheduler(weights={})
+    scheduler.job_finished(job("a0", 10, 1))
+    scheduler.job_finished(job("a1", 10, 1))
+    # Пользователь 2 ничего не печатал, но стартует с виртуального времени,
+    # а не с нуля, — и не обгоняет пользователя 1 на всю его историю.
+    jobs = [job("a2", 10, 1), job("b1", 10, 2), job("b2", 10, 2), job("b3", 10, 2)]
+    assert names(scheduler.order(jobs, now=NOW)) == ["b1", "a2", "b2", "b3"]
+
+
+def test_fair_share_keeps_each_users_order(job):
+    jobs = [job("a1", 50, 1), job("a2", 1, 1), job("b1", 20, 2), job("b2", 20, 2)]
+    order = names(FairShareScheduler(weights={}).order(jobs, now=NOW))
+    assert [n for n in order if n.startswith("a")] == ["a1", "a2"]
+    assert [n for n in order if n.startswith("b")] == ["b1", "b2"]
+
+
+@pytest.fixture
+def queue(monkeypatch):
+    monkeypatch.setattr(print_service, "print_queue", print_service.deque())
+    monkeypatch.setattr(print_service, "prefetched", print_service.deque())
+    monkeypatch.setattr(print_service, "current_job", None)
+    monkeypatch.setattr(print_service, "preempted", None)
+    previous = get_scheduler()
+    yield print_service.print_queue
+    set_scheduler(previous)
+
+
+def test_waiting_jobs_follow_the_active_policy(queue, job):
+    queue.extend([job("big", 100), job("small", 1)])
+    prefetched = job("sent", 50)
+    print_service.prefetched.append(prefetched)
+
+    set_scheduler(FifoScheduler())
+    assert names(print_service.waiting_jobs()) == ["sent", "big", "small"]
+
+    set_scheduler(SjfScheduler(aging=0))
+    # Уже отправленные в CUPS остаются первыми; print_queue не переставляется.
+    assert names(print_service.waiting_jobs()) == ["sent", "small", "big"]
+    assert names(queue) == ["big", "small"]
+
+
+def test_jobs_already_in_cups_stay_first(queue, job):
+    recovered = job("recovered", 100)
+    recovered.cups_job_ids = ["17"]
+    queue.extend([job("small", 1), recovered, job("mid", 10)])
+
+    set_scheduler(SjfScheduler(aging=0))
+    assert names(print_service.waiting_jobs()) == ["recovered", "small", "mid"]
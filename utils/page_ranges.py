@@ -0,0 +1,185 @@
+import re
+from bisect import bisect_right
+from typing import Iterable, Iterator
+
+_PAGE_RE = re.compile(r"\d+")
+_RANGE_RE = re.compile(r"(\d+)-(\d+)")
+
+
+class PageRangeSet:
+    """
+    Set of page numbers stored as sorted, disjoint, non-adjacent intervals.
+
+    "1-5000" is one interval rather than 5000 ints: counting, membership,
+    intersection, clipping and formatting cost O(number of ranges), not
+    O(number of pages).  Instances are immutable.
+    """
+
+    __slots__ = ("_ranges",)
+
+    def __init__(self, ranges: Iterable[tuple[int, int]] = ()):
+        self._ranges: tuple[tuple[int, int], ...] = self._normalize(ranges)
+
+    @staticmethod
+    def _normalize(ranges: Iterable[tuple[int, int]]) -> tuple[tuple[int, int], ...]:
+        merged: list[list[int]] = []
+        for start, end in sorted((s, e) for s, e in ranges if s <= e):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        return tuple((s, e) for s, e in merged)
+
+    @classmethod
+    def _from_normalized(cls, ranges: tuple[tuple[int, int], ...]) -> "PageRangeSet":
+        """Wrap ranges that are already sorted, disjoint and non-adjacent."""
+        obj = cls.__new__(cls)
+        obj._ranges = ranges
+        return obj
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+    @classmethod
+    def from_range(cls, start: int, end: int) -> "PageRangeSet":
+        return cls._from_normalized(((start, end),) if start <= end else ())
+
+    @classmethod
+    def full(cls, page_count: int) -> "PageRangeSet":
+        """Pages 1..page_count."""
+        return cls.from_range(1, page_count)
+
+    @classmethod
+    def from_pages(cls, pages: Iterable[int]) -> "PageRangeSet":
+        return cls((p, p) for p in pages)
+
+    @classmethod
+    def from_string(cls, range_str: str) -> "PageRangeSet":
+        """
+        Lenient parse of "1,2-5,10" without bounds checks.
+        Raises ValueError on malformed numbers.  Reversed ranges are empty.
+        """
+        ranges = []
+        for part in range_str.replace(" ", "").split(","):
+            if "-" in part:
+                start, end = map(int, part.split("-"))
+            else:
+                start = end = int(part)
+            ranges.append((start, end))
+        return cls(ranges)
+
+    @classmethod
+    def parse(cls, input_str: str, max_pages: int | None = None, offset: int = 0) -> "PageRangeSet":
+        """
+        Strict parse of user input: validates format, order and bounds
+        (after subtracting ``offset``).  Raises ValueError with a message
+        suitable for the user.
+        """
+        input_str = input_str.replace(" ", "")
+        if not input_str:
+            raise ValueError("Пустой ввод")
+
+        ranges = []
+        for part in input_str.split(","):
+            if _PAGE_RE.fullmatch(part):
+                page = int(part) - offset
+                if page < 1 or (max_pages and page > max_pages):
+                    raise ValueError(f"Неверный номер страницы: {part}")
+                ranges.append((page, page))
+                continue
+            match = _RANGE_RE.fullmatch(part)
+            if not match:
+                raise ValueError(f"Неправильный формат: {part}")
+            start, end = int(match[1]) - offset, int(match[2]) - offset
+            if start > end:
+                raise ValueError(f"Неверный диапазон: {part}")
+            if max_pages and (start < 1 or end > max_pages):
+                raise ValueError(f"Диапазон вне допустимого диапазона: {part}")
+            ranges.append((start, end))
+        return cls(ranges)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+    @property
+    def ranges(self) -> tuple[tuple[int, int], ...]:
+        return self._ranges
+
+    def __len__(self) -> int:
+        return sum(end - start + 1 for start, end in self._ranges)
+
+    def __bool__(self) -> bool:
+        return bool(self._ranges)
+
+    def __iter__(self) -> Iterator[int]:
+        for start, end in self._ranges:
+            yield from range(start, end + 1)
+
+    def __contains__(self, page: int) -> bool:
+        i = bisect_right(self._ranges, (page, float("inf"))) - 1
+        return i >= 0 and self._ranges[i][0] <= page <= self._ranges[i][1]
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, PageRangeSet) and self._ranges == other._ranges
+
+    def __hash__(self) -> int:
+        return hash(self._ranges)
+
+    def __repr__(self) -> str:
+        return f"PageRangeSet({str(self)!r})"
+
+    def __str__(self) -> str:
+        """Canonical form, e.g. "1-3,5,7-9"."""
+        return ",".join(str(s) if s == e else f"{s}-{e}" for s, e in self._ranges)
+
+    # ------------------------------------------------------------------
+    # Operations
+    # ------------------------------------------------------------------
+    def intersection(self, other: "PageRangeSet") -> "PageRangeSet":
+        a, b = self._ranges, other._ranges
+        if not a or not b:
+            return PageRangeSet._from_normalized(())
+        # Интервалы self, лежащие целиком левее other, пропускаем бинпоиском:
+        # пересечение с одним блоком стоит O(log n + k), а не O(n).
+        i = max(bisect_right(a, (b[0][0], float("inf"))) - 1, 0)
+        j = 0
+        result = []
+        while i < len(a) and j < len(b):
+            start = max(a[i][0], b[j][0])
+            end = min(a[i][1], b[j][1])
+            if start <= end:
+                result.append((start, end))
+            if a[i][1] < b[j][1]:
+                i += 1
+            else:
+                j += 1
+        return PageRangeSet._from_normalized(tuple(result))
+
+    __and__ = intersection
+
+    def union(self, other: "PageRangeSet") -> "PageRangeSet":
+        return PageRangeSet(self._ranges + other._ranges)
+
+    __or__ = union
+
+    def split(self, size: int) -> list["PageRangeSet"]:
+        """Consecutive pieces of ``size`` pages each (the last may be shorter)."""
+        pieces: list[PageRangeSet] = []
+        current: list[tuple[int, int]] = []
+        room = size
+        for start, end in self._ranges:
+            while start <= end:
+                take = min(room, end - start + 1)
+                current.append((start, start + take - 1))
+                start += take
+                room -= take
+                if room == 0:
+                    pieces.append(PageRangeSet._from_normalized(tuple(current)))
+                    current, room = [], size
+        if current:
+            pieces.append(PageRangeSet._from_normalized(tuple(current)))
+        return pieces
+
+    def clip(self, page_count: int) -> "PageRangeSet":
+        """Restrict to pages that exist in a document of ``page_count`` pages."""
+        return self.intersection(PageRangeSet.full(page_count))
@@ -1,68 +1,20 @@
-import re
 from typing import List
 
-def parse_pages_str(input_str, max_pages: int = None, offset: int = 0) -> str:
-    input_str = input_str.replace(" ", "")
-    if not input_str:
-        raise ValueError("Пустой ввод")
+from utils.page_ranges import PageRangeSet
 
-    parts = input_str.split(',')
-    for part in parts:
-        if re.fullmatch(r"\d+", part):
-            page = int(part) - offset
-            if page < 1 or (max_pages and page > max_pages):
-                raise ValueError(f"Неверный номер страницы: {part}")
-        elif re.fullmatch(r"\d+-\d+", part):
-            start, end = map(int, part.split('-'))
-            start -= offset
-            end -= offset
-            if start > end:
-                raise ValueError(f"Неверный диапазон: {part}")
-            if max_pages and (start < 1 or end > max_pages):
-                raise ValueError(f"Диапазон вне допустимого диапазона: {part}")
-        else:
-            raise ValueError(f"Неправильный формат: {part}")
-
-    return input_str
+def parse_pages_str(input_str, max_pages: int = None) -> str:
+    """Validate user page input and return it in canonical form ("1-3,5")."""
+    return str(PageRangeSet.parse(input_str, max_pages))
 
 def extract_pages(range_str: str) -> List[int]:
-    result = set()
-    for part in range_str.replace(" ", "").split(","):
-        if "-" in part:
-            start, end = map(int, part.split("-"))
-            result.update(range(start, end + 1))
-        else:
-            result.add(int(part))
-    return sorted(result)
+    return list(PageRangeSet.from_string(range_str))
 
 def merge_pages(pages: List[int]) -> str:
-    if not pages:
-        return ""
-
-    pages = sorted(set(pages))
-    ranges = []
-    start = prev = pages[0]
-
-    for p in pages[1:]:
-        if p == prev + 1:
-            prev = p
-        else:
-            if start == prev:
-                ranges.append(str(start))
-            else:
-                ranges.append(f"{start}-{prev}")
-            start = prev = p
-
-    if start == prev:
-        ranges.append(str(start))
-    else:
-        ranges.append(f"{start}-{prev}")
-
-    return ",".join(ranges)
+    return str(PageRangeSet.from_pages(pages))
 
 
 def calculate_pages_count(range_str: str) -> int:
-    return len(extract_pages(range_str))
+    return len(PageRangeSet.from_string(range_str))
 
 
 def is_valid_page_range(range_str: str, max_pages: int) -> bool:
@@ -74,4 +26,16 @@ def is_valid_page_range(range_str: str, max_pages: int) -> bool:
 
 
 def normalize_page_range(range_str: str) -> str:
-    return merge_pages(extract_pages(range_str))
\ No newline at end of file
+    return str(PageRangeSet.from_string(range_str))
+
+
+def count_printed_pages(page_count: int, pages: str | None, copies: int | None) -> int:
+    """Pages a job puts on paper: the selected range (or the whole file) times copies."""
+    pages_count = page_count
+    if pages:
+        try:
+            pages_count = calculate_pages_count(pages)
+        except ValueError:
+            # Fall back to stored page_count if parsing fails
+            pass
+    return pages_count * (copies or 1)